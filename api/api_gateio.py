@@ -1,65 +1,569 @@
 import os
 import asyncio
+import bisect
+import hashlib
+import hmac
+import json
+import logging
+import threading
 import time
-from aiohttp import ClientSession, ClientError
-from dotenv import load_dotenv
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP, InvalidOperation
+from urllib.parse import urlencode, urlparse
+from aiohttp import ClientSession, ClientError, ClientResponseError, ClientTimeout, TCPConnector
+from yarl import URL
 from gate_api import SpotApi, Configuration, ApiClient
 from gate_api.exceptions import ApiException
+from api.rate_limiter import RateLimiter, DEFAULT_LIMITS, PUBLIC, PRIVATE, ORDER
 from control.logging_config import setup_logging
-
-# Memuat variabel lingkungan dari file .env
-load_dotenv()
+from control.env import load_env
 
 # Konfigurasi logging
 logger = setup_logging('api_gateio.log')
 
+BASE_URL = 'https://api.gateio.ws/api/v4'
+# Batas request batch Gate.io: /spot/batch_orders maksimal 4 currency pair, 10 order per pair
+BATCH_ORDER_LIMIT = 10
+BATCH_ORDER_PAIRS = 4
+BATCH_CANCEL_LIMIT = 20
+# /spot/my_trades: maksimal 1000 trade per halaman, rentang from/to maksimal 30 hari
+TRADES_PAGE_LIMIT = 1000
+TRADES_MAX_RANGE = 30 * 86400
+# /spot/candlesticks: maksimal 1000 candle per request
+CANDLES_LIMIT = 1000
+
+PAIR_CACHE_FILE = 'currency_pairs.json'
+# Sisi order yang diizinkan per trade_status pair (untradable: tidak ada)
+TRADE_STATUS_SIDES = {None: ('buy', 'sell'), 'tradable': ('buy', 'sell'), 'buyable': ('buy',), 'sellable': ('sell',)}
+
+def gate_signature(secret, method, path, query_string='', payload='', timestamp=''):
+    # Tanda tangan APIv4: HMAC-SHA512 atas method, path lengkap (/api/v4/...), query string,
+    # SHA512 hex dari body, dan timestamp (detik), dipisah baris baru
+    hashed_payload = hashlib.sha512((payload or '').encode('utf-8')).hexdigest()
+    message = '\n'.join([method.upper(), path, query_string or '', hashed_payload, str(timestamp)])
+    return hmac.new(secret.encode('utf-8'), message.encode('utf-8'), hashlib.sha512).hexdigest()
+
+class CurrencyPairCache:
+    # Metadata semua currency pair (precision, minimum amount, trade_status) dalam dict per pair.
+    # Dimuat dari disk saat start (warm start), di-refresh di thread latar belakang setiap ttl detik
+    # dengan If-None-Match / If-Modified-Since. Lookup dan prefix search tidak memakai jaringan.
+    def __init__(self, fetch, path=None, ttl=3600, wall_clock=time.time):
+        # fetch(headers) -> (list dict pair atau None jika 304, header respons)
+        self.fetch = fetch
+        self.path = path or os.getenv('PAIR_CACHE_FILE', PAIR_CACHE_FILE)
+        self.ttl = ttl
+        self.wall_clock = wall_clock
+        self.etag = None
+        self.last_modified = None
+        self.updated = None
+        # Dict dan daftar id terurut diganti bersamaan sehingga pembaca tidak perlu lock
+        self._index = ({}, [])
+        self.version = 0
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.load()
+
+    def __len__(self):
+        return len(self._index[0])
+
+    def __contains__(self, pair):
+        return pair in self._index[0]
+
+    def get(self, pair):
+        return self._index[0].get(pair)
+
+    def pairs(self):
+        return self._index[1]
+
+    def search(self, prefix, limit=20):
+        # Daftar id terurut + bisect: O(log n) untuk menemukan awal rentang prefix
+        prefix = prefix.strip().upper()
+        ids = self._index[1]
+        start = bisect.bisect_left(ids, prefix)
+        result = []
+        for pair in ids[start:]:
+            if not pair.startswith(prefix) or len(result) >= limit:
+                break
+            result.append(pair)
+        return result
+
+    @property
+    def stale(self):
+        return self.updated is None or self.wall_clock() - self.updated >= self.ttl
+
+    def _set_pairs(self, pairs):
+        index = {pair['id']: pair for pair in pairs if pair.get('id')}
+        self._index = (index, sorted(index))
+        self.version += 1
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                cached = json.load(file)
+            self._set_pairs(cached['pairs'])
+            self.etag = cached.get('etag')
+            self.last_modified = cached.get('last_modified')
+            self.updated = cached.get('updated')
+            logger.debug("Loaded %d currency pairs from %s", len(self), self.path)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error("Error loading currency pair cache %s: %s", self.path, e)
+
+    def save(self):
+        cached = {
+            'updated': self.updated,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'pairs': list(self._index[0].values()),
+        }
+        # Tulis ke file sementara lalu rename agar file cache tidak pernah setengah jadi
+        temp_path = self.path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(cached, file)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.error("Error saving currency pair cache %s: %s", self.path, e)
+
+    def refresh(self, force=False):
+        with self._refresh_lock:
+            if not force and not self.stale:
+                return False
+            headers = {}
+            if len(self) and self.etag:
+                headers['If-None-Match'] = self.etag
+            if len(self) and self.last_modified:
+                headers['If-Modified-Since'] = self.last_modified
+            try:
+                pairs, response_headers = self.fetch(headers)
+            except Exception as e:
+                # Termasuk error koneksi urllib3; cache lama tetap dipakai
+                logger.error("Error refreshing currency pairs: %s", e)
+                return False
+            response_headers = {key.lower(): value for key, value in (response_headers or {}).items()}
+            self.updated = self.wall_clock()
+            if pairs is None:
+                logger.debug("Currency pairs not modified")
+            else:
+                self._set_pairs(pairs)
+                self.etag = response_headers.get('etag')
+                self.last_modified = response_headers.get('last-modified')
+                logger.debug("Currency pairs refreshed: %d pairs", len(self))
+            self.save()
+            return pairs is not None
+
+    def ensure_loaded(self):
+        # Untuk pemanggil tanpa thread refresh: muat sinkron hanya jika belum ada data sama sekali
+        if not len(self):
+            self.refresh(force=True)
+        return self
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='CurrencyPairRefresh', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            # Bangun lagi saat cache menjadi stale
+            remaining = self.ttl if self.updated is None else self.updated + self.ttl - self.wall_clock()
+            self._stop.wait(max(remaining, 1))
+
+    def round_order(self, pair, amount, price, side=None):
+        # Membulatkan amount (ke bawah) dan price sesuai precision pair, lalu memeriksa batas minimum.
+        # Mengembalikan (amount, price) sebagai string siap kirim; ValueError jika order tidak valid.
+        # Pair buyable/sellable hanya menerima order dengan side yang sesuai (tanpa side: hanya tradable).
+        info = self.get(pair)
+        if info is None:
+            raise ValueError(f"Unknown currency pair: {pair}")
+        status = info.get('trade_status')
+        required = (side,) if side else ('buy', 'sell')
+        if not all(required_side in TRADE_STATUS_SIDES.get(status, ()) for required_side in required):
+            raise ValueError(f"{pair} is not tradable for {side or 'both sides'} ({status})")
+        try:
+            amount = Decimal(str(amount))
+            price = Decimal(str(price))
+        except InvalidOperation:
+            raise ValueError(f"Invalid amount or price for {pair}")
+        if info.get('amount_precision') is not None:
+            amount = amount.quantize(Decimal(1).scaleb(-int(info['amount_precision'])), rounding=ROUND_DOWN)
+        if info.get('precision') is not None:
+            price = price.quantize(Decimal(1).scaleb(-int(info['precision'])), rounding=ROUND_HALF_UP)
+        if amount <= 0 or price <= 0:
+            raise ValueError(f"Amount and price must be positive after rounding for {pair}")
+        if info.get('min_base_amount') and amount < Decimal(info['min_base_amount']):
+            raise ValueError(f"Amount {amount} below minimum {info['min_base_amount']} for {pair}")
+        if info.get('min_quote_amount') and amount * price < Decimal(info['min_quote_amount']):
+            raise ValueError(f"Order value {amount * price} below minimum {info['min_quote_amount']} for {pair}")
+        return str(amount), str(price)
+
 class GateioAPI:
-    def __init__(self, api_key=None, secret_key=None, rate_limit=10):
+    def __init__(self, api_key=None, secret_key=None, rate_limit=10, base_url=BASE_URL, bulk_threshold=10, max_concurrency=10,
+                 rate_limiter=None, max_retries=2, pool_limit=100, pool_limit_per_host=30, keepalive_timeout=60,
+                 dns_cache_ttl=300, request_timeout=15, symbol_cache_ttl=3600):
+        # .env dimuat di sini (sekali), bukan saat modul di-import
+        load_env()
         self.api_key = api_key or os.getenv('API_KEY')
         self.secret_key = secret_key or os.getenv('SECRET_KEY')
         self.configuration = Configuration(key=self.api_key, secret=self.secret_key)
         self.api_client = ApiClient(self.configuration)
         self.spot_api = SpotApi(self.api_client)
         self.rate_limit = rate_limit
-        self.requests_made = 0
-        self.last_request_time = time.time()
+        if rate_limiter is None:
+            # rate_limit mengatur bucket market data publik, bucket private memakai default
+            limits = dict(DEFAULT_LIMITS)
+            limits[PUBLIC] = (rate_limit, rate_limit)
+            rate_limiter = RateLimiter(limits)
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        # Pengaturan pool koneksi HTTP yang dipakai ulang antar siklus refresh
+        self.pool_limit = pool_limit
+        self.pool_limit_per_host = pool_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.request_timeout = request_timeout
+        # Satu ClientSession per event loop; session aiohttp tidak boleh dipakai lintas loop
+        self._sessions = {}
+        self.base_url = base_url
+        # Watchlist dengan jumlah pair >= bulk_threshold diambil dengan satu request /spot/tickers
+        self.bulk_threshold = bulk_threshold
+        # Batas jumlah request per pair yang berjalan bersamaan
+        self.max_concurrency = max_concurrency
+        # Metadata currency pair (cache disk + refresh latar belakang, lihat CurrencyPairCache.start)
+        self.currency_pairs = CurrencyPairCache(self._fetch_currency_pairs, ttl=symbol_cache_ttl)
         logger.debug("GateioAPI instance created with rate_limit: %d", rate_limit)
 
     def get_all_symbols(self) -> list:
+        return list(self.currency_pairs.ensure_loaded().pairs())
+
+    def get_symbol_set(self) -> frozenset:
+        # Set simbol untuk validasi import; dibaca dari cache metadata tanpa request baru
+        return frozenset(self.currency_pairs.ensure_loaded().pairs())
+
+    def _fetch_currency_pairs(self, headers=None):
+        # GET /spot/currency_pairs dengan header kondisional (ETag / Last-Modified).
+        # Mengembalikan (list dict, header); list None jika server menjawab 304 Not Modified.
+        header_params = {'Accept': 'application/json'}
+        header_params.update(headers or {})
+        self.rate_limiter.acquire_sync(PUBLIC)
         try:
-            markets = self.spot_api.list_currency_pairs()
-            return [market.id for market in markets]
+            data, status, response_headers = self.spot_api.api_client.call_api(
+                '/spot/currency_pairs', 'GET', header_params=header_params,
+                response_type='list[CurrencyPair]', auth_settings=[], _return_http_data_only=False)
         except ApiException as e:
-            logger.error(f"Error getting all symbols: {e}")
-            return []
+            self.rate_limiter.update_from_headers(PUBLIC, e.headers, e.status)
+            if e.status == 304:
+                return None, e.headers
+            raise
+        self.rate_limiter.update_from_headers(PUBLIC, response_headers, status)
+        return [pair.to_dict() for pair in data], response_headers
+
+    def _spot_call(self, endpoint, method_name, *args, weight=1, **kwargs):
+        # Semua panggilan SpotApi sinkron lewat rate limiter; varian _with_http_info
+        # dipakai agar header X-Gate-RateLimit-* bisa dibaca
+        method = getattr(self.spot_api, f'{method_name}_with_http_info')
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire_sync(endpoint, weight)
+            try:
+                data, status, headers = method(*args, **kwargs)
+                self.rate_limiter.update_from_headers(endpoint, headers, status)
+                return data
+            except ApiException as e:
+                self.rate_limiter.update_from_headers(endpoint, e.headers, e.status)
+                if e.status != 429 or attempt == self.max_retries:
+                    raise
+                logger.debug("%s rate limited, retrying (%d)", method_name, attempt + 1)
+
+    async def get_session(self) -> ClientSession:
+        # Dibuat saat pertama dipakai dan dimiliki oleh event loop yang sedang berjalan
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            connector = TCPConnector(
+                limit=self.pool_limit,
+                limit_per_host=self.pool_limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            session = ClientSession(connector=connector, timeout=ClientTimeout(total=self.request_timeout))
+            self._sessions[loop] = session
+            logger.debug("HTTP connection pool created (limit=%d, per_host=%d)", self.pool_limit, self.pool_limit_per_host)
+        return session
 
-    async def rate_limited_fetch(self, url, session):
-        current_time = time.time()
-        if self.requests_made >= self.rate_limit and (current_time - self.last_request_time) < 1:
-            await asyncio.sleep(1 - (current_time - self.last_request_time))
-            self.requests_made = 0
-            self.last_request_time = time.time()
+    async def close_session(self):
+        # Dipanggil dari event loop pemilik session sebelum loop ditutup
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+            logger.debug("HTTP connection pool closed")
 
-        self.requests_made += 1
-        async with session.get(url) as response:
-            response.raise_for_status()
-            return await response.json()
+    async def rate_limited_fetch(self, url, session=None, endpoint=PUBLIC, weight=1):
+        if session is None:
+            session = await self.get_session()
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire(endpoint, weight)
+            async with session.get(url) as response:
+                self.rate_limiter.update_from_headers(endpoint, response.headers, response.status)
+                if response.status == 429 and attempt < self.max_retries:
+                    logger.debug("Rate limited on %s, retrying (%d)", url, attempt + 1)
+                    continue
+                response.raise_for_status()
+                return await response.json()
 
-    async def async_get_ticker_info(self, symbol: str, session: ClientSession) -> dict:
+    async def async_get_ticker_info(self, symbol: str, session: ClientSession = None) -> dict:
         try:
-            data = await self.rate_limited_fetch(f'https://api.gateio.ws/api/v4/spot/tickers?currency_pair={symbol}', session)
-            logger.debug(f"Data received for {symbol}: {data}")
+            data = await self.rate_limited_fetch(f'{self.base_url}/spot/tickers?currency_pair={symbol}', session)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Data received for %s: %s", symbol, data)
             if data:
                 return data[0]
             return {}
         except ClientError as e:
-            logger.error(f"Error getting ticker info for {symbol}: {e}")
+            logger.error("Error getting ticker info for %s: %s", symbol, e)
         return {}
 
+    async def async_get_all_tickers(self, session: ClientSession = None) -> list:
+        try:
+            data = await self.rate_limited_fetch(f'{self.base_url}/spot/tickers', session)
+            logger.debug("Bulk tickers received: %d pairs", len(data))
+            return data
+        except ClientError as e:
+            logger.error("Error getting all tickers: %s", e)
+        return []
+
+    async def async_get_tickers_bulk(self, symbols: list, session: ClientSession = None) -> dict:
+        # Satu request tanpa filter, lalu hanya pair yang dipantau yang disimpan
+        wanted = set(symbols)
+        tickers = await self.async_get_all_tickers(session)
+        return {ticker['currency_pair']: ticker for ticker in tickers if ticker.get('currency_pair') in wanted}
+
+    async def async_get_candlesticks(self, symbol: str, interval: str, limit=CANDLES_LIMIT,
+                                     session: ClientSession = None) -> list:
+        # Candle terakhir (terlama lebih dulu): [t, volume quote, close, high, low, open, volume base, closed].
+        # Error diteruskan ke pemanggil (backfill mencatat dan melewati pair tersebut).
+        query = urlencode({'currency_pair': symbol, 'interval': interval, 'limit': min(limit, CANDLES_LIMIT)})
+        return await self.rate_limited_fetch(f'{self.base_url}/spot/candlesticks?{query}', session)
+
+    def use_bulk_tickers(self, symbols: list) -> bool:
+        return len(symbols) >= self.bulk_threshold
+
+    def _signed_headers(self, method, path, query_string='', payload=''):
+        timestamp = str(int(time.time()))
+        return {
+            'Accept': 'application/json',
+            'Content-Type': 'application/json',
+            'KEY': self.api_key or '',
+            'Timestamp': timestamp,
+            'SIGN': gate_signature(self.secret_key or '', method, path, query_string, payload, timestamp),
+        }
+
+    async def signed_request(self, method, path, query=None, body=None, endpoint=PRIVATE, session=None):
+        # Request private APIv4 di atas pool aiohttp bersama. path relatif terhadap base_url,
+        # mis. '/spot/accounts'. Header ditandatangani ulang setiap percobaan (timestamp baru).
+        if session is None:
+            session = await self.get_session()
+        query_string = urlencode(query or {})
+        payload = json.dumps(body, separators=(',', ':')) if body is not None else ''
+        sign_path = urlparse(self.base_url).path + path
+        url = self.base_url + path + (f'?{query_string}' if query_string else '')
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire(endpoint)
+            headers = self._signed_headers(method, sign_path, query_string, payload)
+            # encoded=True: query dikirim persis seperti yang ditandatangani
+            async with session.request(method, URL(url, encoded=True), data=payload or None, headers=headers) as response:
+                self.rate_limiter.update_from_headers(endpoint, response.headers, response.status)
+                if response.status == 429 and attempt < self.max_retries:
+                    logger.debug("Rate limited on %s %s, retrying (%d)", method, path, attempt + 1)
+                    continue
+                if response.status >= 400:
+                    # Pesan error Gate.io (label/message) ikut dicatat
+                    text = await response.text()
+                    raise ClientResponseError(response.request_info, response.history, status=response.status,
+                                              message=text, headers=response.headers)
+                return await response.json()
+
+    async def async_get_account_balance(self, session: ClientSession = None) -> list:
+        try:
+            accounts = await self.signed_request('GET', '/spot/accounts', session=session)
+            return [
+                {
+                    "currency": account['currency'],
+                    "available": account['available'],
+                    "locked": account['locked'],
+                    "total": float(account['available']) + float(account['locked'])
+                }
+                for account in accounts
+            ]
+        except (ClientError, asyncio.TimeoutError) as e:
+            logger.error("Error getting account balance: %s", e)
+            return []
+
+    async def async_get_open_orders(self, symbol: str, session: ClientSession = None) -> list:
+        try:
+            return await self.signed_request('GET', '/spot/orders', {'currency_pair': symbol, 'status': 'open'}, session=session)
+        except (ClientError, asyncio.TimeoutError) as e:
+            logger.error("Error getting open orders for %s: %s", symbol, e)
+            return []
+
+    async def async_get_all_open_orders(self, session: ClientSession = None, limit=100) -> list:
+        # Semua order terbuka untuk semua pair lewat /spot/open_orders (dikelompokkan per pair oleh server).
+        # limit berlaku per pair; halaman berikutnya hanya diambil jika ada pair yang mencapai limit.
+        # Error tidak ditelan: snapshot gagal harus bisa dibedakan dari "tidak ada order".
+        orders = []
+        page = 1
+        while True:
+            groups = await self.signed_request('GET', '/spot/open_orders', {'page': page, 'limit': limit}, session=session)
+            for group in groups:
+                orders.extend(group.get('orders', []))
+            if not any(len(group.get('orders', [])) >= limit for group in groups):
+                return orders
+            page += 1
+
+    async def async_get_closed_orders(self, symbol: str, session: ClientSession = None) -> list:
+        try:
+            return await self.signed_request('GET', '/spot/orders', {'currency_pair': symbol, 'status': 'finished'}, session=session)
+        except (ClientError, asyncio.TimeoutError) as e:
+            logger.error("Error getting closed orders for %s: %s", symbol, e)
+            return []
+
+    async def async_create_order(self, symbol: str, side: str, amount: float, price: float, session: ClientSession = None) -> dict:
+        try:
+            if not len(self.currency_pairs):
+                # Muat metadata pertama kali tanpa memblokir event loop
+                await asyncio.get_running_loop().run_in_executor(None, self.currency_pairs.ensure_loaded)
+            order = self._prepare_order(symbol, side, amount, price)
+        except ValueError as e:
+            logger.error("Invalid order for %s: %s", symbol, e)
+            return {}
+        try:
+            return await self.signed_request('POST', '/spot/orders', body=order, endpoint=ORDER, session=session)
+        except (ClientError, asyncio.TimeoutError) as e:
+            logger.error("Error creating order for %s: %s", symbol, e)
+            return {}
+
+    async def async_cancel_order(self, symbol: str, order_id: str, session: ClientSession = None) -> dict:
+        try:
+            return await self.signed_request('DELETE', f'/spot/orders/{order_id}', {'currency_pair': symbol}, endpoint=ORDER, session=session)
+        except (ClientError, asyncio.TimeoutError) as e:
+            logger.error("Error canceling order %s for %s: %s", order_id, symbol, e)
+            return {}
+
+    async def async_get_trade_history(self, symbol: str, session: ClientSession = None) -> list:
+        try:
+            return await self.signed_request('GET', '/spot/my_trades', {'currency_pair': symbol}, session=session)
+        except (ClientError, asyncio.TimeoutError) as e:
+            logger.error("Error getting trade history for %s: %s", symbol, e)
+            return []
+
+    async def async_get_my_trades(self, symbol: str, start: int, end: int, page=1, limit=TRADES_PAGE_LIMIT,
+                                  session: ClientSession = None) -> list:
+        # Satu halaman /spot/my_trades untuk rentang [start, end] (detik epoch, maks TRADES_MAX_RANGE).
+        # Error diteruskan ke pemanggil agar sinkronisasi tidak menganggap halaman gagal sebagai kosong.
+        query = {'currency_pair': symbol, 'limit': limit, 'page': page, 'from': int(start), 'to': int(end)}
+        return await self.signed_request('GET', '/spot/my_trades', query, session=session)
+
+    async def async_validate_credentials(self, session: ClientSession = None) -> bool:
+        try:
+            await self.signed_request('GET', '/spot/accounts', session=session)
+            return True
+        except (ClientError, asyncio.TimeoutError) as e:
+            logger.error("Invalid API credentials: %s", e)
+            return False
+
+    async def async_create_orders(self, orders: list, session: ClientSession = None, chunk_size=BATCH_ORDER_LIMIT,
+                                  max_pairs=BATCH_ORDER_PAIRS) -> list:
+        # orders: list dict {currency_pair, side, amount, price}. Dikirim per chunk ke /spot/batch_orders
+        # (semua chunk bersamaan, lihat batch_order_chunks); hasil per order sesuai urutan input,
+        # masing-masing dengan 'succeeded'.
+        if session is None:
+            session = await self.get_session()
+        if not len(self.currency_pairs):
+            await asyncio.get_running_loop().run_in_executor(None, self.currency_pairs.ensure_loaded)
+        results = [None] * len(orders)
+        prepared = []
+        for i, order in enumerate(orders):
+            try:
+                prepared.append((i, self._prepare_order(order['currency_pair'], order['side'], order['amount'], order['price'])))
+            except (ValueError, KeyError) as e:
+                # Order tidak valid tidak ikut dikirim
+                results[i] = _failed_result(order, 'INVALID_ORDER', str(e))
+        chunks = batch_order_chunks(prepared, chunk_size, max_pairs)
+        for chunk_results in await asyncio.gather(*(self._create_order_chunk(chunk, session) for chunk in chunks)):
+            for i, result in chunk_results:
+                results[i] = result
+        return results
+
+    async def _create_order_chunk(self, chunk, session):
+        bodies = [order for _, order in chunk]
+        try:
+            response = await self.signed_request('POST', '/spot/batch_orders', body=bodies, endpoint=ORDER, session=session)
+            return list(zip((i for i, _ in chunk), response))
+        except ClientResponseError as e:
+            if not _batch_rejected(e):
+                # 5xx (gateway) atau 429 terakhir: batch mungkin sudah diproses, tidak diulang agar order tidak terduplikasi
+                logger.error("Batch order request failed (%s), not retrying", e.status)
+                return [(i, _failed_result(order, 'REQUEST_FAILED', f"HTTP {e.status}: {e.message}")) for i, order in chunk]
+            # Server menolak request batch (tidak ada order yang dibuat): kirim satu per satu secara bersamaan
+            logger.error("Batch order request failed (%s), falling back to single orders", e.status)
+        except (ClientError, asyncio.TimeoutError) as e:
+            # Status batch tidak diketahui; tidak diulang agar order tidak terduplikasi
+            logger.error("Batch order request failed: %s", e)
+            return [(i, _failed_result(order, 'REQUEST_FAILED', str(e))) for i, order in chunk]
+        singles = await asyncio.gather(*(self._create_single_order(order, session) for _, order in chunk))
+        return list(zip((i for i, _ in chunk), singles))
+
+    async def _create_single_order(self, order, session):
+        try:
+            result = await self.signed_request('POST', '/spot/orders', body=order, endpoint=ORDER, session=session)
+            return dict(result, succeeded=True)
+        except ClientResponseError as e:
+            return _error_result(order, e)
+        except (ClientError, asyncio.TimeoutError) as e:
+            return _failed_result(order, 'REQUEST_FAILED', str(e))
+
+    async def async_cancel_orders(self, orders: list, session: ClientSession = None, chunk_size=BATCH_CANCEL_LIMIT) -> list:
+        # orders: list dict {currency_pair, id}. Hasil per order sesuai urutan input, dengan 'succeeded'.
+        if session is None:
+            session = await self.get_session()
+        bodies = [{'currency_pair': order['currency_pair'], 'id': str(order['id'])} for order in orders]
+        chunks = [bodies[start:start + chunk_size] for start in range(0, len(bodies), chunk_size)]
+        results = []
+        for chunk_results in await asyncio.gather(*(self._cancel_order_chunk(chunk, session) for chunk in chunks)):
+            results.extend(chunk_results)
+        return results
+
+    async def _cancel_order_chunk(self, chunk, session):
+        try:
+            return await self.signed_request('POST', '/spot/cancel_batch_orders', body=chunk, endpoint=ORDER, session=session)
+        except ClientResponseError as e:
+            logger.error("Batch cancel request failed (%s), falling back to single cancels", e.status)
+        except (ClientError, asyncio.TimeoutError) as e:
+            logger.error("Batch cancel request failed: %s", e)
+            return [_failed_result(order, 'REQUEST_FAILED', str(e)) for order in chunk]
+        # Membatalkan order dua kali aman, jadi fallback tidak berisiko duplikasi
+        return await asyncio.gather(*(self._cancel_single_order(order, session) for order in chunk))
+
+    async def _cancel_single_order(self, order, session):
+        try:
+            result = await self.signed_request('DELETE', f"/spot/orders/{order['id']}", {'currency_pair': order['currency_pair']},
+                                               endpoint=ORDER, session=session)
+            return dict(result, succeeded=True)
+        except ClientResponseError as e:
+            return _error_result(order, e)
+        except (ClientError, asyncio.TimeoutError) as e:
+            return _failed_result(order, 'REQUEST_FAILED', str(e))
+
     def get_account_balance(self) -> list:
         try:
-            accounts = self.spot_api.list_spot_accounts()
-            logger.debug(f"Accounts fetched: {accounts}")
+            accounts = self._spot_call(PRIVATE, 'list_spot_accounts')
+            logger.debug("Accounts fetched: %s", accounts)
             return [
                 {
                     "currency": account.currency,
@@ -70,73 +574,140 @@ class GateioAPI:
                 for account in accounts
             ]
         except ApiException as e:
-            logger.error(f"Error getting account balance: {e}")
+            logger.error("Error getting account balance: %s", e)
             return []
 
     def get_open_orders(self, symbol: str) -> list:
         try:
-            open_orders = self.spot_api.list_orders(currency_pair=symbol, status='open')
+            open_orders = self._spot_call(PRIVATE, 'list_orders', currency_pair=symbol, status='open')
             return [order.to_dict() for order in open_orders]
         except ApiException as e:
-            logger.error(f"Error getting open orders for {symbol}: {e}")
+            logger.error("Error getting open orders for %s: %s", symbol, e)
             return []
 
     def get_closed_orders(self, symbol: str) -> list:
         try:
-            closed_orders = self.spot_api.list_orders(currency_pair=symbol, status='finished')
+            closed_orders = self._spot_call(PRIVATE, 'list_orders', currency_pair=symbol, status='finished')
             return [order.to_dict() for order in closed_orders]
         except ApiException as e:
-            logger.error(f"Error getting closed orders for {symbol}: {e}")
+            logger.error("Error getting closed orders for %s: %s", symbol, e)
             return []
 
     def get_server_time(self) -> dict:
         try:
-            server_time = self.spot_api.get_system_time()
+            server_time = self._spot_call(PUBLIC, 'get_system_time')
             return server_time.to_dict()
         except ApiException as e:
-            logger.error(f"Error getting server time: {e}")
+            logger.error("Error getting server time: %s", e)
             return {}
 
-    def create_order(self, symbol: str, side: str, amount: float, price: float) -> dict:
-        order = {
+    def _prepare_order(self, symbol, side, amount, price):
+        # Dibulatkan ke precision pair dan dicek terhadap minimum sebelum dikirim (ValueError jika tidak valid)
+        amount, price = self.currency_pairs.ensure_loaded().round_order(symbol, amount, price, side)
+        return {
             "currency_pair": symbol,
             "type": "limit",
             "side": side,
-            "amount": str(amount),
-            "price": str(price)
+            "amount": amount,
+            "price": price
         }
+
+    def create_order(self, symbol: str, side: str, amount: float, price: float) -> dict:
+        try:
+            order = self._prepare_order(symbol, side, amount, price)
+        except ValueError as e:
+            logger.error("Invalid order for %s: %s", symbol, e)
+            return {}
         try:
-            order_result = self.spot_api.create_order(order)
+            order_result = self._spot_call(ORDER, 'create_order', order)
             return order_result.to_dict()
         except ApiException as e:
-            logger.error(f"Error creating order for {symbol}: {e}")
+            logger.error("Error creating order for %s: %s", symbol, e)
             return {}
 
     def cancel_order(self, symbol: str, order_id: str) -> dict:
         try:
-            cancel_result = self.spot_api.cancel_order(order_id, symbol)
+            cancel_result = self._spot_call(ORDER, 'cancel_order', order_id, symbol)
             return cancel_result.to_dict()
         except ApiException as e:
-            logger.error(f"Error canceling order {order_id} for {symbol}: {e}")
+            logger.error("Error canceling order %s for %s: %s", order_id, symbol, e)
             return {}
 
     def get_trade_history(self, symbol: str) -> list:
+        # Semua halaman (tanpa from/to server mengembalikan 7 hari terakhir); untuk histori
+        # panjang dan sinkronisasi inkremental gunakan control.trade_history.TradeHistorySync
         try:
-            trade_history = self.spot_api.list_my_trades(currency_pair=symbol)
-            return [trade.to_dict() for trade in trade_history]
+            trades = []
+            page = 1
+            while True:
+                trade_history = self._spot_call(PRIVATE, 'list_my_trades', currency_pair=symbol, limit=TRADES_PAGE_LIMIT, page=page)
+                trades.extend(trade.to_dict() for trade in trade_history)
+                if len(trade_history) < TRADES_PAGE_LIMIT:
+                    return trades
+                page += 1
         except ApiException as e:
-            logger.error(f"Error getting trade history for {symbol}: {e}")
+            logger.error("Error getting trade history for %s: %s", symbol, e)
             return []
 
-    async def fetch_tickers_for_symbols(self, symbols: list) -> dict:
-        async with ClientSession() as session:
-            tasks = [self.async_get_ticker_info(symbol, session) for symbol in symbols]
-            return await asyncio.gather(*tasks)
+    async def fetch_tickers_for_symbols(self, symbols: list, session: ClientSession = None, max_concurrency=None, timeout=5) -> list:
+        if session is None:
+            session = await self.get_session()
+
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        async def fetch_one(symbol):
+            async with semaphore:
+                # Timeout dihitung per pair, setelah slot semaphore didapat
+                try:
+                    return await asyncio.wait_for(self.async_get_ticker_info(symbol, session), timeout=timeout)
+                except asyncio.TimeoutError:
+                    logger.debug("Timeout fetching data for %s", symbol)
+                    return {}
+
+        # gather mengembalikan hasil sesuai urutan symbols
+        return await asyncio.gather(*(fetch_one(symbol) for symbol in symbols))
 
     def validate_credentials(self):
         try:
-            self.spot_api.list_spot_accounts()
+            self._spot_call(PRIVATE, 'list_spot_accounts')
             return True
         except ApiException as e:
-            logger.error(f"Invalid API credentials: {e}")
+            logger.error("Invalid API credentials: %s", e)
             return False
+
+def _batch_rejected(error):
+    # 4xx (selain 429) berarti seluruh request batch ditolak sebelum diproses; 5xx dari gateway
+    # bisa datang setelah order sudah dibuat
+    return 400 <= error.status < 500 and error.status != 429
+
+def _failed_result(order, label, message):
+    return dict(order, succeeded=False, label=label, message=message)
+
+def _error_result(order, error):
+    # Body error Gate.io: {"label": "...", "message": "..."}
+    try:
+        body = json.loads(error.message)
+        return _failed_result(order, body.get('label', str(error.status)), body.get('message', ''))
+    except (TypeError, ValueError, AttributeError):
+        return _failed_result(order, str(error.status), error.message)
+
+def batch_order_chunks(prepared, chunk_size=BATCH_ORDER_LIMIT, max_pairs=BATCH_ORDER_PAIRS):
+    # prepared: list (indeks, body order). Order dikelompokkan per currency_pair (maksimal chunk_size per
+    # pair) lalu setiap request diisi maksimal max_pairs pair berbeda; kelompok kedua dan seterusnya dari
+    # pair yang sama masuk ke request lain. Urutan order per pair tetap.
+    groups = {}
+    for item in prepared:
+        groups.setdefault(item[1]['currency_pair'], []).append(item)
+    chunks = []
+    for pair, items in groups.items():
+        for start in range(0, len(items), chunk_size):
+            run = items[start:start + chunk_size]
+            # Request pertama yang belum berisi pair ini dan masih punya tempat
+            for chunk_pairs, chunk in chunks:
+                if pair not in chunk_pairs and len(chunk_pairs) < max_pairs:
+                    chunk_pairs.add(pair)
+                    chunk.extend(run)
+                    break
+            else:
+                chunks.append(({pair}, list(run)))
+    return [chunk for _, chunk in chunks]
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+from control.logging_config import setup_logging
+
+# Konfigurasi logging
+logger = setup_logging('rate_limiter.log')
+
+# Kelas endpoint, masing-masing punya bucket sendiri
+PUBLIC = 'public'    # market data (tickers, currency_pairs, candlesticks)
+PRIVATE = 'private'  # akun spot dan query order/trade
+ORDER = 'order'      # buat/batal order
+
+# (rate token per detik, kapasitas burst). Batas Gate.io: 200 request / 10 detik
+# untuk public dan private, 10 request / detik untuk order. Burst + rate * 10 detik
+# tetap <= 200 sehingga jendela 10 detik exchange tidak pernah terlampaui.
+DEFAULT_LIMITS = {
+    PUBLIC: (18, 20),
+    PRIVATE: (18, 20),
+    ORDER: (9, 10),
+}
+
+HEADER_REMAIN = 'x-gate-ratelimit-requests-remain'
+HEADER_RESET = 'x-gate-ratelimit-reset-timestamp'
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        # Lock thread (bukan asyncio.Lock) karena bucket dipakai dari event loop worker
+        # dan dari thread BalanceWorker yang memanggil SpotApi secara sinkron
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def reserve(self, weight=1):
+        # Token langsung dipotong (boleh negatif) sehingga setiap pemanggil mendapat
+        # slot waktunya sendiri; nilai kembali adalah lama menunggu sebelum request dikirim
+        if weight > self.capacity:
+            raise ValueError(f"weight {weight} exceeds bucket capacity {self.capacity}")
+        with self._lock:
+            self._refill(self.clock())
+            self._tokens -= weight
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def penalize(self, delay):
+        # Kosongkan bucket sehingga request berikutnya baru lolos setelah delay detik
+        if delay <= 0:
+            return
+        with self._lock:
+            self._refill(self.clock())
+            self._tokens = min(self._tokens, 0.0) - delay * self.rate
+
+    def limit_remaining(self, remaining):
+        # Server tahu lebih banyak dari kita (request dari aplikasi lain dengan key yang sama)
+        with self._lock:
+            self._refill(self.clock())
+            self._tokens = min(self._tokens, float(remaining))
+
+    @property
+    def tokens(self):
+        with self._lock:
+            self._refill(self.clock())
+            return self._tokens
+
+class RateLimiter:
+    def __init__(self, limits=None, clock=time.monotonic, sleep=asyncio.sleep, sync_sleep=time.sleep, wall_clock=time.time):
+        limits = limits or DEFAULT_LIMITS
+        self.buckets = {endpoint: TokenBucket(rate, capacity, clock) for endpoint, (rate, capacity) in limits.items()}
+        self.sleep = sleep
+        self.sync_sleep = sync_sleep
+        self.wall_clock = wall_clock
+
+    def bucket(self, endpoint):
+        try:
+            return self.buckets[endpoint]
+        except KeyError:
+            raise ValueError(f"Unknown rate limit endpoint: {endpoint}")
+
+    async def acquire(self, endpoint=PUBLIC, weight=1):
+        wait = self.bucket(endpoint).reserve(weight)
+        if wait > 0:
+            await self.sleep(wait)
+
+    def acquire_sync(self, endpoint=PUBLIC, weight=1):
+        wait = self.bucket(endpoint).reserve(weight)
+        if wait > 0:
+            self.sync_sleep(wait)
+
+    def update_from_headers(self, endpoint, headers, status=None):
+        if not headers and status != 429:
+            return
+        bucket = self.bucket(endpoint)
+        headers = {key.lower(): value for key, value in (headers or {}).items()}
+
+        remaining = _to_float(headers.get(HEADER_REMAIN))
+        if remaining is not None:
+            bucket.limit_remaining(remaining)
+
+        if status == 429 or remaining == 0:
+            delay = self._retry_delay(headers)
+            logger.warning("Rate limited on %s endpoint, backing off %.2fs", endpoint, delay)
+            bucket.penalize(delay)
+
+    def _retry_delay(self, headers):
+        retry_after = _to_float(headers.get('retry-after'))
+        if retry_after is not None:
+            return retry_after
+        reset = _to_float(headers.get(HEADER_RESET))
+        if reset is not None:
+            # Reset timestamp dikirim dalam milidetik epoch
+            return max(0.0, reset / 1000 - self.wall_clock())
+        return 1.0
+
+def _to_float(value):
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+from aiohttp import ClientError, WSMsgType
+from control.logging_config import setup_logging
+
+# Konfigurasi logging
+logger = setup_logging('ws_gateio.log')
+
+WS_URL = 'wss://api.gateio.ws/ws/v4/'
+
+def ws_signature(secret, channel, event, timestamp):
+    # Auth channel private WebSocket v4: HMAC-SHA512 atas "channel=...&event=...&time=..."
+    message = f'channel={channel}&event={event}&time={timestamp}'
+    return hmac.new(secret.encode('utf-8'), message.encode('utf-8'), hashlib.sha512).hexdigest()
+
+class GateioWebSocket:
+    def __init__(self, api, url=WS_URL, channel='spot.tickers', heartbeat=20, reconnect_min=1, reconnect_max=60,
+                 private=False, on_connect=None):
+        # api dipakai untuk pool koneksi bersama (GateioAPI.get_session) dan, untuk channel
+        # private (mis. spot.orders), api_key/secret_key untuk auth
+        self.api = api
+        self.url = url
+        self.channel = channel
+        self.private = private
+        # Coroutine yang dipanggil setiap (re)connect setelah subscribe, mis. untuk sinkron ulang via REST
+        self.on_connect = on_connect
+        self.heartbeat = heartbeat
+        self.reconnect_min = reconnect_min
+        self.reconnect_max = reconnect_max
+        self.pairs = set()
+        self._ws = None
+        self._closed = False
+        self._closed_event = None
+
+    @property
+    def connected(self):
+        return self._ws is not None and not self._ws.closed
+
+    async def subscribe(self, pairs):
+        new_pairs = sorted(set(pairs) - self.pairs)
+        if not new_pairs:
+            return
+        self.pairs.update(new_pairs)
+        # Jika belum terhubung, pair akan dikirim saat (re)connect
+        if self.connected:
+            await self._send('subscribe', new_pairs)
+
+    async def unsubscribe(self, pairs):
+        old_pairs = sorted(self.pairs & set(pairs))
+        if not old_pairs:
+            return
+        self.pairs.difference_update(old_pairs)
+        if self.connected:
+            await self._send('unsubscribe', old_pairs)
+
+    async def _send(self, event, pairs):
+        timestamp = int(time.time())
+        message = {"time": timestamp, "channel": self.channel, "event": event, "payload": pairs}
+        if self.private:
+            message["auth"] = {
+                "method": "api_key",
+                "KEY": self.api.api_key,
+                "SIGN": ws_signature(self.api.secret_key, self.channel, event, timestamp),
+            }
+        try:
+            await self._ws.send_str(json.dumps(message))
+            logger.debug("%s %s: %d pairs", event, self.channel, len(pairs))
+        except (ClientError, ConnectionError) as e:
+            # Koneksi putus; subscription dikirim ulang saat reconnect
+            logger.error("Error sending %s for %s: %s", event, self.channel, e)
+
+    async def stream(self):
+        # Async generator yang menghasilkan dict ticker; reconnect otomatis dengan backoff eksponensial
+        self._closed_event = asyncio.Event()
+        backoff = self.reconnect_min
+        while not self._closed:
+            try:
+                session = await self.api.get_session()
+                async with session.ws_connect(self.url, heartbeat=self.heartbeat) as ws:
+                    if self._closed:
+                        # close() dipanggil selagi ws_connect masih berjalan
+                        break
+                    self._ws = ws
+                    backoff = self.reconnect_min
+                    logger.info("WebSocket connected to %s", self.url)
+                    if self.pairs:
+                        await self._send('subscribe', sorted(self.pairs))
+                    if self.on_connect is not None:
+                        await self.on_connect()
+                    async for msg in ws:
+                        if msg.type == WSMsgType.TEXT:
+                            for result in self._parse(msg.data):
+                                yield result
+                        elif msg.type in (WSMsgType.CLOSED, WSMsgType.ERROR):
+                            break
+            except (ClientError, ConnectionError, asyncio.TimeoutError) as e:
+                logger.error("WebSocket error: %s", e)
+            finally:
+                self._ws = None
+            if self._closed:
+                break
+            logger.debug("WebSocket reconnecting in %ss", backoff)
+            try:
+                await asyncio.wait_for(self._closed_event.wait(), timeout=backoff)
+            except asyncio.TimeoutError:
+                pass
+            backoff = min(backoff * 2, self.reconnect_max)
+
+    def _parse(self, raw):
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            logger.error("Invalid WebSocket message: %s", raw)
+            return []
+        if data.get('channel') != self.channel:
+            return []
+        if data.get('error'):
+            logger.error("WebSocket %s error: %s", data.get('event'), data['error'])
+            return []
+        if data.get('event') != 'update':
+            return []
+        result = data.get('result')
+        if isinstance(result, list):
+            return result
+        return [result] if result else []
+
+    async def close(self):
+        self._closed = True
+        if self._closed_event is not None:
+            self._closed_event.set()
+        if self._ws is not None:
+            await self._ws.close()
@@ -0,0 +1,243 @@
+import bisect
+import itertools
+import math
+import threading
+import time
+from control.logging_config import setup_logging
+
+# Konfigurasi logging
+logger = setup_logging('alert_engine.log')
+
+UP = 'up'
+DOWN = 'down'
+# above/below: harga mencapai level dari bawah/atas, cross: level dilewati ke arah mana pun,
+# percent: harga bergerak value % dari harga referensi (harga pertama setelah alert dipasang)
+KIND_DIRECTIONS = {'above': (UP,), 'below': (DOWN,), 'cross': (UP, DOWN), 'percent': (UP, DOWN)}
+CSV_SOURCE = 'csv'
+
+class SortedLevels:
+    # Level harga terurut dengan id alert paralel. Pergerakan harga prev -> price menjadi
+    # satu rentang indeks lewat bisect, sehingga hanya alert yang terlewati yang disentuh.
+    def __init__(self):
+        self.levels = []
+        self.ids = []
+
+    def __len__(self):
+        return len(self.levels)
+
+    def add(self, level, alert_id):
+        i = bisect.bisect_right(self.levels, level)
+        self.levels.insert(i, level)
+        self.ids.insert(i, alert_id)
+
+    def remove(self, level, alert_id):
+        i = bisect.bisect_left(self.levels, level)
+        while i < len(self.levels) and self.levels[i] == level:
+            if self.ids[i] == alert_id:
+                del self.levels[i]
+                del self.ids[i]
+                return True
+            i += 1
+        return False
+
+    def pop_rising(self, low, high):
+        # Level dengan low < level <= high
+        return self._pop(bisect.bisect_right(self.levels, low), bisect.bisect_right(self.levels, high))
+
+    def pop_falling(self, low, high):
+        # Level dengan low <= level < high
+        return self._pop(bisect.bisect_left(self.levels, low), bisect.bisect_left(self.levels, high))
+
+    def _pop(self, lo, hi):
+        if hi <= lo:
+            return []
+        popped = self.ids[lo:hi]
+        del self.levels[lo:hi]
+        del self.ids[lo:hi]
+        return popped
+
+class PriceAlert:
+    __slots__ = ('id', 'pair', 'kind', 'value', 'hysteresis', 'cooldown', 'source', 'levels', 'armed',
+                 'last_fired', 'fired')
+
+    def __init__(self, alert_id, pair, kind, value, hysteresis, cooldown, source):
+        self.id = alert_id
+        self.pair = pair
+        self.kind = kind
+        self.value = value
+        self.hysteresis = hysteresis
+        self.cooldown = cooldown
+        self.source = source
+        # Level trigger per arah; None selama alert belum ditempatkan terhadap harga pertama
+        self.levels = None
+        self.armed = {}
+        self.last_fired = -math.inf
+        self.fired = 0
+
+    def rearm_level(self, direction):
+        # Trigger yang sudah fire aktif lagi setelah harga kembali melewati pita hysteresis
+        if direction == UP:
+            return self.levels[UP] * (1 - self.hysteresis)
+        return self.levels[DOWN] * (1 + self.hysteresis)
+
+    def as_dict(self):
+        return {'id': self.id, 'pair': self.pair, 'kind': self.kind, 'value': self.value,
+                'levels': dict(self.levels) if self.levels else None, 'armed': dict(self.armed),
+                'fired': self.fired, 'source': self.source}
+
+class _PairAlerts:
+    def __init__(self):
+        # Trigger aktif: up fire saat harga naik mencapai level, down saat turun mencapai level
+        self.up = SortedLevels()
+        self.down = SortedLevels()
+        # Trigger yang sudah fire, menunggu harga kembali: rearm_up saat harga >= level,
+        # rearm_down saat harga <= level
+        self.rearm_up = SortedLevels()
+        self.rearm_down = SortedLevels()
+        # Alert baru, ditempatkan pada tick berikutnya
+        self.pending = {}
+        self.last = None
+        self.count = 0
+
+class AlertEngine:
+    # Mengevaluasi ribuan alert harga per tick. Alert diindeks per pair dalam array level
+    # terurut; setiap tick hanya butuh beberapa bisect ditambah jumlah alert yang benar-benar
+    # terlewati, bukan scan semua alert. Aman dipanggil dari thread worker dan thread GUI.
+    def __init__(self, hysteresis=0.002, cooldown=60, clock=time.monotonic):
+        self.hysteresis = hysteresis
+        self.cooldown = cooldown
+        self.clock = clock
+        self.suppressed = 0
+        self._alerts = {}
+        self._pairs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._alerts)
+
+    def add_alert(self, pair, kind, value, hysteresis=None, cooldown=None, source=None):
+        # value: level harga (above/below/cross) atau persen pergerakan (percent)
+        if kind not in KIND_DIRECTIONS:
+            raise ValueError(f"Unknown alert kind: {kind}")
+        value = float(value)
+        if not value > 0:
+            raise ValueError(f"Alert value must be positive: {value}")
+        alert = PriceAlert(next(self._ids), pair, kind, value,
+                           self.hysteresis if hysteresis is None else hysteresis,
+                           self.cooldown if cooldown is None else cooldown, source)
+        with self._lock:
+            self._alerts[alert.id] = alert
+            state = self._pairs.setdefault(pair, _PairAlerts())
+            state.pending[alert.id] = alert
+            state.count += 1
+        return alert.id
+
+    def remove_alert(self, alert_id):
+        with self._lock:
+            return self._remove(alert_id)
+
+    def remove_source(self, source):
+        with self._lock:
+            ids = [alert.id for alert in self._alerts.values() if alert.source == source]
+            for alert_id in ids:
+                self._remove(alert_id)
+        return len(ids)
+
+    def _remove(self, alert_id):
+        alert = self._alerts.pop(alert_id, None)
+        if alert is None:
+            return False
+        state = self._pairs[alert.pair]
+        if alert.levels is None:
+            del state.pending[alert_id]
+        else:
+            for direction in KIND_DIRECTIONS[alert.kind]:
+                if alert.armed[direction]:
+                    levels = state.up if direction == UP else state.down
+                    levels.remove(alert.levels[direction], alert_id)
+                else:
+                    levels = state.rearm_down if direction == UP else state.rearm_up
+                    levels.remove(alert.rearm_level(direction), alert_id)
+        state.count -= 1
+        if not state.count:
+            del self._pairs[alert.pair]
+        return True
+
+    def load_notification_prices(self, prices, kind='cross'):
+        # {PAIR: PRICE} dari import_notifprice_from_csv; alert hasil impor sebelumnya diganti
+        self.remove_source(CSV_SOURCE)
+        for pair, price in prices.items():
+            self.add_alert(pair, kind, price, source=CSV_SOURCE)
+        logger.info("Loaded %d notification price alerts", len(prices))
+        return len(prices)
+
+    def alerts(self, pair=None):
+        with self._lock:
+            return [alert.as_dict() for alert in self._alerts.values() if pair is None or alert.pair == pair]
+
+    def pairs(self):
+        with self._lock:
+            return list(self._pairs)
+
+    def on_tick(self, pair, price, now=None):
+        # Mengembalikan daftar event (dict) untuk alert yang fire pada tick ini
+        state = self._pairs.get(pair)
+        if state is None or not price > 0:
+            return []
+        events = []
+        with self._lock:
+            if now is None:
+                now = self.clock()
+            prev = state.last
+            state.last = price
+            if prev is not None and price != prev:
+                if price > prev:
+                    for alert_id in state.up.pop_rising(prev, price):
+                        self._fire(state, self._alerts[alert_id], UP, price, now, events)
+                else:
+                    for alert_id in state.down.pop_falling(price, prev):
+                        self._fire(state, self._alerts[alert_id], DOWN, price, now, events)
+                for alert_id in state.rearm_up.pop_rising(-math.inf, price):
+                    self._arm(state, self._alerts[alert_id], DOWN)
+                for alert_id in state.rearm_down.pop_falling(price, math.inf):
+                    self._arm(state, self._alerts[alert_id], UP)
+            if state.pending:
+                for alert in state.pending.values():
+                    self._place(state, alert, price, now, events)
+                state.pending.clear()
+        return events
+
+    def _place(self, state, alert, price, now, events):
+        # Penempatan awal alert baru terhadap harga saat ini
+        if alert.kind == 'percent':
+            alert.levels = {UP: price * (1 + alert.value / 100), DOWN: price * (1 - alert.value / 100)}
+        else:
+            alert.levels = {direction: alert.value for direction in KIND_DIRECTIONS[alert.kind]}
+        for direction, level in alert.levels.items():
+            reached = price >= level if direction == UP else price <= level
+            if not reached:
+                self._arm(state, alert, direction)
+            elif alert.kind == 'cross':
+                # Level cross sudah di sisi ini; aktif setelah harga kembali melewati hysteresis
+                self._disarm(state, alert, direction)
+            else:
+                self._fire(state, alert, direction, price, now, events)
+
+    def _arm(self, state, alert, direction):
+        alert.armed[direction] = True
+        (state.up if direction == UP else state.down).add(alert.levels[direction], alert.id)
+
+    def _disarm(self, state, alert, direction):
+        alert.armed[direction] = False
+        (state.rearm_down if direction == UP else state.rearm_up).add(alert.rearm_level(direction), alert.id)
+
+    def _fire(self, state, alert, direction, price, now, events):
+        self._disarm(state, alert, direction)
+        if now - alert.last_fired < alert.cooldown:
+            self.suppressed += 1
+            return
+        alert.last_fired = now
+        alert.fired += 1
+        events.append({'id': alert.id, 'pair': alert.pair, 'kind': alert.kind, 'direction': direction,
+                       'level': alert.levels[direction], 'price': price, 'source': alert.source})
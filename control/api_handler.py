@@ -0,0 +1,18 @@
+# Modul ringan: dipakai dialog login sebelum modul berat (pandas, gate_api, aiohttp) dimuat.
+# GateioAPI di-import saat API benar-benar dibuat.
+
+class Worker:
+    def __init__(self):
+        self.api_instance = None
+
+    def initialize_api(self, api_key, api_secret):
+        from api.api_gateio import GateioAPI
+        self.api_instance = GateioAPI(api_key, api_secret)
+
+    def validate_credentials(self, api_key, api_secret):
+        from api.api_gateio import GateioAPI
+        temp_api = GateioAPI(api_key, api_secret)
+        return temp_api.validate_credentials()
+
+    def get_api_instance(self):
+        return self.api_instance
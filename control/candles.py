@@ -0,0 +1,277 @@
+import asyncio
+import threading
+import time
+import numpy as np
+import pandas as pd
+from aiohttp import ClientError
+from control.logging_config import setup_logging
+
+# Konfigurasi logging
+logger = setup_logging('candles.log')
+
+# Interval /spot/candlesticks Gate.io (detik)
+TIMEFRAMES = {'10s': 10, '1m': 60, '5m': 300, '15m': 900, '30m': 1800, '1h': 3600, '4h': 14400, '8h': 28800, '1d': 86400}
+DEFAULT_TIMEFRAMES = ('1m', '5m', '1h')
+CANDLE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+NAN = float('nan')
+
+class Bar:
+    # Candle yang sedang terbentuk; atribut float biasa agar update per tick murah
+    __slots__ = ('open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.open = self.high = self.low = self.close = NAN
+        self.volume = 0.0
+
+    def update(self, price, volume):
+        if self.open != self.open:
+            # Tick pertama di interval ini (open masih NaN)
+            self.open = self.high = self.low = price
+        elif price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += volume
+
+    def values(self):
+        return (self.open, self.high, self.low, self.close, self.volume)
+
+class CandleBuffer:
+    # Candle satu timeframe untuk semua pair dalam ring buffer 2-D (pair x waktu) yang
+    # dialokasikan di awal. Kolom ditentukan oleh waktu (start // timeframe % capacity), sehingga
+    # semua pair berbagi sumbu waktu yang sama dan bisa dihitung sekaligus. Tick hanya
+    # memperbarui Bar live; array ditulis sekali per candle yang ditutup.
+    def __init__(self, interval, capacity=500, rows=64, on_close=None):
+        self.interval = interval
+        self.timeframe = TIMEFRAMES[interval]
+        self.capacity = capacity
+        # Dipanggil dengan (buffer, start) setiap candle ditutup, mis. untuk indikator
+        self.on_close = on_close
+        self.rows = {}
+        self.bars = []
+        self.data = {field: np.full((rows, capacity), np.nan) for field in CANDLE_FIELDS}
+        # Waktu mulai (detik epoch) candle di setiap kolom; -1 jika kolom kosong
+        self.starts = np.full(capacity, -1, dtype=np.int64)
+        self.live_start = None
+        self.version = 0
+        # Bertambah setiap candle lama ditulis ulang (backfill); perhitungan inkremental harus diulang
+        self.history_version = 0
+
+    def pairs(self):
+        # Urutan baris array
+        return list(self.rows)
+
+    def row(self, pair):
+        row = self.rows.get(pair)
+        if row is None:
+            row = len(self.bars)
+            if row == self.data['close'].shape[0]:
+                self._grow(row * 2)
+            self.rows[pair] = row
+            self.bars.append(Bar())
+        return row
+
+    def _grow(self, rows):
+        for field, array in self.data.items():
+            grown = np.full((rows, self.capacity), np.nan)
+            grown[:array.shape[0]] = array
+            self.data[field] = grown
+
+    def _column(self, start):
+        return start // self.timeframe % self.capacity
+
+    def update(self, pair, price, volume, ts):
+        start = int(ts) - int(ts) % self.timeframe
+        if start != self.live_start:
+            if self.live_start is not None and start < self.live_start:
+                # Tick terlambat untuk candle yang sudah ditutup
+                return False
+            self.roll(start)
+        self.bars[self.row(pair)].update(price, volume)
+        return True
+
+    def roll(self, start):
+        # Menutup candle live (dan interval tanpa tick di antaranya) lalu membuka interval start
+        previous = self.live_start
+        self.live_start = start
+        if previous is None or not self.bars:
+            return
+        count = len(self.bars)
+        values = np.array([bar.values() for bar in self.bars])
+        # Pair tanpa tick di interval ini mendapat candle datar pada close sebelumnya
+        empty = np.isnan(values[:, 3])
+        if empty.any():
+            values[empty, :4] = self._close_before(previous, count)[empty, None]
+            values[empty, 4] = 0.0
+        self._write_column(previous, values, count)
+        gap_start = max(previous + self.timeframe, start - self.capacity * self.timeframe)
+        if gap_start < start:
+            flat = np.repeat(values[:, 3:4], 5, axis=1)
+            flat[:, 4] = 0.0
+            for gap in range(gap_start, start, self.timeframe):
+                self._write_column(gap, flat, count)
+        for bar in self.bars:
+            bar.reset()
+        self.version += 1
+        if self.on_close is not None:
+            self.on_close(self, previous)
+
+    def _close_before(self, start, count):
+        before = start - self.timeframe
+        column = self._column(before)
+        if self.starts[column] != before:
+            return np.full(count, np.nan)
+        return self.data['close'][:count, column]
+
+    def _write_column(self, start, values, count):
+        column = self._column(start)
+        if self.starts[column] != start:
+            # Kolom masih berisi candle lama (satu putaran ring sebelumnya)
+            for array in self.data.values():
+                array[:, column] = np.nan
+            self.starts[column] = start
+        for i, field in enumerate(CANDLE_FIELDS):
+            self.data[field][:count, column] = values[:, i]
+
+    def load(self, pair, candles, now=None):
+        # Candle dari /spot/candlesticks (terlama lebih dulu): [t, volume quote, close, high, low,
+        # open, volume base, closed]. Candle yang sudah selesai ditulis ke kolomnya; candle
+        # interval berjalan digabung ke Bar live.
+        now = time.time() if now is None else now
+        current = int(now) - int(now) % self.timeframe
+        if self.live_start is None or current > self.live_start:
+            self.roll(current)
+        row = self.row(pair)
+        oldest = self.live_start - self.capacity * self.timeframe
+        loaded = 0
+        for candle in candles:
+            start = int(candle[0])
+            if start < oldest or start > self.live_start:
+                continue
+            open_, high, low, close, volume = (float(candle[5]), float(candle[3]), float(candle[4]),
+                                               float(candle[2]), float(candle[6]))
+            if start == self.live_start:
+                bar = self.bars[row]
+                if bar.open != bar.open:
+                    bar.open, bar.high, bar.low, bar.close, bar.volume = open_, high, low, close, volume
+                else:
+                    bar.open = open_
+                    bar.high = max(bar.high, high)
+                    bar.low = min(bar.low, low)
+                    bar.volume = max(bar.volume, volume)
+                continue
+            column = self._column(start)
+            if self.starts[column] != start:
+                for array in self.data.values():
+                    array[:, column] = np.nan
+                self.starts[column] = start
+            for field, value in zip(CANDLE_FIELDS, (open_, high, low, close, volume)):
+                self.data[field][row, column] = value
+            loaded += 1
+        if loaded:
+            self.history_version += 1
+        return loaded
+
+    def column(self, start, field):
+        # Nilai satu candle yang sudah ditutup untuk semua pair; NaN jika waktu tersebut tidak ada di ring
+        column = self._column(start)
+        if self.starts[column] != start:
+            return np.full(len(self.bars), np.nan)
+        return self.data[field][:len(self.bars), column]
+
+    def history(self, count=None, fields=CANDLE_FIELDS):
+        # Candle yang sudah ditutup untuk semua pair, terlama -> terbaru: (starts, {field: array pair x count}).
+        # Waktu tanpa data (belum di-backfill / sebelum pair ditambahkan) berisi NaN.
+        count = min(count or self.capacity, self.capacity)
+        if self.live_start is None:
+            return np.empty(0, dtype=np.int64), {field: np.empty((len(self.bars), 0)) for field in fields}
+        starts = self.live_start - self.timeframe * np.arange(count, 0, -1, dtype=np.int64)
+        columns = self._column(starts)
+        missing = self.starts[columns] != starts
+        result = {}
+        for field in fields:
+            values = self.data[field][:len(self.bars), columns]
+            values[:, missing] = np.nan
+            result[field] = values
+        return starts, result
+
+    def live(self, pair):
+        row = self.rows.get(pair)
+        return None if row is None else self.bars[row]
+
+    def frame(self, pair, count=None):
+        # DataFrame OHLCV satu pair (candle yang sudah ditutup + candle live), untuk tampilan / ekspor
+        row = self.rows.get(pair)
+        if row is None:
+            return pd.DataFrame(columns=['time', *CANDLE_FIELDS])
+        starts, history = self.history(count)
+        data_frame = pd.DataFrame({field: history[field][row] for field in CANDLE_FIELDS})
+        data_frame.insert(0, 'time', starts)
+        data_frame.loc[len(data_frame)] = [self.live_start, *self.bars[row].values()]
+        data_frame = data_frame.dropna(subset=['close'])
+        data_frame['time'] = pd.to_datetime(data_frame['time'].astype('int64'), unit='s', utc=True)
+        return data_frame.reset_index(drop=True)
+
+class CandleAggregator:
+    # OHLCV beberapa timeframe dari feed ticker worker. Setiap tick O(1) per timeframe (update Bar
+    # live); volume candle diperkirakan dari selisih base_volume 24 jam antar ticker, sedangkan
+    # candle hasil backfill memakai volume dari exchange. Lock menjaga pembacaan dari thread GUI.
+    def __init__(self, intervals=DEFAULT_TIMEFRAMES, capacity=500, clock=time.time):
+        self.buffers = {interval: CandleBuffer(interval, capacity) for interval in intervals}
+        self.clock = clock
+        self.lock = threading.Lock()
+        self._buffers = list(self.buffers.values())
+        self._base_volumes = {}
+
+    def __getitem__(self, interval):
+        return self.buffers[interval]
+
+    def update(self, pair, price, base_volume=None, ts=None):
+        if ts is None:
+            ts = self.clock()
+        volume = 0.0
+        if base_volume is not None:
+            previous = self._base_volumes.get(pair)
+            self._base_volumes[pair] = base_volume
+            if previous is not None and base_volume > previous:
+                volume = base_volume - previous
+        with self.lock:
+            for buffer in self._buffers:
+                buffer.update(pair, price, volume, ts)
+
+    def update_ticker(self, pair, ticker, ts=None):
+        try:
+            price = float(ticker['last'])
+        except (KeyError, TypeError, ValueError):
+            return
+        try:
+            base_volume = float(ticker['base_volume'])
+        except (KeyError, TypeError, ValueError):
+            base_volume = None
+        self.update(pair, price, base_volume, ts)
+
+    def frame(self, pair, interval, count=None):
+        with self.lock:
+            return self.buffers[interval].frame(pair, count)
+
+    async def backfill(self, api, pairs, max_concurrency=5, session=None):
+        # Candle historis semua pair dan timeframe diambil bersamaan lewat rate limiter PUBLIC
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def load_one(pair, buffer):
+            async with semaphore:
+                try:
+                    candles = await api.async_get_candlesticks(pair, buffer.interval, buffer.capacity, session)
+                except (ClientError, asyncio.TimeoutError) as e:
+                    logger.error("Error backfilling %s %s candles: %s", pair, buffer.interval, e)
+                    return 0
+            with self.lock:
+                return buffer.load(pair, candles, self.clock())
+
+        results = await asyncio.gather(*(load_one(pair, buffer) for pair in pairs for buffer in self._buffers))
+        logger.info("Backfilled %d candles for %d pairs", sum(results), len(pairs))
+        return sum(results)
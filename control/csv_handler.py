@@ -1,132 +1,231 @@
-import csv
+import gzip
+import os
 from PyQt5.QtCore import QThread, pyqtSignal, Qt
 from PyQt5.QtWidgets import QFileDialog, QMessageBox, QProgressDialog
 import pandas as pd
 from control.logging_config import setup_logging
+# Pembacaan CSV impor ada di modul tanpa Qt; nama lama tetap tersedia dari modul ini
+from control.csv_import import (IMPORT_CHUNK_SIZE, normalize_pairs, read_import_csv, import_pairs_from_csv,
+                                import_notifprice_from_csv)
 
 # Konfigurasi logging
 logger = setup_logging('csv_handler.log')
 
+# Ekstensi file -> (format, kompresi)
+EXPORT_FORMATS = {
+    '.csv': ('csv', None),
+    '.csv.gz': ('csv', 'gzip'),
+    '.csv.zst': ('csv', 'zstd'),
+    '.parquet': ('parquet', 'snappy'),
+}
+EXPORT_FILTER = "CSV Files (*.csv);;CSV gzip (*.csv.gz);;CSV zstd (*.csv.zst);;Parquet Files (*.parquet);;All Files (*)"
+
+# Level 1: ukuran sedikit lebih besar, tapi beberapa kali lebih cepat dari default (9)
+GZIP_LEVEL = 1
+
+def _pyarrow():
+    # pyarrow opsional: dipakai untuk Parquet, zstd dan writer CSV cepat
+    try:
+        import pyarrow
+    except ImportError:
+        return None
+    return pyarrow
+
+def export_format(file_path):
+    lower = file_path.lower()
+    # Ekstensi terpanjang dicek dulu agar .csv.gz tidak dianggap .csv
+    for suffix in sorted(EXPORT_FORMATS, key=len, reverse=True):
+        if lower.endswith(suffix):
+            return EXPORT_FORMATS[suffix]
+    return EXPORT_FORMATS['.csv']
+
+def snapshot_model(model):
+    # Dipanggil di thread GUI: salin data model sekali, sesuai urutan dan filter proxy.
+    # Worker ekspor hanya memegang DataFrame ini dan tidak menyentuh model lagi.
+    source = model.sourceModel() if hasattr(model, 'mapToSource') else model
+    if hasattr(source, 'dataframe'):
+        data_frame = source.dataframe()
+        if source is not model:
+            rows = [model.mapToSource(model.index(row, 0)).row() for row in range(model.rowCount())]
+            data_frame = data_frame.iloc[rows].reset_index(drop=True)
+        return data_frame
+    columns = [model.headerData(column, Qt.Horizontal, Qt.DisplayRole) for column in range(model.columnCount())]
+    rows = [[model.index(row, column).data() for column in range(model.columnCount())] for row in range(model.rowCount())]
+    return pd.DataFrame(rows, columns=columns)
+
 class ExportWorker(QThread):
     progress = pyqtSignal(int)
     finished = pyqtSignal(str)
-    
-    def __init__(self, model, filePath):
+
+    def __init__(self, data_frame, filePath, chunk_size=100000):
         super().__init__()
-        self.model = model
+        self.data_frame = data_frame
         self.filePath = filePath
+        self.chunk_size = chunk_size
+        self._cancelled = False
+        self._progress = -1
+
+    def cancel(self):
+        # Dicek di antara chunk; file yang belum selesai dihapus
+        self._cancelled = True
 
     def run(self):
+        fmt, compression = export_format(self.filePath)
         try:
-            with open(self.filePath, 'w', newline='') as file:
-                writer = csv.writer(file)
-                header = [self.model.headerData(column, Qt.Horizontal, Qt.DisplayRole) for column in range(self.model.columnCount())]
-                writer.writerow(header)
-                logger.debug(f"CSV header written: {header}")
-                
-                for row in range(self.model.rowCount()):
-                    rowData = [self.model.index(row, column).data() for column in range(self.model.columnCount())]
-                    writer.writerow(rowData)
-                    progress_value = int((row + 1) / self.model.rowCount() * 100)
-                    self.progress.emit(progress_value)
-                    logger.debug(f"CSV row {row + 1} written: {rowData}")
+            if fmt == 'parquet':
+                completed = self.write_parquet(compression)
+            else:
+                completed = self.write_csv(compression)
+            if not completed:
+                self.remove_partial()
+                self.finished.emit("Ekspor dibatalkan")
+                logger.info("Export to %s cancelled", self.filePath)
+                return
             self.finished.emit(f"Data berhasil diekspor ke {self.filePath}")
-            logger.info(f"Data successfully exported to {self.filePath}")
+            logger.info("Data successfully exported to %s (%d rows)", self.filePath, len(self.data_frame))
         except Exception as e:
+            self.remove_partial()
             error_message = f"Ekspor gagal: {str(e)}"
             self.finished.emit(error_message)
             logger.error(error_message)
 
-class ExportNotifPriceWorker(QThread):
-    progress = pyqtSignal(int)
-    finished = pyqtSignal(str)
-    
-    def __init__(self, model, filePath):
+    def chunks(self):
+        total = len(self.data_frame)
+        for start in range(0, max(total, 1), self.chunk_size):
+            if self._cancelled:
+                return
+            yield start, self.data_frame.iloc[start:start + self.chunk_size]
+            self.report(min(start + self.chunk_size, total), total)
+
+    def report(self, done, total):
+        # Sinyal progress hanya dikirim saat persentase berubah
+        value = 100 if total == 0 else int(done * 100 / total)
+        if value != self._progress:
+            self._progress = value
+            self.progress.emit(value)
+
+    def write_csv(self, compression):
+        pa = _pyarrow()
+        if pa is None:
+            return self.write_csv_pandas(compression)
+        import pyarrow.csv as pa_csv
+        # Writer CSV pyarrow (C++) jauh lebih cepat dari DataFrame.to_csv untuk jutaan baris
+        if compression == 'zstd':
+            sink = pa.CompressedOutputStream(self.filePath, 'zstd')
+        elif compression == 'gzip':
+            sink = gzip.open(self.filePath, 'wb', compresslevel=GZIP_LEVEL)
+        else:
+            sink = open(self.filePath, 'wb')
+        schema = self.arrow_schema(pa)
+        with sink:
+            writer = pa_csv.CSVWriter(sink, schema)
+            for _, chunk in self.chunks():
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            writer.close()
+        return not self._cancelled
+
+    def write_csv_pandas(self, compression):
+        if compression == 'zstd':
+            raise RuntimeError("Ekspor .csv.zst membutuhkan paket pyarrow")
+        if compression == 'gzip':
+            file = gzip.open(self.filePath, 'wt', compresslevel=GZIP_LEVEL, newline='', encoding='utf-8')
+        else:
+            file = open(self.filePath, 'w', newline='', encoding='utf-8')
+        with file:
+            for start, chunk in self.chunks():
+                chunk.to_csv(file, header=start == 0, index=False)
+        return not self._cancelled
+
+    def write_parquet(self, compression):
+        pa = _pyarrow()
+        if pa is None:
+            raise RuntimeError("Ekspor Parquet membutuhkan paket pyarrow")
+        import pyarrow.parquet as pq
+        schema = self.arrow_schema(pa)
+        with pq.ParquetWriter(self.filePath, schema, compression=compression) as writer:
+            for _, chunk in self.chunks():
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        return not self._cancelled
+
+    def arrow_schema(self, pa):
+        # Schema ditentukan sekali dari seluruh DataFrame, bukan dari chunk pertama, agar chunk
+        # berikutnya (mis. kolom yang di chunk pertama kosong semua) tidak memicu konflik tipe
+        return pa.Schema.from_pandas(self.data_frame, preserve_index=False)
+
+    def remove_partial(self):
+        try:
+            os.remove(self.filePath)
+        except OSError:
+            pass
+
+class ImportWorker(QThread):
+    imported = pyqtSignal(object, list)
+    failed = pyqtSignal(str)
+
+    def __init__(self, filePath, api=None, with_price=False):
         super().__init__()
-        self.model = model
         self.filePath = filePath
+        self.api = api
+        self.with_price = with_price
 
     def run(self):
         try:
-            with open(self.filePath, 'w', newline='') as file:
-                writer = csv.writer(file)
-                header = [self.model.headerData(column, Qt.Horizontal, Qt.DisplayRole) for column in range(self.model.columnCount())]
-                writer.writerow(header)
-                logger.debug(f"CSV header written: {header}")
-                
-                for row in range(self.model.rowCount()):
-                    rowData = [self.model.index(row, column).data() for column in range(self.model.columnCount())]
-                    writer.writerow(rowData)
-                    progress_value = int((row + 1) / self.model.rowCount() * 100)
-                    self.progress.emit(progress_value)
-                    logger.debug(f"CSV row {row + 1} written: {rowData}")
-            self.finished.emit(f"Data berhasil diekspor ke {self.filePath}")
-            logger.info(f"Data successfully exported to {self.filePath}")
+            # Daftar simbol exchange (di-cache GateioAPI); tanpa api validasi simbol dilewati
+            valid_symbols = self.api.get_symbol_set() if self.api is not None else None
+            data, errors = read_import_csv(self.filePath, self.with_price, valid_symbols)
+            self.imported.emit(data, errors)
         except Exception as e:
-            error_message = f"Ekspor gagal: {str(e)}"
-            self.finished.emit(error_message)
-            logger.error(error_message)
+            logger.error("Error importing %s: %s", self.filePath, e)
+            self.failed.emit(str(e))
 
-def import_pairs_from_csv(file_path):
-    try:
-        df = pd.read_csv(file_path)
-        if 'PAIR' in df.columns:
-            imported_pairs = df['PAIR'].tolist()
-            logger.debug(f"Imported pairs: {imported_pairs}")
-            return imported_pairs
-        else:
-            raise ValueError("CSV file does not contain a 'PAIR' column.")
-    except Exception as e:
-        logger.error(f"Error importing pairs from CSV: {e}")
-        raise e
-
-def import_notifprice_from_csv(file_path):
-    try:
-        df = pd.read_csv(file_path)
-        if 'PAIR' in df.columns and 'PRICE' in df.columns:
-            imported_data = dict(zip(df['PAIR'], df['PRICE']))
-            logger.debug(f"Imported notification prices: {imported_data}")
-            return imported_data
-        else:
-            raise ValueError("CSV file does not contain required columns 'PAIR' and 'PRICE'.")
-    except Exception as e:
-        logger.error(f"Error importing notification prices from CSV: {e}")
-        raise e
+def format_import_errors(errors, limit=10):
+    lines = [f"Baris {line}: {value!r} ({reason})" for line, value, reason in errors[:limit]]
+    if len(errors) > limit:
+        lines.append(f"... dan {len(errors) - limit} baris lain")
+    return "\n".join(lines)
 
 def export_marketdata_to_csv(tableView_marketdata):
+    export_model(tableView_marketdata.model())
+
+def export_model(model):
+    export_dataframe(snapshot_model(model))
+
+def export_dataframe(data_frame, title="Save CSV"):
     options = QFileDialog.Options()
-    filePath, _ = QFileDialog.getSaveFileName(None, "Save CSV", "", "CSV Files (*.csv);;All Files (*)", options=options)
-    if filePath:
-        progress_dialog = QProgressDialog("Mengekspor data...", "Batal", 0, 100, None)
-        progress_dialog.setWindowModality(Qt.WindowModal)
-        progress_dialog.setMinimumDuration(0)
-        
-        export_worker = ExportWorker(tableView_marketdata.model(), filePath)
-        export_worker.progress.connect(progress_dialog.setValue)
-        export_worker.finished.connect(lambda message: QMessageBox.information(None, "Ekspor Selesai", message))
-        export_worker.start()
-        progress_dialog.exec_()
-
-def handle_import_csv():
-    options = QFileDialog.Options()
-    filePath, _ = QFileDialog.getOpenFileName(None, "Import CSV", "", "CSV Files (*.csv);;All Files (*)", options=options)
+    filePath, _ = QFileDialog.getSaveFileName(None, title, "", EXPORT_FILTER, options=options)
     if filePath:
-        try:
-            imported_pairs = import_pairs_from_csv(filePath)
-            return imported_pairs
-        except Exception as e:
-            logger.error(f"Error importing pairs from CSV: {e}")
-            QMessageBox.critical(None, "Import Error", str(e))
-            return None
+        export_frame(data_frame, filePath)
+
+def export_frame(data_frame, filePath):
+    progress_dialog = QProgressDialog("Mengekspor data...", "Batal", 0, 100, None)
+    progress_dialog.setWindowModality(Qt.WindowModal)
+    progress_dialog.setMinimumDuration(0)
+
+    export_worker = ExportWorker(data_frame, filePath)
+    export_worker.progress.connect(progress_dialog.setValue)
+    progress_dialog.canceled.connect(export_worker.cancel)
+    export_worker.finished.connect(progress_dialog.reset)
+    export_worker.finished.connect(lambda message: QMessageBox.information(None, "Ekspor Selesai", message))
+    export_worker.start()
+    progress_dialog.exec_()
+    # Dialog bisa ditutup (Batal) sebelum thread selesai; tunggu chunk terakhir
+    export_worker.wait()
 
-def handle_import_notifprice_csv():
+def start_import_csv(on_imported, api=None, with_price=False, parent=None):
+    # Pilih file lalu jalankan ImportWorker; on_imported(data, errors) dipanggil di thread GUI.
+    # Worker dikembalikan agar pemanggil menyimpan referensinya selama thread berjalan.
     options = QFileDialog.Options()
-    filePath, _ = QFileDialog.getOpenFileName(None, "Import CSV", "", "CSV Files (*.csv);;All Files (*)", options=options)
-    if filePath:
-        try:
-            imported_data = import_notifprice_from_csv(filePath)
-            return imported_data
-        except Exception as e:
-            logger.error(f"Error importing notification prices from CSV: {e}")
-            QMessageBox.critical(None, "Import Error", str(e))
-            return None
+    filePath, _ = QFileDialog.getOpenFileName(parent, "Import CSV", "", "CSV Files (*.csv);;All Files (*)", options=options)
+    if not filePath:
+        return None
+    import_worker = ImportWorker(filePath, api, with_price)
+    import_worker.imported.connect(on_imported)
+    import_worker.failed.connect(lambda message: QMessageBox.critical(parent, "Import Error", message))
+    import_worker.start()
+    return import_worker
+
+def handle_import_csv(on_imported, api=None, parent=None):
+    return start_import_csv(on_imported, api, False, parent)
+
+def handle_import_notifprice_csv(on_imported, api=None, parent=None):
+    return start_import_csv(on_imported, api, True, parent)
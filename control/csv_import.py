@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+from control.logging_config import setup_logging
+
+# Konfigurasi logging
+logger = setup_logging('csv_import.log')
+
+# Pembacaan CSV impor tanpa Qt; dipakai ImportWorker (GUI) dan mode headless
+IMPORT_CHUNK_SIZE = 50000
+
+def normalize_pairs(values):
+    # "btc-usdt", " BTC/USDT " -> "BTC_USDT"
+    return values.fillna('').str.strip().str.upper().str.replace(r'[-/ ]', '_', regex=True)
+
+def read_import_csv(file_path, with_price=False, valid_symbols=None, chunksize=IMPORT_CHUNK_SIZE):
+    # Membaca file per chunk, hanya kolom yang dibutuhkan. Mengembalikan (data, errors):
+    # data berupa list pair (urutan pertama muncul) atau dict pair -> harga (nilai terakhir menang),
+    # errors berupa list (nomor baris, nilai, alasan). Nomor baris mengikuti file (header = baris 1).
+    columns = ['PAIR', 'PRICE'] if with_price else ['PAIR']
+    try:
+        reader = pd.read_csv(file_path, usecols=columns, dtype=str, keep_default_na=False, chunksize=chunksize)
+    except ValueError:
+        raise ValueError(f"CSV file does not contain required columns {', '.join(repr(c) for c in columns)}.")
+    seen = {}
+    errors = []
+    with reader:
+        for chunk in reader:
+            lines = chunk.index.to_numpy() + 2
+            pairs = normalize_pairs(chunk['PAIR'])
+            bad = (pairs == '').to_numpy().copy()
+            reasons = np.where(bad, 'empty pair', '')
+            if valid_symbols:
+                unknown = ~bad & ~pairs.isin(valid_symbols).to_numpy()
+                reasons = np.where(unknown, 'unknown pair', reasons)
+                bad |= unknown
+            if with_price:
+                prices = pd.to_numeric(chunk['PRICE'].str.strip(), errors='coerce').to_numpy()
+                invalid_price = ~bad & ~(prices > 0)
+                reasons = np.where(invalid_price, 'invalid price', reasons)
+                bad |= invalid_price
+            for line, value, reason in zip(lines[bad], chunk['PAIR'].to_numpy()[bad], reasons[bad]):
+                errors.append((int(line), value, str(reason)))
+            if with_price:
+                seen.update(zip(pairs.to_numpy()[~bad], prices[~bad].tolist()))
+            else:
+                seen.update(dict.fromkeys(pairs.to_numpy()[~bad]))
+    data = seen if with_price else list(seen)
+    logger.debug("Imported %d entries from %s (%d rejected)", len(data), file_path, len(errors))
+    return data, errors
+
+def import_pairs_from_csv(file_path, valid_symbols=None):
+    try:
+        imported_pairs, _ = read_import_csv(file_path, valid_symbols=valid_symbols)
+        return imported_pairs
+    except Exception as e:
+        logger.error("Error importing pairs from CSV: %s", e)
+        raise e
+
+def import_notifprice_from_csv(file_path, valid_symbols=None):
+    try:
+        imported_data, _ = read_import_csv(file_path, with_price=True, valid_symbols=valid_symbols)
+        return imported_data
+    except Exception as e:
+        logger.error("Error importing notification prices from CSV: %s", e)
+        raise e
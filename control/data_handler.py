@@ -1,95 +1,161 @@
 import os
+from datetime import datetime
 import pandas as pd
-from PyQt5.QtCore import Qt
-from control.pandas_handler import PandasModel, CustomSortFilterProxyModel, AccountDataModel
-from control.worker import QThreadWorker, BalanceWorker
+from control.pandas_handler import ColumnarTableModel, CustomSortFilterProxyModel, SORT_ROLE
+from control.worker import QThreadWorker, StreamingWorker, BalanceWorker, OrderWorker
+from control.tick_history import TickHistoryStore
+from control.alert_engine import AlertEngine
+from control.candles import CandleAggregator, DEFAULT_TIMEFRAMES
+from control.indicators import IndicatorEngine, INDICATOR_COLUMNS, INDICATOR_FORMATS
+from control.ui_scheduler import UiUpdateScheduler
+from control.market_feed import TIME_FORMAT
 """from control.csv_handler import handle_import_csv"""
 from control.logging_config import setup_logging
-from api.api_gateio import GateioAPI
 
 logger = setup_logging('data_handler.log')
 
+MARKET_COLUMNS = ["TIME", "PAIR", "24H %", "PRICE", "VOLUME"]
+ACCOUNT_COLUMNS = ["CURRENCY", "AVAILABLE", "LOCKED", "TOTAL"]
+
+def create_market_model():
+    # Kolom indikator ditambahkan di kanan, bisa diurutkan seperti kolom angka lainnya
+    return ColumnarTableModel(MARKET_COLUMNS + INDICATOR_COLUMNS, key_column="PAIR",
+                              numeric_columns=["24H %", "PRICE", "VOLUME"] + INDICATOR_COLUMNS,
+                              formats={"VOLUME": "{:.2f}", **INDICATOR_FORMATS}, sign_columns=["24H %"])
+
+def create_account_model():
+    # Saldo ditampilkan dengan 2 desimal
+    return ColumnarTableModel(ACCOUNT_COLUMNS, key_column="CURRENCY", numeric_columns=["AVAILABLE", "LOCKED", "TOTAL"],
+                              formats={"AVAILABLE": "{:.2f}", "LOCKED": "{:.2f}", "TOTAL": "{:.2f}"})
+
 def init_market_data_model():
-    data_market = pd.DataFrame(columns=["TIME", "PAIR", "24H %", "PRICE", "VOLUME"])
+    data_market = pd.DataFrame(columns=MARKET_COLUMNS)
     proxy_model_market = CustomSortFilterProxyModel()
-    proxy_model_market.setSourceModel(PandasModel(data_market))
-    proxy_model_market.setSortRole(Qt.DisplayRole)
+    proxy_model_market.setSourceModel(create_market_model())
+    proxy_model_market.setSortRole(SORT_ROLE)
     return data_market, proxy_model_market
 
 def init_account_data_model():
-    data_account = pd.DataFrame(columns=["CURRENCY", "AVAILABLE", "LOCKED", "TOTAL"])
+    data_account = pd.DataFrame(columns=ACCOUNT_COLUMNS)
     proxy_model_account = CustomSortFilterProxyModel()
-    proxy_model_account.setSourceModel(AccountDataModel(data_account))
-    proxy_model_account.setSortRole(Qt.DisplayRole)
+    proxy_model_account.setSourceModel(create_account_model())
+    proxy_model_account.setSortRole(SORT_ROLE)
     return data_account, proxy_model_account
 
-def init_workers(pairs, api_key, api_secret):
-    api_instance = GateioAPI(api_key, api_secret)
-    worker = QThreadWorker(pairs, api_instance)
+def init_workers(pairs, api_instance, streaming=True, alerts=None, candles=None, indicators=None):
+    # api_instance: GateioAPI hasil login, dipakai bersama OrderWorker dan cache pair sehingga semua
+    # request satu API key melewati satu RateLimiter (session aiohttp tetap satu per event loop)
+    # Default memakai feed WebSocket spot.tickers, polling REST sebagai alternatif
+    worker_class = StreamingWorker if streaming else QThreadWorker
+    worker = worker_class(pairs, api_instance, alerts=alerts, candles=candles, indicators=indicators)
     balance_worker = BalanceWorker(api_instance)
     return worker, balance_worker
 
+def init_order_worker(api):
+    # Index order terbuka lokal; UI dan strategi membaca order_worker.index, bukan REST
+    return OrderWorker(api)
+
+def init_tick_history(root=None):
+    # Histori tick disimpan per pair per hari; lokasi bisa diatur lewat TICK_HISTORY_DIR
+    root = root or os.getenv('TICK_HISTORY_DIR', 'history')
+    return TickHistoryStore(root).start()
+
+def init_alert_engine():
+    # Hysteresis (fraksi harga) dan cooldown (detik) alert bisa diatur lewat ALERT_HYSTERESIS / ALERT_COOLDOWN
+    return AlertEngine(hysteresis=float(os.getenv('ALERT_HYSTERESIS', 0.002)),
+                       cooldown=float(os.getenv('ALERT_COOLDOWN', 60)))
+
+def init_candles():
+    # Timeframe dan jumlah candle per pair bisa diatur lewat CANDLE_TIMEFRAMES ("1m,5m,1h") / CANDLE_CAPACITY
+    intervals = [interval.strip() for interval in os.getenv('CANDLE_TIMEFRAMES', ','.join(DEFAULT_TIMEFRAMES)).split(',') if interval.strip()]
+    return CandleAggregator(intervals, capacity=int(os.getenv('CANDLE_CAPACITY', 500)))
+
+def init_indicators(candles):
+    # Indikator dihitung dari candle INDICATOR_TIMEFRAME (default timeframe pertama, 1m)
+    interval = os.getenv('INDICATOR_TIMEFRAME') or next(iter(candles.buffers))
+    return IndicatorEngine(candles[interval])
+
+def init_ui_scheduler(parent=None):
+    # Batas frekuensi update tabel bisa diatur lewat UI_MAX_FPS (default 4 kali per detik)
+    return UiUpdateScheduler(max_fps=float(os.getenv('UI_MAX_FPS', 4)), parent=parent)
+
 def update_model_market(data_frame, data_market, proxy_model_market):
     logger.debug("Updating market model with new data")
+    # Update tertunda untuk pair yang sudah dihapus dari tabel dibuang
+    model = proxy_model_market.sourceModel()
+    data_frame = data_frame[data_frame["PAIR"].isin(model.column_values("PAIR"))].copy()
+    if data_frame.empty:
+        return data_market
+
+    for column in ["24H %", "PRICE", "VOLUME"]:
+        data_frame[column] = data_frame[column].astype(float)
 
     if 'VOLUME' in data_frame.columns:
         data_frame["VOLUME"] = data_frame["VOLUME"].round(2)
 
-    for column in ["24H %", "PRICE", "VOLUME"]:
-        data_frame[column] = data_frame[column].astype(float)
-    data_market = data_frame
-    proxy_model_market.setSourceModel(PandasModel(data_market))
-    proxy_model_market.layoutChanged.emit()
+    # Update di tempat per PAIR; proxy dan view hanya memproses sel yang berubah.
+    # data_market hanya snapshot untuk operasi struktural (tambah/hapus/impor), tidak dibangun ulang per tick.
+    model.update_rows(data_frame)
     return data_market
 
+def update_model_indicators(data_frame, proxy_model_market):
+    # Hanya pair yang masih ada di tabel; baris yang baru dihapus tidak dimunculkan kembali
+    model = proxy_model_market.sourceModel()
+    data_frame = data_frame[data_frame["PAIR"].isin(model.column_values("PAIR"))]
+    if not data_frame.empty:
+        model.update_rows(data_frame)
+
 def update_model_account(data_frame, data_account, proxy_model_account):
-    logger.debug(f"Updating account model with new data: {data_frame}")
+    logger.debug("Updating account model with new data: %s", data_frame)
     data_account = data_frame
-    proxy_model_account.setSourceModel(AccountDataModel(data_account))
+    proxy_model_account.sourceModel().update_data(data_account)
     logger.debug("Account model updated.")
     return data_account
 
 def update_balance(balance, data_account, proxy_model_account):
     logger.debug("Update balance called.")
     if isinstance(balance, dict) and 'error' in balance:
-        logger.error(f"Error: {balance['message']}")
+        logger.error("Error: %s", balance['message'])
     else:
         data = [{"CURRENCY": item["currency"], "AVAILABLE": item["available"], "LOCKED": item["locked"], "TOTAL": item["total"]} for item in balance]
         df = pd.DataFrame(data)
-        logger.debug(f"Balance DataFrame:\n{df}")
+        logger.debug("Balance DataFrame:\n%s", df)
         data_account = update_model_account(df, data_account, proxy_model_account)
         logger.debug("Account balance updated")
     return data_account
 
 def add_pair(pair, pairs, data_market, proxy_model_market):
     if pair and pair not in pairs:
-        logger.debug(f"Adding new pair: {pair}")
-        pairs.append(pair)
-        new_row = pd.DataFrame([[pd.Timestamp.now(), pair, None, None, None]], columns=data_market.columns)
-        data_market = pd.concat([data_market, new_row], ignore_index=True)
-        proxy_model_market.setSourceModel(PandasModel(data_market))
-        logger.debug(f"Pair added: {pair}")
+        logger.debug("Adding new pair: %s", pair)
+        pairs, data_market = add_pairs([pair], pairs, data_market, proxy_model_market)
+        logger.debug("Pair added: %s", pair)
+    return pairs, data_market
+
+def add_pairs(new_pairs, pairs, data_market, proxy_model_market):
+    # Pair yang belum ada di watchlist ditambahkan sekaligus (satu insert_rows); pairs diubah di tempat
+    known = set(pairs)
+    new_pairs = [pair for pair in dict.fromkeys(new_pairs) if pair and pair not in known]
+    if new_pairs:
+        pairs.extend(new_pairs)
+        model = proxy_model_market.sourceModel()
+        # TIME berupa string dengan format yang sama dengan tick agar kolom tidak bercampur tipe (ekspor Arrow)
+        current_time = datetime.now().strftime(TIME_FORMAT)
+        model.insert_rows(pd.DataFrame({"TIME": [current_time] * len(new_pairs), "PAIR": new_pairs}))
+        data_market = model.dataframe()
     return pairs, data_market
 
 def update_market_data_with_new_pairs(pairs, data_market, proxy_model_market):
     data_market = pd.DataFrame(columns=["TIME", "PAIR", "24H %", "PRICE", "VOLUME"])
+    current_time = datetime.now().strftime(TIME_FORMAT)
     for pair in pairs:
-        new_row = pd.DataFrame([[pd.Timestamp.now(), pair, None, None, None]], columns=data_market.columns)
+        new_row = pd.DataFrame([[current_time, pair, None, None, None]], columns=data_market.columns)
         data_market = pd.concat([data_market, new_row], ignore_index=True)
-    proxy_model_market.setSourceModel(PandasModel(data_market))
+    proxy_model_market.sourceModel().update_data(data_market)
+    data_market = proxy_model_market.sourceModel().dataframe()
     logger.debug("Market data updated with new pairs")
     return data_market
 
-def restart_worker(worker, pairs, api, update_model_market_callback):
-    if worker is not None:
-        worker.stop()
-        worker.wait()
-    worker = QThreadWorker(pairs, api)
-    worker.result_ready.connect(update_model_market_callback)
-    worker.start()
-    return worker
-
-def close_event(worker, balance_worker):
+def close_event(worker, balance_worker, tick_history=None, order_worker=None):
     try:
         logger.debug("closeEvent triggered")
         if worker:
@@ -106,31 +172,35 @@ def close_event(worker, balance_worker):
                 logger.debug("BalanceWorker not stopping, terminating")
                 balance_worker.terminate()
 
+        if order_worker:
+            logger.debug("Stopping OrderWorker")
+            order_worker.stop()
+
+        if tick_history:
+            logger.debug("Flushing tick history")
+            tick_history.close()
+
         logger.debug("Closing application")
         return True
     except Exception as e:
-        logger.error(f"Error during closeEvent: {e}")
+        logger.error("Error during closeEvent: %s", e)
         return False
 
 def delete_market_rows(indices, data_market, proxy_model_market):
-    logger.debug(f"Deleting rows at indices: {indices}")
-    proxy_model_market.layoutAboutToBeChanged.emit()
-    data_market.drop(data_market.index[indices], inplace=True)
-    logger.debug(f"Data market after deletion:\n{data_market}")
-    data_market.reset_index(drop=True, inplace=True)
-    proxy_model_market.setSourceModel(PandasModel(data_market))
-    proxy_model_market.layoutChanged.emit()
+    logger.debug("Deleting rows at indices: %s", indices)
+    # beginRemoveRows per blok baris; seleksi dan posisi scroll tetap terjaga
+    model = proxy_model_market.sourceModel()
+    model.remove_rows(indices)
+    data_market = model.dataframe()
+    logger.debug("Data market after deletion:\n%s", data_market)
     logger.debug("Market rows deleted")
-    print(data_market)  # Tambahkan cetak DataFrame untuk verifikasi
     return data_market
 
 def delete_account_rows(indices, data_account, proxy_model_account):
-    logger.debug(f"Deleting rows at indices: {indices}")
-    proxy_model_account.layoutAboutToBeChanged.emit()
-    data_account.drop(data_account.index[indices], inplace=True)
-    logger.debug(f"Data account after deletion:\n{data_account}")
-    data_account.reset_index(drop=True, inplace=True)
-    proxy_model_account.setSourceModel(AccountDataModel(data_account))
-    proxy_model_account.layoutChanged.emit()
+    logger.debug("Deleting rows at indices: %s", indices)
+    model = proxy_model_account.sourceModel()
+    model.remove_rows(indices)
+    data_account = model.dataframe()
+    logger.debug("Data account after deletion:\n%s", data_account)
     logger.debug("Account rows deleted")
     return data_account
@@ -0,0 +1,9 @@
+# .env dimuat sekali saat pertama dibutuhkan, bukan saat modul di-import
+_loaded = False
+
+def load_env():
+    global _loaded
+    if not _loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _loaded = True
@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+from control.logging_config import setup_logging
+
+# Konfigurasi logging
+logger = setup_logging('indicators.log')
+
+# Kolom tambahan di tableView_marketdata
+INDICATOR_COLUMNS = ["SMA", "EMA", "RSI", "VWAP", "BB %B", "ATR"]
+INDICATOR_FORMATS = {"SMA": "{:.6g}", "EMA": "{:.6g}", "RSI": "{:.2f}", "VWAP": "{:.6g}", "BB %B": "{:.2f}", "ATR": "{:.4g}"}
+
+class RollingWindow:
+    # Jumlah berjalan dari period nilai terakhir per pair. Nilai yang keluar dari jendela dibaca
+    # ulang dari ring candle, sehingga setiap candle baru cukup satu tambah dan satu kurang.
+    __slots__ = ('period', 'total', 'count')
+
+    def __init__(self, period, rows):
+        self.period = period
+        self.total = np.zeros(rows)
+        self.count = np.zeros(rows, dtype=np.int64)
+
+    def push(self, new, old):
+        new_valid = ~np.isnan(new)
+        old_valid = ~np.isnan(old)
+        self.total += np.where(new_valid, new, 0.0) - np.where(old_valid, old, 0.0)
+        self.count += new_valid.astype(np.int64) - old_valid.astype(np.int64)
+
+    def full(self):
+        return self.count == self.period
+
+    def mean(self):
+        return np.where(self.full(), self.total / self.period, np.nan)
+
+def _wilder(average, value, period):
+    # Smoothing Wilder (alpha 1/period), diawali nilai pertama; NaN tidak mengubah rata-rata
+    updated = np.where(np.isnan(average), value, average + (value - average) / period)
+    return np.where(np.isnan(value), average, updated)
+
+class IndicatorEngine:
+    # Indikator untuk semua pair sekaligus di atas CandleBuffer (array pair x waktu). Setiap candle
+    # yang ditutup memperbarui state per pair dengan operasi vektor O(pair); seluruh jendela hanya
+    # dihitung ulang setelah backfill, saat pair bertambah, atau berkala untuk membuang galat pembulatan.
+    # Nilai dihitung dari candle yang sudah ditutup, bukan candle live.
+    def __init__(self, buffer, sma=20, ema=20, rsi=14, vwap=20, bollinger=20, bollinger_k=2.0, atr=14):
+        periods = (sma, ema, rsi, vwap, bollinger, atr)
+        if max(sma, vwap, bollinger) >= buffer.capacity:
+            raise ValueError(f"Indicator periods {periods} exceed candle capacity {buffer.capacity}")
+        self.buffer = buffer
+        self.sma_period = sma
+        self.ema_alpha = 2.0 / (ema + 1)
+        self.rsi_period = rsi
+        self.vwap_period = vwap
+        self.bollinger_period = bollinger
+        self.bollinger_k = bollinger_k
+        self.atr_period = atr
+        self.last_start = None
+        self._key = None
+        self._steps = 0
+        self._reset(0)
+
+    def _reset(self, rows):
+        nan = np.full(rows, np.nan)
+        self._close = nan.copy()
+        self._ema = nan.copy()
+        self._avg_gain = nan.copy()
+        self._avg_loss = nan.copy()
+        self._atr = nan.copy()
+        self._sma = RollingWindow(self.sma_period, rows)
+        self._bollinger = RollingWindow(self.bollinger_period, rows)
+        self._bollinger_sq = RollingWindow(self.bollinger_period, rows)
+        self._pv = RollingWindow(self.vwap_period, rows)
+        self._volume = RollingWindow(self.vwap_period, rows)
+        self._steps = 0
+
+    def sync(self):
+        # Menyusul candle yang ditutup sejak panggilan terakhir; True jika nilai berubah.
+        # Dipanggil dengan lock CandleAggregator dipegang.
+        buffer = self.buffer
+        if buffer.live_start is None:
+            return False
+        target = buffer.live_start - buffer.timeframe
+        key = (buffer.history_version, len(buffer.bars))
+        if key == self._key and self.last_start == target:
+            return False
+        missing = None if self.last_start is None else (target - self.last_start) // buffer.timeframe
+        if key != self._key or missing is None or not 0 < missing < buffer.capacity \
+                or self._steps >= buffer.capacity:
+            self.recompute(target)
+        else:
+            for _ in range(missing):
+                self.step(self.last_start + buffer.timeframe)
+        self._key = key
+        return True
+
+    def recompute(self, target):
+        buffer = self.buffer
+        self._reset(len(buffer.bars))
+        first = target - (buffer.capacity - 1) * buffer.timeframe
+        for start in range(first, target + 1, buffer.timeframe):
+            self.step(start)
+        self._steps = 0
+        logger.debug("Indicators recomputed for %d pairs", len(buffer.bars))
+
+    def step(self, start):
+        buffer = self.buffer
+        timeframe = buffer.timeframe
+        high = buffer.column(start, 'high')
+        low = buffer.column(start, 'low')
+        close = buffer.column(start, 'close')
+        volume = buffer.column(start, 'volume')
+        previous = self._close
+
+        self._sma.push(close, buffer.column(start - self.sma_period * timeframe, 'close'))
+        old = buffer.column(start - self.bollinger_period * timeframe, 'close')
+        self._bollinger.push(close, old)
+        self._bollinger_sq.push(close * close, old * old)
+        old_start = start - self.vwap_period * timeframe
+        old_volume = buffer.column(old_start, 'volume')
+        old_typical = (buffer.column(old_start, 'high') + buffer.column(old_start, 'low')
+                       + buffer.column(old_start, 'close')) / 3
+        self._pv.push((high + low + close) / 3 * volume, old_typical * old_volume)
+        self._volume.push(volume, old_volume)
+
+        ema = np.where(np.isnan(self._ema), close, self._ema + self.ema_alpha * (close - self._ema))
+        self._ema = np.where(np.isnan(close), self._ema, ema)
+        change = close - previous
+        self._avg_gain = _wilder(self._avg_gain, np.where(np.isnan(change), np.nan, np.maximum(change, 0.0)), self.rsi_period)
+        self._avg_loss = _wilder(self._avg_loss, np.where(np.isnan(change), np.nan, np.maximum(-change, 0.0)), self.rsi_period)
+        # True range; tanpa close sebelumnya cukup high - low (fmax mengabaikan NaN)
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - previous), np.abs(low - previous)))
+        self._atr = _wilder(self._atr, true_range, self.atr_period)
+
+        self._close = np.where(np.isnan(close), previous, close)
+        self.last_start = start
+        self._steps += 1
+
+    def values(self):
+        # {kolom: array per baris CandleBuffer}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = self._bollinger.mean()
+            std = np.sqrt(np.maximum(self._bollinger_sq.mean() - mean * mean, 0.0))
+            width = 2 * self.bollinger_k * std
+            percent_b = np.where(width > 0, (self._close - (mean - self.bollinger_k * std)) / width, np.nan)
+            vwap = np.where(self._volume.full() & (self._volume.total > 0), self._pv.total / self._volume.total, np.nan)
+            rsi = np.where(self._avg_loss > 0, 100 - 100 / (1 + self._avg_gain / self._avg_loss),
+                           np.where(self._avg_gain > 0, 100.0, np.nan))
+        return dict(zip(INDICATOR_COLUMNS, (self._sma.mean(), self._ema, rsi, vwap, percent_b, self._atr)))
+
+    def frame(self, pairs):
+        # DataFrame PAIR + kolom indikator untuk pair di watchlist (urutan pairs)
+        rows = self.buffer.rows
+        pairs = [pair for pair in pairs if pair in rows]
+        index = np.array([rows[pair] for pair in pairs], dtype=np.int64)
+        data = {"PAIR": pairs}
+        for column, values in self.values().items():
+            data[column] = values[index] if len(values) else np.full(len(index), np.nan)
+        return pd.DataFrame(data)
@@ -1,19 +1,91 @@
+import atexit
 import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-def setup_logging(log_file):
-    logger = logging.getLogger(log_file)
-    logger.setLevel(logging.DEBUG)
+# Konfigurasi lewat environment:
+#   LOG_LEVEL          level default semua logger (default INFO)
+#   LOG_LEVELS         override per logger, mis. "workers.log=DEBUG,api_gateio.log=WARNING"
+#   LOG_CONSOLE_LEVEL  level output console (default WARNING)
+#   LOG_DIR            direktori file log (default direktori kerja)
+#   LOG_MAX_BYTES      ukuran maksimum satu file sebelum dirotasi (default 5 MB)
+#   LOG_BACKUP_COUNT   jumlah file rotasi yang disimpan (default 3)
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_queue = queue.SimpleQueue()
+_listener = None
+_console_handler = None
+_file_handlers = {}
 
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setLevel(logging.DEBUG)
+def _level(value, default):
+    if not value:
+        return default
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    level = logging.getLevelName(value.upper())
+    return level if isinstance(level, int) else default
 
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.DEBUG)
+def _logger_levels():
+    levels = {}
+    for item in os.getenv('LOG_LEVELS', '').split(','):
+        name, _, value = item.partition('=')
+        if name.strip() and value.strip():
+            levels[name.strip()] = _level(value, logging.INFO)
+    return levels
 
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
+def _start_listener():
+    # Satu listener untuk seluruh proses: thread logger hanya memasukkan record ke
+    # antrean, format dan tulis ke file/console terjadi di thread listener
+    global _listener, _console_handler
+    if _listener is not None:
+        return
+    _console_handler = logging.StreamHandler()
+    _console_handler.setLevel(_level(os.getenv('LOG_CONSOLE_LEVEL'), logging.WARNING))
+    _console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    _listener = QueueListener(_queue, _console_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
 
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+def _file_handler(log_file):
+    handler = RotatingFileHandler(
+        os.path.join(os.getenv('LOG_DIR', ''), log_file),
+        maxBytes=int(os.getenv('LOG_MAX_BYTES', 5 * 1024 * 1024)),
+        backupCount=int(os.getenv('LOG_BACKUP_COUNT', 3)),
+        encoding='utf-8',
+        delay=True,
+    )
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    # Listener membagikan setiap record ke semua handler; file hanya menerima logger miliknya
+    handler.addFilter(logging.Filter(log_file))
+    return handler
+
+def setup_logging(log_file):
+    # Aman dipanggil berulang kali: handler hanya dipasang sekali per logger
+    logger = logging.getLogger(log_file)
+    if log_file in _file_handlers:
+        return logger
+    _start_listener()
+
+    log_dir = os.getenv('LOG_DIR')
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    handler = _file_handler(log_file)
+    _file_handlers[log_file] = handler
+    _listener.handlers = _listener.handlers + (handler,)
+
+    logger.setLevel(_logger_levels().get(log_file, _level(os.getenv('LOG_LEVEL'), logging.INFO)))
+    logger.addHandler(QueueHandler(_queue))
+    logger.propagate = False
     return logger
+
+def shutdown_logging():
+    # Tulis sisa record di antrean lalu tutup semua file
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
+    for handler in _file_handlers.values():
+        handler.close()
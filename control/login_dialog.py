@@ -1,7 +1,6 @@
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox, QHBoxLayout
 from PyQt5.QtGui import QFont
 from PyQt5.QtCore import Qt
-from control.worker import Worker
 
 class LoginDialog(QDialog):
     def __init__(self, worker):
@@ -25,6 +24,7 @@ class LoginDialog(QDialog):
         self.api_secret_input.setEchoMode(QLineEdit.Password)
         self.login_button = QPushButton("Login")
         self.login_button.clicked.connect(self.login)
+        self.credential_worker = None
 
         # Set font untuk widget
         self.api_key_label.setFont(font)
@@ -56,10 +56,21 @@ class LoginDialog(QDialog):
         self.setLayout(layout)
 
     def login(self):
-        api_key = self.api_key_input.text()
-        api_secret = self.api_secret_input.text()
-        if self.worker.validate_credentials(api_key, api_secret):
-            self.worker.initialize_api(api_key, api_secret)
+        if self.credential_worker is not None and self.credential_worker.isRunning():
+            return
+        # control.worker memuat pandas/aiohttp; di-import saat login, bukan saat dialog dibuka
+        from control.worker import CredentialWorker
+        self.login_button.setEnabled(False)
+        self.login_button.setText("Memeriksa...")
+        self.credential_worker = CredentialWorker(self.api_key_input.text(), self.api_secret_input.text())
+        self.credential_worker.validated.connect(self.on_validated)
+        self.credential_worker.start()
+
+    def on_validated(self, valid):
+        self.login_button.setEnabled(True)
+        self.login_button.setText("Login")
+        if valid:
+            self.worker.initialize_api(self.credential_worker.api_key, self.credential_worker.api_secret)
             self.accept()
         else:
             QMessageBox.critical(self, "Error", "Invalid API credentials")
@@ -0,0 +1,377 @@
+import asyncio
+import queue
+from datetime import datetime
+import pandas as pd
+from api.ws_gateio import GateioWebSocket, WS_URL
+from control.logging_config import setup_logging
+
+# Konfigurasi logging
+logger = setup_logging('market_feed.log')
+
+# Jenis update yang dipublikasikan feed
+MARKET = 'market'          # DataFrame TIME, PAIR, 24H %, PRICE, VOLUME
+INDICATORS = 'indicators'  # DataFrame PAIR + kolom indikator
+ALERT = 'alert'            # dict event AlertEngine
+STOPPED = 'stopped'        # feed berhenti (payload None)
+# Format kolom TIME di snapshot MARKET (dan baris baru di tabel market)
+TIME_FORMAT = '%d-%m-%Y %H:%M:%S'
+
+def snapshot_frame(pairs, tickers):
+    # Satu baris per pair (urutan watchlist) yang punya ticker
+    current_time = datetime.now().strftime(TIME_FORMAT)
+    rows = []
+    for pair in pairs:
+        data = tickers.get(pair)
+        if data:
+            rows.append({
+                "TIME": current_time,
+                "PAIR": pair,
+                "24H %": data['change_percentage'],
+                "PRICE": data['last'],
+                "VOLUME": data['base_volume']
+            })
+    return pd.DataFrame(rows)
+
+class MarketFeed:
+    # Inti pengambilan market data dengan asyncio murni, tanpa Qt. Hasil dipublikasikan ke
+    # listener subscribe(callback) atau dibaca lewat async for ... in updates(). Perubahan
+    # watchlist dan stop() aman dipanggil dari thread lain: perintah masuk ke antrean dan
+    # diterapkan di event loop feed.
+    def __init__(self, pairs, api, alerts=None, candles=None, indicators=None):
+        self.pairs = list(dict.fromkeys(pairs))
+        self.api = api
+        # AlertEngine, CandleAggregator dan IndicatorEngine opsional; semuanya diperbarui di event loop feed
+        self.alerts = alerts
+        self.candles = candles
+        self.indicators = indicators
+        self._backfilled = set()
+        self._backfills = set()
+        self._listeners = []
+        self.loop = None
+        self._commands = queue.SimpleQueue()
+        self._is_running = True
+        # Task run_feed; dibatalkan oleh stop() agar request yang sedang berjalan tidak menahan stop
+        self._task = None
+
+    def subscribe(self, callback):
+        # callback(kind, payload) dipanggil di event loop feed
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        self._listeners.remove(callback)
+
+    def publish(self, kind, payload):
+        for listener in list(self._listeners):
+            listener(kind, payload)
+
+    async def updates(self, maxsize=1000):
+        # Async iterator (kind, payload) sampai feed berhenti; harus dibaca di event loop feed.
+        # Jika pembaca tertinggal lebih dari maxsize update, update terlama dibuang.
+        updates = asyncio.Queue(maxsize)
+
+        def put(kind, payload):
+            if updates.full():
+                updates.get_nowait()
+            updates.put_nowait((kind, payload))
+
+        self.subscribe(put)
+        try:
+            while True:
+                kind, payload = await updates.get()
+                if kind == STOPPED:
+                    return
+                yield kind, payload
+        finally:
+            self.unsubscribe(put)
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        logger.debug("%s started with pairs: %s", type(self).__name__, self.pairs)
+        self._task = asyncio.ensure_future(self.run_feed())
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            # Pembatalan dari stop() adalah akhir normal; pembatalan dari luar diteruskan
+            if self._is_running:
+                raise
+        finally:
+            for task in list(self._backfills):
+                task.cancel()
+            logger.debug("%s stopped", type(self).__name__)
+            self.publish(STOPPED, None)
+
+    async def run_feed(self):
+        raise NotImplementedError
+
+    def add_pairs(self, pairs):
+        self._send_command('add', pairs)
+
+    def remove_pairs(self, pairs):
+        self._send_command('remove', pairs)
+
+    def set_pairs(self, pairs):
+        self._send_command('set', pairs)
+
+    def _send_command(self, command, pairs):
+        self._commands.put((command, list(pairs)))
+        # Jika loop belum berjalan, perintah diambil saat siklus pertama
+        self._call_in_loop(self.on_commands)
+
+    def _call_in_loop(self, callback):
+        loop = self.loop
+        if loop is not None and loop.is_running():
+            try:
+                loop.call_soon_threadsafe(callback)
+            except RuntimeError:
+                # Loop baru saja ditutup
+                pass
+
+    def drain_commands(self):
+        # Dijalankan di event loop feed; True jika watchlist berubah
+        pairs = self.pairs
+        while True:
+            try:
+                command, items = self._commands.get_nowait()
+            except queue.Empty:
+                break
+            if command == 'add':
+                known = set(pairs)
+                pairs = pairs + [pair for pair in dict.fromkeys(items) if pair not in known]
+            elif command == 'remove':
+                removed = set(items)
+                pairs = [pair for pair in pairs if pair not in removed]
+            else:
+                pairs = list(dict.fromkeys(items))
+        changed = pairs != self.pairs
+        self.pairs = pairs
+        return changed
+
+    def on_ticker(self, pair, ticker):
+        self.check_alerts(pair, ticker.get('last'))
+        if self.candles is not None:
+            self.candles.update_ticker(pair, ticker)
+            self.update_indicators()
+
+    def update_indicators(self):
+        # Indikator hanya dihitung saat candle ditutup (atau setelah backfill); tick lain cukup cek versi
+        if self.indicators is None:
+            return
+        with self.candles.lock:
+            if not self.indicators.sync():
+                return
+            data_frame = self.indicators.frame(self.pairs)
+        if not data_frame.empty:
+            self.publish(INDICATORS, data_frame)
+
+    def start_backfill(self, pairs):
+        # Backfill berjalan sebagai task latar belakang: ratusan request candle memakai bucket PUBLIC
+        # yang sama dengan ticker, sehingga tidak boleh menahan siklus ticker maupun stop()
+        if self.candles is None or all(pair in self._backfilled for pair in pairs):
+            return
+        task = asyncio.ensure_future(self.backfill_candles(list(pairs)))
+        self._backfills.add(task)
+        task.add_done_callback(self._backfills.discard)
+
+    async def backfill_candles(self, pairs):
+        # Candle historis hanya diambil sekali per pair (saat start atau pair ditambahkan)
+        if self.candles is None:
+            return
+        new_pairs = [pair for pair in pairs if pair not in self._backfilled]
+        if not new_pairs:
+            return
+        self._backfilled.update(new_pairs)
+        try:
+            await self.candles.backfill(self.api, new_pairs)
+            self.update_indicators()
+        except Exception as e:
+            logger.error("Error backfilling candles: %s", e)
+
+    def check_alerts(self, pair, price):
+        # Setiap alert yang fire dipublikasikan sebagai satu update ALERT
+        if self.alerts is None:
+            return
+        try:
+            price = float(price)
+        except (TypeError, ValueError):
+            return
+        for event in self.alerts.on_tick(pair, price):
+            self.publish(ALERT, event)
+
+    def on_commands(self):
+        pass
+
+    def on_stop(self):
+        pass
+
+    def stop(self):
+        self._is_running = False
+        logger.debug("%s stopping", type(self).__name__)
+        self._call_in_loop(self._stop_in_loop)
+
+    def _stop_in_loop(self):
+        # Dijalankan di event loop feed: on_stop milik subclass, lalu run_feed dibatalkan (mis. bulk
+        # tickers yang menunggu hingga bulk_timeout) sehingga stop selesai tanpa menunggu siklus
+        self.on_stop()
+        if self._task is not None:
+            self._task.cancel()
+
+class PollingFeed(MarketFeed):
+    # Polling REST /spot/tickers setiap interval detik
+    def __init__(self, pairs, api, interval=10, bulk_timeout=10, max_concurrency=10, pair_timeout=5, command_debounce=0.3,
+                 **kwargs):
+        super().__init__(pairs, api, **kwargs)
+        self.interval = interval
+        self.bulk_timeout = bulk_timeout
+        self.max_concurrency = max_concurrency
+        self.pair_timeout = pair_timeout
+        # Perintah watchlist beruntun (mis. paste 50 pair) digabung dalam satu siklus
+        self.command_debounce = command_debounce
+        self._wakeup = None
+
+    async def run_feed(self):
+        self._wakeup = asyncio.Event()
+        while self._is_running:
+            self.drain_commands()
+            await self.fetch_data()
+            await self.wait_next_cycle()
+
+    async def wait_next_cycle(self):
+        # Perintah watchlist membangunkan feed lebih awal dari interval (stop membatalkan run_feed)
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+        except asyncio.TimeoutError:
+            return
+        self._wakeup.clear()
+        if self._is_running:
+            await asyncio.sleep(self.command_debounce)
+
+    def on_commands(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def fetch_data(self):
+        try:
+            pairs = list(self.pairs)
+            session = await self.api.get_session()
+            if self.api.use_bulk_tickers(pairs):
+                tickers = await self.fetch_tickers_bulk(pairs, session)
+                if not tickers:
+                    # Watchlist besar tidak dialihkan ke request per pair (1000 pair = ~100 detik di bucket
+                    # PUBLIC); siklus ini dilewati dan bulk dicoba lagi pada siklus berikutnya
+                    logger.error("Bulk tickers unavailable for %d pairs, skipping cycle", len(pairs))
+                    return
+            else:
+                tickers = await self.fetch_tickers_per_pair(pairs, session)
+            for pair in pairs:
+                data = tickers.get(pair)
+                if data:
+                    self.on_ticker(pair, data)
+            data_frame = snapshot_frame(pairs, tickers)
+            if not data_frame.empty:
+                self.publish(MARKET, data_frame)
+            # Pair baru: isi candle dari /spot/candlesticks setelah tabel diperbarui
+            self.start_backfill(pairs)
+        except Exception as e:
+            logger.error("Error in fetch_data: %s", e)
+
+    async def fetch_tickers_bulk(self, pairs, session):
+        try:
+            tickers = await asyncio.wait_for(self.api.async_get_tickers_bulk(pairs, session), timeout=self.bulk_timeout)
+            logger.debug("Bulk tickers matched %d of %d pairs", len(tickers), len(pairs))
+            return tickers
+        except asyncio.TimeoutError:
+            logger.debug("Timeout fetching bulk tickers")
+            return {}
+
+    async def fetch_tickers_per_pair(self, pairs, session):
+        # Request per pair berjalan bersamaan, dibatasi max_concurrency
+        results = await self.api.fetch_tickers_for_symbols(pairs, session, self.max_concurrency, self.pair_timeout)
+        return {pair: data for pair, data in zip(pairs, results) if data}
+
+class StreamingFeed(MarketFeed):
+    # Channel WebSocket spot.tickers, snapshot awal lewat REST
+    def __init__(self, pairs, api, ws_url=WS_URL, emit_interval=1.0, close_timeout=2, **kwargs):
+        super().__init__(pairs, api, **kwargs)
+        self.ws_url = ws_url
+        self.close_timeout = close_timeout
+        # Update WebSocket dikumpulkan lalu dipublikasikan paling sering sekali per emit_interval
+        self.emit_interval = emit_interval
+        self.ws = None
+        self._latest = {}
+        self._dirty = False
+
+    async def run_feed(self):
+        self.ws = GateioWebSocket(self.api, self.ws_url)
+        if not self._is_running:
+            # stop() datang sebelum event loop feed berjalan (belum ada task untuk dibatalkan)
+            return
+        self.drain_commands()
+        await self.ws.subscribe(self.pairs)
+        seed = asyncio.ensure_future(self.seed_snapshot(list(self.pairs)))
+        self.start_backfill(self.pairs)
+        emitter = asyncio.ensure_future(self.emit_loop())
+        try:
+            async for ticker in self.ws.stream():
+                pair = ticker.get('currency_pair')
+                if pair in self.ws.pairs:
+                    self._latest[pair] = ticker
+                    self._dirty = True
+                    # Alert dan candle diperbarui per update WebSocket, bukan per snapshot yang dipublikasikan
+                    self.on_ticker(pair, ticker)
+        finally:
+            seed.cancel()
+            emitter.cancel()
+            # Juga saat run_feed dibatalkan oleh stop(); dibatasi agar handshake close tidak menahan stop
+            try:
+                await asyncio.wait_for(self.ws.close(), timeout=self.close_timeout)
+            except asyncio.TimeoutError:
+                logger.debug("Timeout closing ticker WebSocket")
+
+    async def seed_snapshot(self, pairs):
+        # Isi data awal lewat REST agar tidak menunggu update WebSocket pertama
+        if not pairs:
+            return
+        try:
+            if self.api.use_bulk_tickers(pairs):
+                tickers = await self.api.async_get_tickers_bulk(pairs)
+            else:
+                results = await self.api.fetch_tickers_for_symbols(pairs)
+                tickers = dict(zip(pairs, results))
+            for pair, data in tickers.items():
+                if data and pair in self.ws.pairs and pair not in self._latest:
+                    self._latest[pair] = data
+                    self._dirty = True
+        except Exception as e:
+            logger.error("Error seeding ticker snapshot: %s", e)
+
+    async def emit_loop(self):
+        while self._is_running:
+            await asyncio.sleep(self.emit_interval)
+            if self._dirty:
+                self._dirty = False
+                self.emit_snapshot()
+
+    def emit_snapshot(self):
+        data_frame = snapshot_frame(self.pairs, self._latest)
+        if not data_frame.empty:
+            self.publish(MARKET, data_frame)
+
+    def on_commands(self):
+        if self.ws is None:
+            # run_feed belum mulai; antrean diambil saat koneksi dibuka
+            return
+        if self.drain_commands():
+            self.apply_watchlist()
+
+    def apply_watchlist(self):
+        wanted = set(self.pairs)
+        added = [pair for pair in self.pairs if pair not in self.ws.pairs]
+        removed = [pair for pair in self.ws.pairs if pair not in wanted]
+        for pair in removed:
+            self._latest.pop(pair, None)
+        asyncio.ensure_future(self.ws.unsubscribe(removed))
+        asyncio.ensure_future(self.ws.subscribe(added))
+        asyncio.ensure_future(self.seed_snapshot(added))
+        self.start_backfill(added)
+        self._dirty = True
+        logger.debug("StreamingFeed pairs updated: +%d -%d", len(added), len(removed))
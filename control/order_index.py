@@ -0,0 +1,96 @@
+import threading
+from control.logging_config import setup_logging
+
+# Konfigurasi logging
+logger = setup_logging('order_index.log')
+
+# Event spot.orders yang menandakan order tidak lagi terbuka (filled atau cancelled)
+FINISH_EVENT = 'finish'
+
+class OpenOrderIndex:
+    # Index lokal order terbuka milik akun, per order id dan per pair. Diisi dari snapshot
+    # REST (/spot/open_orders) lalu diperbarui dari channel spot.orders. Ditulis oleh thread
+    # worker dan dibaca dari thread GUI / strategi, sehingga akses dijaga lock.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_id = {}
+        self._by_pair = {}
+        # Naik setiap isi index berubah; pembaca bisa membandingkan tanpa menyalin data
+        self.version = 0
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, order_id):
+        return str(order_id) in self._by_id
+
+    def get(self, order_id):
+        with self._lock:
+            order = self._by_id.get(str(order_id))
+            return dict(order) if order is not None else None
+
+    def orders(self, pair=None):
+        with self._lock:
+            if pair is None:
+                return [dict(order) for order in self._by_id.values()]
+            return [dict(order) for order in self._by_pair.get(pair, {}).values()]
+
+    def pairs(self):
+        with self._lock:
+            return sorted(self._by_pair)
+
+    def reset(self, orders):
+        # Ganti seluruh isi dengan snapshot REST
+        with self._lock:
+            self._by_id = {}
+            self._by_pair = {}
+            for order in orders:
+                self._put(order)
+            self.version += 1
+        logger.debug("Open order index reset with %d orders", len(orders))
+
+    def apply(self, updates):
+        # Menerapkan event spot.orders (put / update / finish). Event yang lebih lama dari
+        # data di index (update_time_ms) diabaikan. Mengembalikan True jika index berubah.
+        changed = False
+        with self._lock:
+            for order in updates:
+                order_id = str(order.get('id', ''))
+                if not order_id:
+                    continue
+                current = self._by_id.get(order_id)
+                if current is not None and _update_time(order) < _update_time(current):
+                    continue
+                if order.get('event') == FINISH_EVENT or order.get('status') in ('closed', 'cancelled'):
+                    if current is not None:
+                        self._remove(current)
+                        changed = True
+                else:
+                    self._put(order)
+                    changed = True
+            if changed:
+                self.version += 1
+        return changed
+
+    def _put(self, order):
+        order = dict(order)
+        order['id'] = str(order['id'])
+        previous = self._by_id.get(order['id'])
+        if previous is not None and previous.get('currency_pair') != order.get('currency_pair'):
+            self._remove(previous)
+        self._by_id[order['id']] = order
+        self._by_pair.setdefault(order.get('currency_pair'), {})[order['id']] = order
+
+    def _remove(self, order):
+        self._by_id.pop(order['id'], None)
+        pair_orders = self._by_pair.get(order.get('currency_pair'))
+        if pair_orders is not None:
+            pair_orders.pop(order['id'], None)
+            if not pair_orders:
+                del self._by_pair[order.get('currency_pair')]
+
+def _update_time(order):
+    try:
+        return int(order.get('update_time_ms') or 0)
+    except (TypeError, ValueError):
+        return 0
@@ -1,126 +1,288 @@
+import numpy as np
 import pandas as pd
-from PyQt5.QtCore import QAbstractTableModel, QSortFilterProxyModel, Qt
+from PyQt5.QtCore import QAbstractItemModel, QAbstractTableModel, QSortFilterProxyModel, Qt, QModelIndex
 from control.logging_config import setup_logging
 
 # Konfigurasi logging
 logger = setup_logging('pandas_handler.py.log')
 
-class PandasModel(QAbstractTableModel):
-    def __init__(self, data):
+# Role untuk pengurutan: nilai mentah (float atau str), None untuk sel kosong
+SORT_ROLE = Qt.UserRole + 1
+# Role warna: tanda nilai (-1, 0, 1) untuk kolom sign_columns, None untuk kolom lain
+COLOR_ROLE = Qt.UserRole + 2
+
+class ColumnarTableModel(QAbstractTableModel):
+    # Model tabel dengan satu array NumPy per kolom dan cache string tampilan.
+    # String tampilan dihitung saat nilai ditulis, sehingga data() hanya mengindeks array.
+    def __init__(self, columns, key_column=None, numeric_columns=(), formats=None, capacity=64, sign_columns=()):
         super().__init__()
-        self._data = data
+        self._columns = list(columns)
+        self._key_column = key_column
+        self._key_col = self._columns.index(key_column) if key_column is not None else None
+        self._numeric = [column in set(numeric_columns) for column in self._columns]
+        formats = formats or {}
+        self._formats = [formats.get(column) for column in self._columns]
+        self._size = 0
+        self._values = [self._empty(col, capacity) for col in range(len(self._columns))]
+        self._display = [np.full(capacity, "", dtype=object) for _ in self._columns]
+        # Tanda nilai untuk pewarnaan, dihitung saat nilai ditulis (bukan saat paint)
+        self._signs = [np.zeros(capacity, dtype=np.int8) if column in set(sign_columns) else None
+                       for column in self._columns]
+        self._row_index = {}
+        # Kolom urut aktif; -1 berarti urutan sisipan
+        self._sort_column = -1
+        self._sort_order = Qt.AscendingOrder
+
+    def _empty(self, col, capacity):
+        if self._numeric[col]:
+            return np.full(capacity, np.nan)
+        return np.full(capacity, None, dtype=object)
 
     def rowCount(self, parent=None):
-        return len(self._data)
+        return self._size
 
     def columnCount(self, parent=None):
-        return len(self._data.columns)
+        return len(self._columns)
 
     def data(self, index, role=Qt.DisplayRole):
-        if not index.isValid():
-            return None
         if role == Qt.DisplayRole:
-            value = self._data.iloc[index.row(), index.column()]
-            if pd.isnull(value):
-                return ""
-            # Mengembalikan data dalam format string dengan 2 digit desimal untuk kolom "VOLUME"
-            if self._data.columns[index.column()] == "VOLUME":
-                return f"{value:.2f}"
-            return str(value)
+            return self._display[index.column()][index.row()]
+        if role == SORT_ROLE:
+            col = index.column()
+            value = self._values[col][index.row()]
+            if self._numeric[col]:
+                return None if value != value else float(value)
+            return self._display[col][index.row()] if value is not None else None
+        if role == COLOR_ROLE:
+            signs = self._signs[index.column()]
+            return None if signs is None else int(signs[index.row()])
         return None
 
+    def sort(self, column, order=Qt.AscendingOrder):
+        self._sort_column = column
+        self._sort_order = order
+        self._apply_sort()
+
+    def _apply_sort(self):
+        # Satu argsort pada array kolom, bukan perbandingan lessThan per pasangan baris
+        col = self._sort_column
+        size = self._size
+        if col < 0 or size < 2:
+            return
+        descending = self._sort_order == Qt.DescendingOrder
+        if self._numeric[col]:
+            keys = self._values[col][:size]
+            # Negasi menjaga NaN (sel kosong) tetap di akhir untuk kedua arah
+            order = np.argsort(-keys if descending else keys, kind='stable')
+        else:
+            order = np.argsort(self._display[col][:size].astype(str), kind='stable')
+            if descending:
+                order = order[::-1]
+        if np.array_equal(order, np.arange(size)):
+            return
+        self.layoutAboutToBeChanged.emit([], QAbstractItemModel.VerticalSortHint)
+        old_persistent = self.persistentIndexList()
+        for column in range(len(self._columns)):
+            self._values[column][:size] = self._values[column][order]
+            self._display[column][:size] = self._display[column][order]
+            if self._signs[column] is not None:
+                self._signs[column][:size] = self._signs[column][order]
+        new_rows = np.empty(size, dtype=np.int64)
+        new_rows[order] = np.arange(size)
+        new_persistent = [self.index(int(new_rows[index.row()]), index.column()) for index in old_persistent]
+        self.changePersistentIndexList(old_persistent, new_persistent)
+        self._rebuild_index()
+        self.layoutChanged.emit([], QAbstractItemModel.VerticalSortHint)
+
     def headerData(self, section, orientation, role=Qt.DisplayRole):
         if role != Qt.DisplayRole:
             return None
         if orientation == Qt.Horizontal:
-            return self._data.columns[section]
+            return self._columns[section]
         if orientation == Qt.Vertical:
-            return self._data.index[section]
+            return section
         return None
 
-    def sort(self, column, order):
-        colname = self._data.columns[column]
-        self.layoutAboutToBeChanged.emit()
-        self._data.sort_values(by=[colname], ascending=(order == Qt.AscendingOrder), inplace=True)
-        self.layoutChanged.emit()
-        logger.debug(f"Data sorted by {colname} in {'ascending' if order == Qt.AscendingOrder else 'descending'} order")
+    def columns(self):
+        return list(self._columns)
+
+    def column_values(self, column):
+        # View read-only ke array kolom (tanpa salinan)
+        values = self._values[self._columns.index(column)][:self._size]
+        values.flags.writeable = False
+        return values
+
+    def dataframe(self):
+        # Snapshot DataFrame; dipakai untuk operasi jarang (hapus, ekspor), bukan per tick
+        return pd.DataFrame({column: self._values[col][:self._size].copy() for col, column in enumerate(self._columns)},
+                            columns=self._columns)
+
+    def _coerce(self, col, values):
+        if self._numeric[col]:
+            return pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=float)
+        return np.asarray(values, dtype=object)
+
+    def _format_values(self, col, values):
+        fmt = self._formats[col]
+        if self._numeric[col]:
+            if fmt is None:
+                return [str(value) if value == value else "" for value in values.tolist()]
+            return [fmt.format(value) if value == value else "" for value in values.tolist()]
+        if fmt is None:
+            return ["" if value is None or value != value else str(value) for value in values.tolist()]
+        return ["" if value is None or value != value else fmt.format(value) for value in values.tolist()]
+
+    def _store(self, col, rows, values):
+        self._values[col][rows] = values
+        display = np.empty(len(values), dtype=object)
+        display[:] = self._format_values(col, values)
+        self._display[col][rows] = display
+        if self._signs[col] is not None:
+            self._signs[col][rows] = np.sign(np.nan_to_num(values))
+
+    def _changed(self, col, old, new):
+        if self._numeric[col]:
+            return ~((old == new) | (np.isnan(old) & np.isnan(new)))
+        return (old != new) & ~(pd.isnull(old) & pd.isnull(new))
 
-    def update_data(self, data):
-        self.layoutAboutToBeChanged.emit()
-        self._data = data
-        self.layoutChanged.emit()
-        logger.debug("Data model updated")
+    def _reserve(self, size):
+        capacity = len(self._display[0]) if self._columns else 0
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2)
+        for col in range(len(self._columns)):
+            values = self._empty(col, capacity)
+            values[:self._size] = self._values[col][:self._size]
+            self._values[col] = values
+            display = np.full(capacity, "", dtype=object)
+            display[:self._size] = self._display[col][:self._size]
+            self._display[col] = display
+            if self._signs[col] is not None:
+                signs = np.zeros(capacity, dtype=np.int8)
+                signs[:self._size] = self._signs[col][:self._size]
+                self._signs[col] = signs
+
+    def update_data(self, data_frame):
+        self.beginResetModel()
+        self._size = 0
+        self._row_index = {}
+        self._append(data_frame)
+        self.endResetModel()
+        self._apply_sort()
+        logger.debug("Columnar model reset with %d rows", self._size)
+
+    def update_rows(self, data_frame):
+        # Update per key: hanya sel yang berubah yang ditulis, diformat ulang dan
+        # dilaporkan lewat dataChanged
+        rows = np.array([self._row_index.get(key, -1) for key in data_frame[self._key_column]], dtype=np.int64)
+        existing = rows >= 0
+        resort = False
+        if existing.any():
+            target_rows = rows[existing]
+            for column in data_frame.columns:
+                if column == self._key_column or column not in self._columns:
+                    continue
+                col = self._columns.index(column)
+                new = self._coerce(col, data_frame[column].to_numpy(dtype=object)[existing])
+                changed = self._changed(col, self._values[col][target_rows], new)
+                if not changed.any():
+                    continue
+                changed_rows = target_rows[changed]
+                self._store(col, changed_rows, new[changed])
+                resort = resort or col == self._sort_column
+                for start, end in _contiguous_runs(np.sort(changed_rows)):
+                    self.dataChanged.emit(self.index(start, col), self.index(end, col), [Qt.DisplayRole, SORT_ROLE, COLOR_ROLE])
+        if not existing.all():
+            self.insert_rows(data_frame[~existing].drop_duplicates(subset=[self._key_column], keep='last'))
+        elif resort:
+            self._apply_sort()
+
+    def insert_rows(self, data_frame):
+        if data_frame.empty:
+            return
+        first = self._size
+        self.beginInsertRows(QModelIndex(), first, first + len(data_frame) - 1)
+        self._append(data_frame)
+        self.endInsertRows()
+        self._apply_sort()
+        logger.debug("%d rows inserted", len(data_frame))
+
+    def _append(self, data_frame):
+        count = len(data_frame)
+        if count == 0:
+            return
+        first = self._size
+        self._reserve(first + count)
+        rows = np.arange(first, first + count)
+        for col, column in enumerate(self._columns):
+            if column in data_frame.columns:
+                values = self._coerce(col, data_frame[column].to_numpy(dtype=object))
+            else:
+                values = self._empty(col, count)
+            self._store(col, rows, values)
+        self._size = first + count
+        if self._key_col is not None:
+            for row, key in zip(rows.tolist(), self._values[self._key_col][first:self._size].tolist()):
+                self._row_index[key] = row
+
+    def remove_rows(self, rows):
+        rows = np.unique(np.asarray(rows, dtype=np.int64))
+        if len(rows) == 0:
+            return
+        # Hapus dari belakang; sisa baris digeser di dalam array yang sama
+        for start, end in reversed(_contiguous_runs(rows)):
+            count = end - start + 1
+            self.beginRemoveRows(QModelIndex(), start, end)
+            for col in range(len(self._columns)):
+                self._values[col][start:self._size - count] = self._values[col][end + 1:self._size]
+                self._display[col][start:self._size - count] = self._display[col][end + 1:self._size]
+                if self._signs[col] is not None:
+                    self._signs[col][start:self._size - count] = self._signs[col][end + 1:self._size]
+            self._size -= count
+            self.endRemoveRows()
+        self._rebuild_index()
+        logger.debug("%d rows removed", len(rows))
+
+    def _rebuild_index(self):
+        if self._key_col is None:
+            return
+        self._row_index = {key: row for row, key in enumerate(self._values[self._key_col][:self._size].tolist())}
+
+    def remove_keys(self, keys):
+        self.remove_rows([self._row_index[key] for key in keys if key in self._row_index])
 
     def removeRows(self, row, count, parent=None):
-        self.layoutAboutToBeChanged.emit()
-        indices = list(range(row, row + count))
-        self._data.drop(self._data.index[indices], inplace=True)
-        self._data.reset_index(drop=True, inplace=True)
-        self.layoutChanged.emit()
-        logger.debug(f"Rows {indices} removed")
-
-    def hapus_baris_pertama_kedua(self):
-        if self.rowCount() > 1:
-            self.removeRows(0, 2)
-            logger.debug("Baris pertama dan kedua dihapus")
+        self.remove_rows(range(row, row + count))
+        return True
 
 class CustomSortFilterProxyModel(QSortFilterProxyModel):
+    def sort(self, column, order=Qt.AscendingOrder):
+        source = self.sourceModel()
+        if isinstance(source, ColumnarTableModel):
+            # Model kolumnar mengurutkan dirinya sendiri dengan argsort; proxy hanya meneruskan urutan
+            source.sort(column, order)
+            if self.sortColumn() != -1:
+                super().sort(-1)
+            return
+        super().sort(column, order)
+
     def lessThan(self, left, right):
-        left_data = self.sourceModel().data(left, Qt.DisplayRole)
-        right_data = self.sourceModel().data(right, Qt.DisplayRole)
-        column = left.column()
-        pair_column_index = 1
-        
-        if column == pair_column_index:
-            result = left_data < right_data
-            logger.debug(f"Comparing pairs: {left_data} < {right_data}: {result}")
-            return result
-        else:
-            try:
-                left_data = float(left_data)
-                right_data = float(right_data)
-                result = left_data < right_data
-                logger.debug(f"Comparing numerical data: {left_data} < {right_data}: {result}")
-                return result
-            except ValueError:
-                result = left_data < right_data
-                logger.debug(f"Comparing string data: {left_data} < {right_data}: {result}")
-                return result
+        # Fallback untuk model lain: bandingkan nilai bertipe dari sortRole, tanpa parsing string
+        role = self.sortRole()
+        left_data = left.data(role)
+        right_data = right.data(role)
+        if left_data is None or right_data is None:
+            return left_data is None and right_data is not None
+        return left_data < right_data
 
     def filterAcceptsRow(self, source_row, source_parent):
         return super().filterAcceptsRow(source_row, source_parent)
 
-# Fungsi inisialisasi DataFrame dan model
-def init_market_data_model():
-    data_market = pd.DataFrame(columns=['TIME', 'PAIR', '24H %', 'PRICE', 'VOLUME'])
-    proxy_model_market = CustomSortFilterProxyModel()
-    proxy_model_market.setSourceModel(PandasModel(data_market))
-    return data_market, proxy_model_market
-
-def init_account_data_model():
-    data_account = pd.DataFrame(columns=['CURRENCY', 'AVAILABLE', 'LOCKED', 'TOTAL'])
-    proxy_model_account = CustomSortFilterProxyModel()
-    proxy_model_account.setSourceModel(AccountDataModel(data_account))
-    return data_account, proxy_model_account
-
-# Fungsi untuk manipulasi data
-def delete_market_rows(indices, data_market, proxy_model_market):
-    data_market = data_market.drop(indices).reset_index(drop=True)
-    proxy_model_market.update_data(data_market)
-    return data_market
-
-def delete_account_rows(indices, data_account, proxy_model_account):
-    data_account = data_account.drop(indices).reset_index(drop=True)
-    proxy_model_account.update_data(data_account)
-    return data_account
-
-class AccountDataModel(PandasModel):
-    def __init__(self, data):
-        super().__init__(data)
-
-    def data(self, index, role=Qt.DisplayRole):
-        value = super().data(index, role)
-        if role == Qt.DisplayRole and index.column() in [1, 2, 3]:
-            # Format nilai saldo dengan 2 desimal untuk kolom "AVAILABLE", "LOCKED", dan "TOTAL"
-            return f"{float(value):.2f}"
-        return value
+def _contiguous_runs(rows):
+    # rows terurut naik -> daftar (awal, akhir) untuk blok baris yang berurutan
+    if len(rows) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(rows) != 1)
+    starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+    ends = np.concatenate((rows[breaks], [rows[-1]]))
+    return list(zip(starts.tolist(), ends.tolist()))
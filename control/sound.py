@@ -0,0 +1,54 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from control.logging_config import setup_logging
+
+# Konfigurasi logging
+logger = setup_logging('sound.log')
+
+ALERT_SOUND = 'source/mandalorian-guitar.mp3'
+
+_mixer = None
+_mixer_lock = threading.Lock()
+# Satu thread untuk suara: init mixer dan load file tidak pernah memblokir thread GUI
+_executor = None
+_last_played = -float('inf')
+
+def get_mixer():
+    # pygame (dan mixer audio) baru dimuat saat suara alert pertama kali dibutuhkan.
+    # Mengembalikan None jika pygame tidak tersedia atau perangkat audio gagal dibuka.
+    global _mixer
+    with _mixer_lock:
+        if _mixer is None:
+            try:
+                import pygame
+                pygame.mixer.init()
+                _mixer = pygame.mixer
+            except Exception as e:
+                logger.error("Sound disabled, mixer unavailable: %s", e)
+                _mixer = False
+        return _mixer or None
+
+def play_alert_sound(path=ALERT_SOUND):
+    mixer = get_mixer()
+    if mixer is None:
+        return False
+    try:
+        mixer.music.load(path)
+        mixer.music.play()
+        return True
+    except Exception as e:
+        logger.error("Error playing %s: %s", path, e)
+        return False
+
+def play_alert_sound_async(path=ALERT_SOUND, min_interval=1.0):
+    # Banyak alert dalam satu tick cukup satu bunyi; permintaan dalam min_interval dilewati
+    global _executor, _last_played
+    now = time.monotonic()
+    if now - _last_played < min_interval:
+        return False
+    _last_played = now
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='AlertSound')
+    _executor.submit(play_alert_sound, path)
+    return True
@@ -0,0 +1,225 @@
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from control.logging_config import setup_logging
+
+# Konfigurasi logging
+logger = setup_logging('tick_history.log')
+
+# Satu record = 32 byte: waktu (ms epoch UTC), harga terakhir, perubahan 24 jam (%), volume base
+TICK_DTYPE = np.dtype([('ts', '<i8'), ('last', '<f8'), ('change_percentage', '<f8'), ('base_volume', '<f8')])
+DAY_MS = 86400000
+FILE_SUFFIX = '.ticks'
+
+class TickHistoryStore:
+    # Penyimpanan tick append-only: satu file biner per pair per hari (UTC) di
+    # <root>/<PAIR>/<YYYY-MM-DD>.ticks. Penulisan dibatch di thread latar belakang,
+    # query membaca file lewat np.memmap sehingga RAM tidak tumbuh dengan ukuran histori.
+    def __init__(self, root='history', flush_interval=1.0, max_open_files=128):
+        self.root = root
+        self.flush_interval = flush_interval
+        self.max_open_files = max_open_files
+        self._queue = queue.Queue()
+        self._thread = None
+        self._files = OrderedDict()
+        # Nilai terakhir per pair; tick yang tidak berubah tidak ditulis ulang
+        self._last_values = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='TickHistoryWriter', daemon=True)
+            self._thread.start()
+            logger.debug("Tick history writer started in %s", self.root)
+        return self
+
+    def append(self, ts_ms, pairs, last, change_percentage, base_volume):
+        # Aman dipanggil dari thread mana pun; hanya memasukkan batch ke antrean
+        pairs = list(pairs)
+        records = np.empty(len(pairs), dtype=TICK_DTYPE)
+        records['ts'] = ts_ms
+        records['last'] = last
+        records['change_percentage'] = change_percentage
+        records['base_volume'] = base_volume
+        keep = self._changed_mask(pairs, records)
+        if keep.any():
+            self._queue.put(([pair for pair, flag in zip(pairs, keep) if flag], records[keep]))
+
+    def append_frame(self, data_frame, ts_ms=None):
+        # DataFrame dari QThreadWorker.result_ready (PAIR, PRICE, 24H %, VOLUME)
+        if data_frame.empty:
+            return
+        if ts_ms is None:
+            ts_ms = int(time.time() * 1000)
+        self.append(
+            ts_ms,
+            data_frame['PAIR'],
+            pd.to_numeric(data_frame['PRICE'], errors='coerce').to_numpy(dtype=float),
+            pd.to_numeric(data_frame['24H %'], errors='coerce').to_numpy(dtype=float),
+            pd.to_numeric(data_frame['VOLUME'], errors='coerce').to_numpy(dtype=float),
+        )
+
+    def _changed_mask(self, pairs, records):
+        keep = np.ones(len(pairs), dtype=bool)
+        with self._lock:
+            for i, pair in enumerate(pairs):
+                values = (records['last'][i], records['change_percentage'][i], records['base_volume'][i])
+                if self._last_values.get(pair) == values:
+                    keep[i] = False
+                else:
+                    self._last_values[pair] = values
+        return keep
+
+    def _run(self):
+        while True:
+            pending = []
+            stop = self._collect(pending)
+            if pending:
+                self._write_safe(pending)
+            if stop:
+                break
+        self._close_files()
+        logger.debug("Tick history writer stopped")
+
+    def _collect(self, pending):
+        # Kumpulkan batch selama flush_interval, lalu tulis sekaligus
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                return False
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                return False
+            if item is None:
+                return True
+            if isinstance(item, threading.Event):
+                # Permintaan flush(): tulis yang sudah terkumpul lalu beri tanda
+                if pending:
+                    self._write_safe(pending)
+                    pending.clear()
+                item.set()
+                continue
+            pending.append(item)
+
+    def _write_safe(self, pending):
+        # Disk penuh / izin ditolak tidak boleh mematikan thread writer; batch ini hilang, tick berikutnya tetap ditulis
+        try:
+            self._write(pending)
+        except OSError as e:
+            logger.error("Error writing tick history: %s", e)
+
+    def _write(self, pending):
+        # Gabungkan semua batch, kelompokkan per pair (urutan waktu tetap) lalu per hari
+        pairs = np.concatenate([np.asarray(batch_pairs, dtype=object) for batch_pairs, _ in pending])
+        records = np.concatenate([batch_records for _, batch_records in pending])
+        order = np.argsort(pairs, kind='stable')
+        pairs = pairs[order]
+        records = records[order]
+        starts = np.flatnonzero(np.concatenate(([True], pairs[1:] != pairs[:-1])))
+        ends = np.append(starts[1:], len(pairs))
+        for start, end in zip(starts, ends):
+            pair_records = records[start:end]
+            days = pair_records['ts'] // DAY_MS
+            for day in np.unique(days):
+                handle = self._file(pairs[start], int(day))
+                handle.write(pair_records[days == day].tobytes())
+        self._flush_files()
+
+    def _file(self, pair, day):
+        key = (pair, day)
+        handle = self._files.get(key)
+        if handle is not None:
+            self._files.move_to_end(key)
+            return handle
+        path = self.partition_path(pair, day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle = open(path, 'ab')
+        self._files[key] = handle
+        if len(self._files) > self.max_open_files:
+            _, oldest = self._files.popitem(last=False)
+            oldest.close()
+        return handle
+
+    def _flush_files(self):
+        for handle in self._files.values():
+            handle.flush()
+
+    def _close_files(self):
+        for handle in self._files.values():
+            handle.close()
+        self._files.clear()
+
+    def partition_path(self, pair, day):
+        date = datetime.fromtimestamp(day * DAY_MS / 1000, tz=timezone.utc).strftime('%Y-%m-%d')
+        return os.path.join(self.root, pair.replace('/', '_'), date + FILE_SUFFIX)
+
+    def partition_days(self, pair):
+        # Hari (sejak epoch) yang punya file partisi untuk pair, terurut
+        directory = os.path.join(self.root, pair.replace('/', '_'))
+        if not os.path.isdir(directory):
+            return []
+        days = []
+        for name in os.listdir(directory):
+            if not name.endswith(FILE_SUFFIX):
+                continue
+            try:
+                date = datetime.strptime(name[:-len(FILE_SUFFIX)], '%Y-%m-%d').replace(tzinfo=timezone.utc)
+            except ValueError:
+                continue
+            days.append(int(date.timestamp()) * 1000 // DAY_MS)
+        return sorted(days)
+
+    def flush(self, timeout=5):
+        # Pastikan semua tick di antrean sudah ada di disk (mis. sebelum query)
+        if self._thread is None or not self._thread.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self, timeout=5):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def query(self, pair, start_ms, end_ms):
+        # Mengembalikan array terstruktur TICK_DTYPE untuk start_ms <= ts < end_ms
+        chunks = []
+        for day in self.partition_days(pair):
+            if day < start_ms // DAY_MS or day > (end_ms - 1) // DAY_MS:
+                continue
+            path = self.partition_path(pair, day)
+            count = os.path.getsize(path) // TICK_DTYPE.itemsize
+            if count == 0:
+                continue
+            # Record terakhir yang belum lengkap (mis. crash saat menulis) diabaikan
+            data = np.memmap(path, dtype=TICK_DTYPE, mode='r', shape=(count,))
+            ts = data['ts']
+            lo = np.searchsorted(ts, start_ms, side='left')
+            hi = np.searchsorted(ts, end_ms, side='left')
+            if hi > lo:
+                chunks.append(np.array(data[lo:hi]))
+            del data
+        if not chunks:
+            return np.empty(0, dtype=TICK_DTYPE)
+        return np.concatenate(chunks)
+
+    def query_frame(self, pair, start_ms, end_ms):
+        records = self.query(pair, start_ms, end_ms)
+        data_frame = pd.DataFrame(records)
+        data_frame['ts'] = pd.to_datetime(data_frame['ts'], unit='ms', utc=True)
+        return data_frame
+
+    def pairs(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, name)))
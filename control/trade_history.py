@@ -0,0 +1,144 @@
+import asyncio
+import os
+import sqlite3
+import time
+import pandas as pd
+from aiohttp import ClientError
+from api.api_gateio import TRADES_PAGE_LIMIT, TRADES_MAX_RANGE
+from control.logging_config import setup_logging
+
+# Konfigurasi logging
+logger = setup_logging('trade_history.log')
+
+# Setiap sinkronisasi mengulang beberapa menit terakhir: trade dengan waktu sedikit sebelum "now" bisa
+# belum dikembalikan exchange saat query sebelumnya (duplikat diabaikan oleh INSERT OR IGNORE)
+SYNC_OVERLAP = 300
+# Kolom trade yang disimpan; angka disimpan sebagai teks agar presisi desimal tidak hilang
+TRADE_COLUMNS = ['id', 'currency_pair', 'create_time_ms', 'side', 'role', 'amount', 'price',
+                 'order_id', 'fee', 'fee_currency', 'point_fee', 'gt_fee', 'text']
+NUMERIC_COLUMNS = ['amount', 'price', 'fee', 'point_fee', 'gt_fee']
+DEFAULT_HISTORY_DAYS = 365
+
+class TradeHistoryStore:
+    # Cache trade milik akun di SQLite. Trade unik per id (INSERT OR IGNORE), sehingga halaman
+    # yang diambil ulang setelah sinkronisasi terputus tidak menggandakan data. Tabel sync_state
+    # menyimpan sampai detik mana setiap pair sudah lengkap tersinkron.
+    def __init__(self, path=None):
+        self.path = path or os.getenv('TRADE_HISTORY_DB', 'trades.sqlite')
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(f'''CREATE TABLE IF NOT EXISTS trades (
+            id TEXT PRIMARY KEY, currency_pair TEXT NOT NULL, create_time_ms INTEGER NOT NULL,
+            {', '.join(f'{column} TEXT' for column in TRADE_COLUMNS[3:])})''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS trades_pair_time ON trades (currency_pair, create_time_ms)')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS sync_state (currency_pair TEXT PRIMARY KEY, synced_to INTEGER NOT NULL)')
+        self.conn.commit()
+
+    def insert(self, trades):
+        rows = [(
+            str(trade['id']),
+            trade['currency_pair'],
+            _create_time_ms(trade),
+            *(None if trade.get(column) is None else str(trade[column]) for column in TRADE_COLUMNS[3:]),
+        ) for trade in trades]
+        before = self.conn.total_changes
+        self.conn.executemany(f'INSERT OR IGNORE INTO trades VALUES ({", ".join("?" * len(TRADE_COLUMNS))})', rows)
+        return self.conn.total_changes - before
+
+    def synced_to(self, pair):
+        row = self.conn.execute('SELECT synced_to FROM sync_state WHERE currency_pair = ?', (pair,)).fetchone()
+        return row[0] if row else None
+
+    def mark_synced(self, pair, synced_to):
+        # Dipanggil setelah satu jendela waktu lengkap; commit bersama trade jendela tersebut
+        self.conn.execute('INSERT OR REPLACE INTO sync_state VALUES (?, ?)', (pair, int(synced_to)))
+        self.conn.commit()
+
+    def count(self, pair=None):
+        if pair is None:
+            return self.conn.execute('SELECT COUNT(*) FROM trades').fetchone()[0]
+        return self.conn.execute('SELECT COUNT(*) FROM trades WHERE currency_pair = ?', (pair,)).fetchone()[0]
+
+    def query_frame(self, pair=None, start_ms=None, end_ms=None):
+        # DataFrame trade terurut waktu, kolom angka sudah float (untuk PnL / ekspor pajak)
+        conditions, params = [], []
+        if pair is not None:
+            conditions.append('currency_pair = ?')
+            params.append(pair)
+        if start_ms is not None:
+            conditions.append('create_time_ms >= ?')
+            params.append(int(start_ms))
+        if end_ms is not None:
+            conditions.append('create_time_ms < ?')
+            params.append(int(end_ms))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        data_frame = pd.read_sql_query(f'SELECT * FROM trades {where} ORDER BY create_time_ms, id', self.conn, params=params)
+        for column in NUMERIC_COLUMNS:
+            data_frame[column] = pd.to_numeric(data_frame[column], errors='coerce')
+        return data_frame
+
+    def close(self):
+        self.conn.close()
+
+class TradeHistorySync:
+    # Mengambil /spot/my_trades per pair dalam jendela from/to (maks 30 hari) dan halaman 1000 trade,
+    # mulai dari sync_state terakhir. Beberapa pair berjalan bersamaan; semua request melewati
+    # rate limiter PRIVATE milik GateioAPI. Sinkronisasi yang terputus dilanjutkan dari jendela terakhir;
+    # setiap run mulai overlap detik sebelum sync_state agar trade yang terlambat muncul tetap terambil.
+    def __init__(self, api, store, max_concurrency=4, window=TRADES_MAX_RANGE, page_limit=TRADES_PAGE_LIMIT, clock=time.time,
+                 overlap=SYNC_OVERLAP):
+        self.api = api
+        self.store = store
+        self.max_concurrency = max_concurrency
+        self.window = window
+        self.page_limit = page_limit
+        self.clock = clock
+        self.overlap = overlap
+
+    async def sync(self, pairs, since=None):
+        # since (detik epoch) hanya dipakai untuk pair yang belum pernah disinkron
+        if since is None:
+            since = self.clock() - DEFAULT_HISTORY_DAYS * 86400
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def sync_one(pair):
+            async with semaphore:
+                return await self.sync_pair(pair, since)
+
+        results = await asyncio.gather(*(sync_one(pair) for pair in dict.fromkeys(pairs)))
+        return dict(zip(dict.fromkeys(pairs), results))
+
+    async def sync_pair(self, pair, since):
+        # Mengembalikan jumlah trade baru; None jika berhenti karena error (dilanjutkan lain kali)
+        start = self.store.synced_to(pair)
+        start = int(since) if start is None else start - self.overlap
+        now = int(self.clock())
+        added = 0
+        while start < now:
+            end = min(start + self.window, now)
+            try:
+                trades = await self.fetch_window(pair, start, end)
+            except (ClientError, asyncio.TimeoutError) as e:
+                logger.error("Error syncing trades for %s from %d: %s", pair, start, e)
+                return None
+            added += self.store.insert(trades)
+            # Jendela berikutnya mulai dari detik terakhir (from/to inklusif, duplikat diabaikan)
+            self.store.mark_synced(pair, end)
+            start = end
+        logger.debug("Trade history %s synced: %d new trades", pair, added)
+        return added
+
+    async def fetch_window(self, pair, start, end):
+        trades = []
+        page = 1
+        while True:
+            batch = await self.api.async_get_my_trades(pair, start, end, page=page, limit=self.page_limit)
+            trades.extend(batch)
+            if len(batch) < self.page_limit:
+                return trades
+            page += 1
+
+def _create_time_ms(trade):
+    if trade.get('create_time_ms'):
+        return int(float(trade['create_time_ms']))
+    return int(float(trade.get('create_time', 0)) * 1000)
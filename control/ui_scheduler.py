@@ -0,0 +1,80 @@
+import pandas as pd
+from PyQt5.QtCore import QObject, QTimer
+from control.logging_config import setup_logging
+
+# Konfigurasi logging
+logger = setup_logging('ui_scheduler.log')
+
+class UiUpdateScheduler(QObject):
+    # Update dari worker tidak langsung diterapkan ke model. Update per target digabung (per key,
+    # nilai terbaru menang) lalu diterapkan paling sering max_fps kali per detik oleh QTimer.
+    # Target yang widget-nya tersembunyi (minimize, tab lain) tetap digabung tetapi tidak diterapkan
+    # sampai terlihat lagi; update yang tertimpa dihitung sebagai dropped.
+    def __init__(self, max_fps=4, parent=None):
+        super().__init__(parent)
+        self._targets = {}
+        self._pending = {}
+        self.received = {}
+        self.applied = {}
+        self.dropped = {}
+        self.timer = QTimer(self)
+        self.timer.setInterval(max(1, int(1000 / max_fps)))
+        self.timer.timeout.connect(self.flush)
+
+    def register(self, name, apply, widget=None, key=None):
+        # key: kolom DataFrame untuk penggabungan per baris (mis. PAIR); None berarti data terbaru
+        # menggantikan seluruh data sebelumnya (mis. saldo)
+        self._targets[name] = (apply, widget, key)
+        self.received[name] = self.applied[name] = self.dropped[name] = 0
+
+    def submit(self, name, data):
+        # Slot untuk sinyal worker; hanya menyimpan data, tidak menyentuh model
+        _, _, key = self._targets[name]
+        self.received[name] += len(data)
+        if key is None:
+            previous = self._pending.get(name)
+            if previous is not None:
+                self.dropped[name] += len(previous)
+            self._pending[name] = data
+        else:
+            self._pending.setdefault(name, []).append(data)
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        for name in list(self._pending):
+            apply, widget, key = self._targets[name]
+            data = self._pending[name]
+            if key is not None:
+                data = self._merge(name, data, key)
+            if widget is not None and (not widget.isVisible() or widget.visibleRegion().isEmpty()):
+                # Simpan satu versi gabungan saja agar antrean tidak tumbuh selama widget tersembunyi
+                if key is not None:
+                    self._pending[name] = [data]
+                continue
+            del self._pending[name]
+            try:
+                apply(data)
+                self.applied[name] += len(data)
+            except Exception as e:
+                logger.error("Error applying %s update: %s", name, e)
+        if not self._pending:
+            # Tidak ada yang menunggu; timer dijalankan lagi oleh submit berikutnya
+            self.timer.stop()
+
+    def _merge(self, name, frames, key):
+        if len(frames) == 1:
+            return frames[0]
+        data_frame = pd.concat(frames, ignore_index=True)
+        merged = data_frame.drop_duplicates(subset=[key], keep='last')
+        self.dropped[name] += len(data_frame) - len(merged)
+        return merged
+
+    def stats(self):
+        # {target: {'received', 'applied', 'dropped', 'pending'}} dalam jumlah baris
+        return {name: {'received': self.received[name], 'applied': self.applied[name], 'dropped': self.dropped[name],
+                       'pending': name in self._pending} for name in self._targets}
+
+    def stop(self):
+        self.timer.stop()
+        logger.debug("UI update stats: %s", self.stats())
@@ -1,9 +1,13 @@
 import asyncio
 import pandas as pd
-from aiohttp import ClientSession
-from datetime import datetime
 from PyQt5.QtCore import QThread, pyqtSignal, QMutex
+from aiohttp import ClientError
 from api.api_gateio import GateioAPI
+from api.ws_gateio import GateioWebSocket, WS_URL
+from control.order_index import OpenOrderIndex
+from control.market_feed import PollingFeed, StreamingFeed, MARKET, INDICATORS, ALERT
+# Worker (API handler) dipindah ke modul ringan agar dialog login tidak memuat modul ini
+from control.api_handler import Worker
 from control.logging_config import setup_logging
 
 # Konfigurasi logging
@@ -12,143 +16,269 @@ logger = setup_logging('workers.log')
 # Inisialisasi mutex
 mutex = QMutex()
 
-class QThreadWorker(QThread):
+class WatchlistWorker(QThread):
+    # Adapter Qt di atas MarketFeed (control/market_feed.py): feed berjalan di event loop thread
+    # ini dan setiap update diteruskan sebagai sinyal. Perubahan watchlist dari thread GUI
+    # diteruskan ke antrean perintah feed, tanpa menghentikan thread.
     result_ready = pyqtSignal(pd.DataFrame)
+    indicators_ready = pyqtSignal(pd.DataFrame)
     price_check_signal = pyqtSignal(dict)
-    export_complete_signal = pyqtSignal()
-    import_complete_signal = pyqtSignal(pd.DataFrame)
+    feed_class = None
 
-    def __init__(self, pairs, api):
+    def __init__(self, pairs, api, **options):
         super().__init__()
-        self.pairs = pairs
         self.api = api
-        self._is_running = True
-        logger.debug("QThreadWorker initialized with pairs: %s", pairs)
+        self.feed = self.feed_class(pairs, api, **options)
+        self.feed.subscribe(self.publish)
+        self._signals = {MARKET: self.result_ready, INDICATORS: self.indicators_ready, ALERT: self.price_check_signal}
+        logger.debug("%s initialized with pairs: %s", type(self).__name__, pairs)
 
-    def run(self):
-        logger.debug("QThreadWorker started")
-        self.loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self.loop)
+    @property
+    def pairs(self):
+        return self.feed.pairs
+
+    def add_pairs(self, pairs):
+        self.feed.add_pairs(pairs)
+
+    def remove_pairs(self, pairs):
+        self.feed.remove_pairs(pairs)
+
+    def set_pairs(self, pairs):
+        self.feed.set_pairs(pairs)
+
+    def publish(self, kind, payload):
+        signal = self._signals.get(kind)
+        if signal is None:
+            return
+        mutex.lock()
         try:
-            self.loop.run_until_complete(self.run_fetch_data())
+            signal.emit(payload)
         finally:
-            self.loop.close()
-            logger.debug("QThreadWorker run method completed")
-
-    async def run_fetch_data(self):
-        while self._is_running:
-            await self.fetch_data()
-            for _ in range(10):  # Cek setiap detik untuk lebih responsif
-                if not self._is_running:
-                    return
-                await asyncio.sleep(1)
+            mutex.unlock()
 
-    async def fetch_data(self):
+    def run(self):
+        logger.debug("%s started", type(self).__name__)
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
         try:
-            rows = []
-            async with ClientSession() as session:
-                for pair in self.pairs:
-                    if not self._is_running:
-                        logger.debug("QThreadWorker stopped")
-                        break
-                    try:
-                        data = await asyncio.wait_for(self.api.async_get_ticker_info(pair, session), timeout=5)
-                        logger.debug(f"Received data for {pair}: {data}")
-                        if data:
-                            current_time = datetime.now().strftime('%d-%m-%Y %H:%M:%S')
-                            rows.append({
-                                "TIME": current_time,
-                                "PAIR": pair,
-                                "24H %": data['change_percentage'],
-                                "PRICE": data['last'],
-                                "VOLUME": data['base_volume']
-                            })
-                    except asyncio.TimeoutError:
-                        logger.debug(f"Timeout fetching data for {pair}")
-            if rows:
-                df = pd.DataFrame(rows)
-                mutex.lock()
-                try:
-                    self.result_ready.emit(df)
-                finally:
-                    mutex.unlock()
-        except Exception as e:
-            logger.error(f"Error in fetch_data: {e}")
+            loop.run_until_complete(self.feed.run())
+        finally:
+            # Pool koneksi dimiliki loop ini, tutup sebelum loop ditutup
+            loop.run_until_complete(self.api.close_session())
+            loop.close()
+            logger.debug("%s run method completed", type(self).__name__)
 
     def stop(self):
-        self._is_running = False
-        logger.debug("QThreadWorker stopping")
+        self.feed.stop()
         self.quit()
         if not self.wait(5000):  # Tunggu maksimal 5 detik
-            logger.debug("QThreadWorker not stopping, terminating")
+            logger.debug("%s not stopping, terminating", type(self).__name__)
             self.terminate()
 
+class QThreadWorker(WatchlistWorker):
+    # Polling REST (PollingFeed); opsi: interval, bulk_timeout, max_concurrency, pair_timeout,
+    # command_debounce, alerts, candles, indicators
+    export_complete_signal = pyqtSignal()
+    import_complete_signal = pyqtSignal(pd.DataFrame)
+    feed_class = PollingFeed
+
     def export_data(self, data_frame, file_path):
         try:
             data_frame.to_csv(file_path, index=False)
-            logger.debug(f"Data successfully exported to {file_path}")
+            logger.debug("Data successfully exported to %s", file_path)
             self.export_complete_signal.emit()
         except Exception as e:
-            logger.error(f"Error exporting data: {e}")
+            logger.error("Error exporting data: %s", e)
 
     def import_data(self, file_path):
         try:
             data_frame = pd.read_csv(file_path)
-            logger.debug(f"Data successfully imported from {file_path}")
+            logger.debug("Data successfully imported from %s", file_path)
             self.import_complete_signal.emit(data_frame)
         except Exception as e:
-            logger.error(f"Error importing data: {e}")
+            logger.error("Error importing data: %s", e)
+
+class StreamingWorker(WatchlistWorker):
+    # WebSocket spot.tickers (StreamingFeed); opsi: ws_url, emit_interval, alerts, candles, indicators
+    feed_class = StreamingFeed
 
 class BalanceWorker(QThread):
     balance_signal = pyqtSignal(list)  # Mengubah sinyal menjadi list
 
-    def __init__(self, api):
+    def __init__(self, api, interval=60):
         super().__init__()
         self.api = api
+        self.interval = interval
         self._is_running = True
+        self.loop = None
+        self._wakeup = None
         logger.debug("BalanceWorker initialized")
 
+    def start(self, *args):
+        # Flag di-reset di thread pemanggil, bukan di run(): stop() yang datang sebelum thread
+        # sempat berjalan tidak hilang. Bisa di-start ulang setelah stop() (mis. setelah baris akun dihapus)
+        self._is_running = True
+        super().start(*args)
+
     def run(self):
         logger.debug("BalanceWorker started")
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self.run_balance())
+        finally:
+            self.loop.run_until_complete(self.api.close_session())
+            self.loop.close()
+            logger.debug("BalanceWorker run method completed")
+
+    async def run_balance(self):
+        # Saldo diambil lewat klien private async (request bertanda tangan di pool aiohttp)
+        self._wakeup = asyncio.Event()
         while self._is_running:
+            balance = await self.api.async_get_account_balance()
+            logger.debug("Fetched balance: %d currencies", len(balance))
+            mutex.lock()
+            try:
+                self.balance_signal.emit(balance)
+            finally:
+                mutex.unlock()
             try:
-                balance = self.api.get_account_balance()
-                logger.debug(f"Fetched balance: {balance}")
-                mutex.lock()
-                try:
-                    self.balance_signal.emit(balance)
-                finally:
-                    mutex.unlock()
-                logger.debug("Balance fetched and signal emitted")
-                for _ in range(60):
-                    if not self._is_running:
-                        logger.debug("BalanceWorker stopping in loop")
-                        return
-                    QThread.sleep(1)
-            except Exception as e:
-                logger.error(f"Error fetching balance: {e}")
-                self._is_running = False
-        logger.debug("BalanceWorker run method completed")
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
 
     def stop(self):
         self._is_running = False
         logger.debug("BalanceWorker stopping")
+        if self.loop is not None and self._wakeup is not None:
+            try:
+                self.loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                # Loop sudah ditutup
+                pass
         self.quit()
         if not self.wait(5000):  # Tunggu maksimal 5 detik
             logger.debug("BalanceWorker not stopping, terminating")
             self.terminate()
 
-# Tambahkan metode API handler di luar kelas QThreadWorker dan BalanceWorker
-class Worker:
-    def __init__(self):
-        self.api_instance = None
+class OrderWorker(QThread):
+    # Menjaga OpenOrderIndex tetap terbaru: snapshot /spot/open_orders saat (re)connect dan
+    # setiap resync_interval, di antaranya update inkremental dari channel private spot.orders.
+    orders_changed = pyqtSignal()
 
-    def initialize_api(self, api_key, api_secret):
-        self.api_instance = GateioAPI(api_key, api_secret)
+    def __init__(self, api, index=None, ws_url=WS_URL, resync_interval=300, emit_interval=0.5):
+        super().__init__()
+        self.api = api
+        self.index = index if index is not None else OpenOrderIndex()
+        self.ws_url = ws_url
+        self.resync_interval = resync_interval
+        self.emit_interval = emit_interval
+        self._is_running = True
+        self.loop = None
+        self.ws = None
+        self._dirty = False
+        # Event yang datang selama snapshot berjalan ditahan lalu diterapkan setelah reset
+        self._pending = None
+        self._snapshot_task = None
+        logger.debug("OrderWorker initialized")
 
-    def validate_credentials(self, api_key, api_secret):
-        temp_api = GateioAPI(api_key, api_secret)
-        return temp_api.validate_credentials()
+    def run(self):
+        logger.debug("OrderWorker started")
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self.run_orders())
+        finally:
+            self.loop.run_until_complete(self.api.close_session())
+            self.loop.close()
+            logger.debug("OrderWorker run method completed")
+
+    async def run_orders(self):
+        self.ws = GateioWebSocket(self.api, self.ws_url, channel='spot.orders', private=True, on_connect=self.request_snapshot)
+        if not self._is_running:
+            # stop() datang sebelum socket dibuat (stop tidak punya socket untuk ditutup)
+            return
+        await self.ws.subscribe(['!all'])
+        resync = asyncio.ensure_future(self.resync_loop())
+        emitter = asyncio.ensure_future(self.emit_loop())
+        try:
+            async for order in self.ws.stream():
+                if self._pending is not None:
+                    self._pending.append(order)
+                elif self.index.apply([order]):
+                    self._dirty = True
+        finally:
+            resync.cancel()
+            emitter.cancel()
+            if self._snapshot_task is not None:
+                self._snapshot_task.cancel()
+
+    async def request_snapshot(self):
+        # Dipanggil setiap (re)connect: event selama koneksi putus tidak pernah diterima
+        if self._snapshot_task is None or self._snapshot_task.done():
+            self._snapshot_task = asyncio.ensure_future(self.snapshot())
+
+    async def snapshot(self):
+        self._pending = []
+        try:
+            orders = await self.api.async_get_all_open_orders()
+            self.index.reset(orders)
+        except (ClientError, asyncio.TimeoutError) as e:
+            logger.error("Error fetching open orders snapshot: %s", e)
+        finally:
+            pending, self._pending = self._pending, None
+            self.index.apply(pending)
+            self._dirty = True
+
+    async def resync_loop(self):
+        # Snapshot pertama juga dari sini, sehingga index terisi meskipun WebSocket gagal terhubung
+        while self._is_running:
+            await self.request_snapshot()
+            await asyncio.sleep(self.resync_interval)
+
+    async def emit_loop(self):
+        while self._is_running:
+            await asyncio.sleep(self.emit_interval)
+            if self._dirty:
+                self._dirty = False
+                self.orders_changed.emit()
 
-    def get_api_instance(self):
-        return self.api_instance
+    def stop(self):
+        self._is_running = False
+        logger.debug("OrderWorker stopping")
+        loop = self.loop
+        if loop is not None and self.ws is not None:
+            try:
+                loop.call_soon_threadsafe(lambda: asyncio.ensure_future(self.ws.close()))
+            except RuntimeError:
+                # Loop sudah ditutup
+                pass
+        self.quit()
+        if not self.wait(5000):  # Tunggu maksimal 5 detik
+            logger.debug("OrderWorker not stopping, terminating")
+            self.terminate()
+
+class CredentialWorker(QThread):
+    # Validasi API key di thread sendiri agar dialog login tidak membeku
+    validated = pyqtSignal(bool)
+
+    def __init__(self, api_key, api_secret):
+        super().__init__()
+        self.api_key = api_key
+        self.api_secret = api_secret
+
+    def run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            valid = loop.run_until_complete(self.validate())
+        finally:
+            loop.close()
+        self.validated.emit(valid)
+
+    async def validate(self):
+        api = GateioAPI(self.api_key, self.api_secret)
+        try:
+            return await api.async_validate_credentials()
+        finally:
+            await api.close_session()
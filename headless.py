@@ -0,0 +1,112 @@
+import argparse
+import asyncio
+import os
+import signal
+import sys
+from control.env import load_env
+
+# Mode headless: watchlist, histori tick dan alert harga tanpa PyQt5/pygame (mis. di server tanpa display).
+# Jalankan: python headless.py --pairs BTC_USDT,ETH_USDT --alerts-csv notif.csv
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Gate.io market data collector without GUI")
+    parser.add_argument('--pairs', default=os.getenv('PAIRS', ''), help="Pair dipisah koma, mis. BTC_USDT,ETH_USDT")
+    parser.add_argument('--pairs-csv', help="CSV dengan kolom PAIR (format Import CSV)")
+    parser.add_argument('--alerts-csv', help="CSV dengan kolom PAIR dan PRICE (format Import Notif Price)")
+    parser.add_argument('--alert-kind', default='cross', choices=['above', 'below', 'cross'])
+    parser.add_argument('--history-dir', default=None, help="Lokasi histori tick (default TICK_HISTORY_DIR atau history)")
+    parser.add_argument('--no-history', action='store_true', help="Tidak menulis histori tick")
+    parser.add_argument('--poll', action='store_true', help="Polling REST, bukan WebSocket")
+    parser.add_argument('--interval', type=float, default=10, help="Interval polling (detik)")
+    parser.add_argument('--candles', action='store_true', help="Bentuk candle dan hitung indikator")
+    parser.add_argument('--quiet', action='store_true', help="Hanya cetak alert, bukan setiap snapshot")
+    return parser.parse_args(argv)
+
+def load_pairs(args):
+    from control.csv_import import normalize_pairs, import_pairs_from_csv
+    import pandas as pd
+    pairs = normalize_pairs(pd.Series(args.pairs.split(','), dtype=str)).tolist() if args.pairs else []
+    if args.pairs_csv:
+        pairs += import_pairs_from_csv(args.pairs_csv)
+    return list(dict.fromkeys(pair for pair in pairs if pair))
+
+def create_feed(args, api, pairs):
+    from control.market_feed import PollingFeed, StreamingFeed
+    from control.alert_engine import AlertEngine
+    from control.csv_import import import_notifprice_from_csv
+    # Pengaturan alert dan candle sama dengan GUI (ALERT_*, CANDLE_*, INDICATOR_TIMEFRAME)
+    alerts = AlertEngine(hysteresis=float(os.getenv('ALERT_HYSTERESIS', 0.002)),
+                         cooldown=float(os.getenv('ALERT_COOLDOWN', 60)))
+    if args.alerts_csv:
+        prices = import_notifprice_from_csv(args.alerts_csv)
+        alerts.load_notification_prices(prices, kind=args.alert_kind)
+        # Pair yang punya alert ikut dipantau
+        pairs = list(dict.fromkeys(pairs + list(prices)))
+    candles = indicators = None
+    if args.candles:
+        from control.candles import CandleAggregator, DEFAULT_TIMEFRAMES
+        from control.indicators import IndicatorEngine
+        intervals = [interval.strip() for interval in os.getenv('CANDLE_TIMEFRAMES', ','.join(DEFAULT_TIMEFRAMES)).split(',')
+                     if interval.strip()]
+        candles = CandleAggregator(intervals, capacity=int(os.getenv('CANDLE_CAPACITY', 500)))
+        indicators = IndicatorEngine(candles[os.getenv('INDICATOR_TIMEFRAME') or intervals[0]])
+    options = dict(alerts=alerts, candles=candles, indicators=indicators)
+    if args.poll:
+        return PollingFeed(pairs, api, interval=args.interval, **options)
+    return StreamingFeed(pairs, api, **options)
+
+async def run(args, api, feed, history=None):
+    from control.market_feed import MARKET, ALERT
+    from control.logging_config import setup_logging
+    logger = setup_logging('headless.log')
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, feed.stop)
+        except (NotImplementedError, RuntimeError):
+            # Windows: Ctrl+C tetap memunculkan KeyboardInterrupt
+            pass
+    if history is not None:
+        # Ditulis lewat listener, tidak tertinggal meskipun pembaca updates() lambat
+        feed.subscribe(lambda kind, payload: kind == MARKET and history.append_frame(payload))
+    runner = asyncio.ensure_future(feed.run())
+    try:
+        async for kind, payload in feed.updates():
+            if kind == ALERT:
+                logger.info("Price alert %s %s %s level %s at %s", payload['pair'], payload['kind'],
+                            payload['direction'], payload['level'], payload['price'])
+                print(f"ALERT {payload['pair']} {payload['direction']} {payload['level']} (price {payload['price']})",
+                      flush=True)
+            elif kind == MARKET and not args.quiet:
+                print(payload.to_string(index=False, header=False), flush=True)
+    finally:
+        feed.stop()
+        await runner
+        await api.close_session()
+
+def main(argv=None):
+    load_env()
+    args = parse_args(argv)
+    pairs = load_pairs(args)
+    from api.api_gateio import GateioAPI
+    from control.tick_history import TickHistoryStore
+    # API key dari .env (API_KEY / SECRET_KEY) bila ada; market data publik tidak membutuhkannya
+    api = GateioAPI()
+    feed = create_feed(args, api, pairs)
+    if not feed.pairs:
+        print("No pairs to watch; use --pairs, --pairs-csv or --alerts-csv", file=sys.stderr)
+        return 2
+    history = None
+    if not args.no_history:
+        history = TickHistoryStore(args.history_dir or os.getenv('TICK_HISTORY_DIR', 'history')).start()
+    try:
+        asyncio.run(run(args, api, feed, history))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if history is not None:
+            history.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
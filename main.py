@@ -0,0 +1,44 @@
+import sys
+import threading
+from PyQt5.QtWidgets import QApplication, QDialog
+from control.env import load_env
+
+def preload_main_window():
+    # Modul berat (pandas, gate_api, aiohttp, qasync) dimuat di thread latar belakang
+    # selagi pengguna mengisi dialog login
+    import main_window  # noqa: F401
+    import qasync  # noqa: F401
+
+def main(window_class=None):
+    # Memuat variabel lingkungan dari file .env
+    load_env()
+
+    app = QApplication(sys.argv)
+
+    # Dialog login hanya butuh PyQt5; modul lain dimuat setelah dialog tampil
+    from control.api_handler import Worker
+    from control.login_dialog import LoginDialog
+    worker = Worker()
+    login_dialog = LoginDialog(worker)
+    if window_class is None:
+        threading.Thread(target=preload_main_window, name='Preload', daemon=True).start()
+
+    # Tampilkan dialog login sebelum main window
+    if login_dialog.exec_() != QDialog.Accepted:
+        sys.exit(0)
+
+    import asyncio
+    import qasync
+    if window_class is None:
+        from main_window import MainWindow as window_class
+    loop = qasync.QEventLoop(app)
+    asyncio.set_event_loop(loop)
+
+    window = window_class(worker)
+    window.show()
+
+    with loop:
+        loop.run_forever()
+
+if __name__ == "__main__":
+    main()
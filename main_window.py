@@ -1,31 +1,24 @@
 import sys
+from functools import partial
 import os
-import asyncio
-import pandas as pd
-import qasync
 from PyQt5 import QtCore, QtWidgets
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QHeaderView, QFileDialog, QProgressDialog, QMessageBox, QTableWidgetItem, QMenu, QDialog)
-from PyQt5.QtCore import Qt, QModelIndex, QMutex
-from dotenv import load_dotenv
-from control.csv_handler import export_marketdata_to_csv, handle_import_csv
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QHeaderView, QFileDialog, QProgressDialog, QMessageBox, QTableWidgetItem, QMenu, QDialog, QCompleter)
+from PyQt5.QtCore import Qt, QModelIndex, QMutex, QStringListModel
+from control.csv_handler import (export_marketdata_to_csv, export_dataframe, handle_import_csv,
+                                 handle_import_notifprice_csv, format_import_errors)
 from control.logging_config import setup_logging
+from control.pandas_handler import COLOR_ROLE
 from ui.ui_main_window import Ui_MainWindow
-import pygame
 from control.data_handler import (init_market_data_model, init_account_data_model, init_workers, 
                           update_model_market, update_model_account, update_balance, 
-                          add_pair, update_market_data_with_new_pairs, restart_worker, close_event, 
-                          delete_market_rows, delete_account_rows)
-from control.worker import Worker
-from control.login_dialog import LoginDialog
-from PyQt5.QtGui import QBrush, QColor, QPalette
+                          add_pair, add_pairs, update_market_data_with_new_pairs, close_event, 
+                          delete_market_rows, delete_account_rows, init_tick_history,
+                          init_order_worker, init_alert_engine, init_candles, init_indicators,
+                          update_model_indicators, init_ui_scheduler)
+from control.sound import play_alert_sound_async
+from PyQt5.QtGui import QBrush, QColor, QPalette, QPen
 from PyQt5.QtWidgets import QStyledItemDelegate
 
-# Memuat variabel lingkungan dari file .env
-load_dotenv()
-
-# Inisialisasi pygame mixer
-pygame.mixer.init()
-
 # Konfigurasi logging
 logger = setup_logging('main_window.log')
 
@@ -33,43 +26,27 @@ logger = setup_logging('main_window.log')
 mutex = QMutex()
 
 class TableColorDelegate(QStyledItemDelegate):
+    # Kolom yang punya COLOR_ROLE dari model (24H %) diwarnai merah/hijau sesuai tanda nilai.
+    # Tanda dihitung model saat nilai ditulis; brush dan pen dibuat sekali, bukan per paint.
     def __init__(self, parent=None):
         super(TableColorDelegate, self).__init__(parent)
+        self.brushes = {-1: QBrush(QColor(255, 0, 0)), 1: QBrush(QColor(0, 128, 0))}
+        self.text_pen = QPen(QColor(255, 255, 255))
 
     def paint(self, painter, option, index):
-        self.initStyleOption(option, index)  # Menginisialisasi opsi gaya
-        
-        value = index.model().data(index, Qt.DisplayRole)
-        
-        # Asumsikan kolom '24H %' berada pada indeks 2
-        column_index = 2
-        if index.column() == column_index:
-            try:
-                value = float(value)
-            except (ValueError, AttributeError):
-                value = 0
-
-            if value < 0:
-                option.backgroundBrush = QBrush(QColor(255, 0, 0))
-                textColor = QColor(255, 255, 255)
-                print(f"Row {index.row()} is red with value {value}")
-            elif value > 0:
-                option.backgroundBrush = QBrush(QColor(0, 128, 0))
-                textColor = QColor(255, 255, 255)
-                print(f"Row {index.row()} is green with value {value}")
-            else:
-                textColor = option.palette.color(QPalette.Text)  # Default text color
-        
-            painter.save()
-            painter.fillRect(option.rect, option.backgroundBrush)  # Mengisi latar belakang
-            painter.setPen(textColor)  # Mengatur warna teks
-            
-            # Menggambar teks
-            textRect = option.rect
-            painter.drawText(textRect, Qt.AlignCenter, str(value))
-            painter.restore()
-        else:
+        sign = index.data(COLOR_ROLE)
+        if sign is None:
             super(TableColorDelegate, self).paint(painter, option, index)
+            return
+
+        painter.save()
+        if sign:
+            painter.fillRect(option.rect, self.brushes[sign])
+            painter.setPen(self.text_pen)
+        else:
+            painter.setPen(option.palette.color(QPalette.Text))  # Default text color
+        painter.drawText(option.rect, Qt.AlignCenter, index.data(Qt.DisplayRole))
+        painter.restore()
 
 class MainWindow(QMainWindow, Ui_MainWindow):
     def __init__(self, worker):
@@ -104,8 +81,12 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.tableView_accountdata.horizontalHeader().setSortIndicatorShown(True)
         self.tableView_accountdata.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
 
+        self.import_worker = None
+        self.alert_import_worker = None
+
         # Menghubungkan signal dan slot
         self.init_signals()
+        self.init_pair_completer()
 
         # Tambahkan menu konteks untuk tabel
         self.tableView_marketdata.setContextMenuPolicy(Qt.CustomContextMenu)
@@ -116,59 +97,151 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
     def init_workers(self):
         # Inisialisasi workers dengan api_key dan api_secret dari worker
-        self.worker, self.balance_worker = init_workers(self.pairs, self.api.api_key, self.api.secret_key)
-        self.worker.result_ready.connect(self.update_model_market)
+        # Alert harga dievaluasi di thread worker per tick; yang fire masuk lewat price_check_signal
+        self.alert_engine = init_alert_engine()
+        # Candle OHLCV per timeframe dibentuk dari tick yang sama, di-backfill dari /spot/candlesticks
+        self.candles = init_candles()
+        # Indikator (SMA/EMA/RSI/VWAP/BB %B/ATR) semua pair dihitung di worker setiap candle ditutup
+        self.indicators = init_indicators(self.candles)
+        self.worker, self.balance_worker = init_workers(self.pairs, self.api,
+                                                        alerts=self.alert_engine, candles=self.candles,
+                                                        indicators=self.indicators)
+        # Update worker masuk ke scheduler, digabung per pair dan diterapkan ke model paling sering UI_MAX_FPS per detik
+        self.ui_updates = init_ui_scheduler(self)
+        self.ui_updates.register('market', self.update_model_market, self.tableView_marketdata, key='PAIR')
+        self.ui_updates.register('indicators', self.update_model_indicators, self.tableView_marketdata, key='PAIR')
+        self.ui_updates.register('balance', self.update_balance, self.tableView_accountdata)
+        self.worker.result_ready.connect(partial(self.ui_updates.submit, 'market'))
+        self.worker.indicators_ready.connect(partial(self.ui_updates.submit, 'indicators'))
+        self.worker.price_check_signal.connect(self.on_price_alert)
+        # Setiap snapshot market juga ditulis ke histori tick di disk
+        self.tick_history = init_tick_history()
+        self.worker.result_ready.connect(self.tick_history.append_frame)
         self.worker.start()
-        self.balance_worker.balance_signal.connect(self.update_balance)
+        self.balance_worker.balance_signal.connect(partial(self.ui_updates.submit, 'balance'))
         self.balance_worker.start()
+        # Order terbuka semua pair dibaca dari self.open_orders (index lokal), bukan REST per pair
+        self.order_worker = init_order_worker(self.api)
+        self.open_orders = self.order_worker.index
+        self.order_worker.start()
 
     def init_signals(self):
         self.lineEdit_addpair.returnPressed.connect(self.add_pair)
         self.pushButton_export.clicked.connect(lambda: export_marketdata_to_csv(self.tableView_marketdata))
         self.pushButton_import.clicked.connect(self.import_pairs)
+        self.actionImport_NotifPrice = self.menuMenu.addAction("Import Notif Price")
+        self.actionImport_NotifPrice.triggered.connect(self.import_alerts)
+
+    def init_pair_completer(self):
+        # Autocomplete lineEdit_addpair dari cache metadata pair (disk + refresh latar belakang)
+        self.api.currency_pairs.start()
+        self.pair_completer_version = self.api.currency_pairs.version
+        self.pair_completer_model = QStringListModel(self.api.currency_pairs.pairs(), self)
+        completer = QCompleter(self.pair_completer_model, self)
+        completer.setCaseSensitivity(Qt.CaseInsensitive)
+        self.lineEdit_addpair.setCompleter(completer)
+        self.lineEdit_addpair.textEdited.connect(self.update_pair_completer)
+
+    def update_pair_completer(self):
+        # Cache bisa di-refresh oleh thread lain; daftar completer disinkronkan saat pengguna mengetik
+        if self.pair_completer_version != self.api.currency_pairs.version:
+            self.pair_completer_version = self.api.currency_pairs.version
+            self.pair_completer_model.setStringList(self.api.currency_pairs.pairs())
 
     def import_pairs(self):
-        imported_pairs = handle_import_csv()
-        if imported_pairs is not None:
-            self.pairs = imported_pairs
-            self.data_market = update_market_data_with_new_pairs(self.pairs, self.data_market, self.proxy_model_market)
-            self.worker = restart_worker(self.worker, self.pairs, self.api, self.update_model_market)
-            QMessageBox.information(self, "Import Successful", "Pairs have been successfully imported.")
+        # File dibaca dan divalidasi di ImportWorker; GUI tetap responsif
+        if self.import_worker is not None and self.import_worker.isRunning():
+            return
+        self.import_worker = handle_import_csv(self.on_pairs_imported, self.api, self)
+
+    def on_pairs_imported(self, imported_pairs, errors):
+        if not imported_pairs:
+            QMessageBox.warning(self, "Import Error", "No valid pairs found.\n" + format_import_errors(errors))
+            return
+        self.pairs = imported_pairs
+        self.data_market = update_market_data_with_new_pairs(self.pairs, self.data_market, self.proxy_model_market)
+        # Watchlist diganti tanpa restart thread worker
+        self.worker.set_pairs(self.pairs)
+        message = f"{len(imported_pairs)} pairs have been successfully imported."
+        if errors:
+            message += f"\n{len(errors)} rows skipped:\n" + format_import_errors(errors)
+        QMessageBox.information(self, "Import Successful", message)
+
+    def import_alerts(self):
+        # CSV PAIR,PRICE; setiap baris menjadi alert cross pada harga tersebut
+        if self.alert_import_worker is not None and self.alert_import_worker.isRunning():
+            return
+        self.alert_import_worker = handle_import_notifprice_csv(self.on_alerts_imported, self.api, self)
+
+    def on_alerts_imported(self, prices, errors):
+        if not prices:
+            QMessageBox.warning(self, "Import Error", "No valid notification prices found.\n" + format_import_errors(errors))
+            return
+        count = self.alert_engine.load_notification_prices(prices)
+        # Alert hanya dievaluasi untuk pair yang dipantau; pair alert yang belum ada ikut ditambahkan ke watchlist
+        new_pairs = [pair for pair in prices if pair not in self.pairs]
+        if new_pairs:
+            self.pairs, self.data_market = add_pairs(new_pairs, self.pairs, self.data_market, self.proxy_model_market)
+            self.worker.add_pairs(new_pairs)
+        message = f"{count} price alerts have been successfully imported."
+        if new_pairs:
+            message += f"\n{len(new_pairs)} pairs added to the watchlist so their alerts can fire."
+        if errors:
+            message += f"\n{len(errors)} rows skipped:\n" + format_import_errors(errors)
+        QMessageBox.information(self, "Import Successful", message)
+
+    def on_price_alert(self, event):
+        logger.info("Price alert %s %s %s %s at %s", event['pair'], event['kind'], event['direction'], event['level'], event['price'])
+        arrow = "naik ke" if event['direction'] == 'up' else "turun ke"
+        self.statusbar.showMessage(f"ALERT {event['pair']} {arrow} {event['price']} (level {event['level']:g})", 10000)
+        play_alert_sound_async()
 
     def update_model_market(self, data_frame):
         self.data_market = update_model_market(data_frame, self.data_market, self.proxy_model_market)
-        self.proxy_model_market.layoutChanged.emit()  # Emit layoutChanged signal
-        logger.debug(f"Updated pairs after deletion: {self.pairs}")
+
+    def update_model_indicators(self, data_frame):
+        update_model_indicators(data_frame, self.proxy_model_market)
 
     def update_model_account(self, data_frame):
+        # update_data sudah me-reset model; layoutChanged tambahan tidak diperlukan
         self.data_account = update_model_account(data_frame, self.data_account, self.proxy_model_account)
-        self.proxy_model_account.layoutChanged.emit()  # Emit layoutChanged signal
 
     def update_balance(self, balance):
         self.data_account = update_balance(balance, self.data_account, self.proxy_model_account)
-        self.proxy_model_account.layoutChanged.emit()  # Emit layoutChanged signal
 
     def add_pair(self):
-        pair = self.lineEdit_addpair.text().strip().upper()
+        pair = self.lineEdit_addpair.text().strip().upper().replace('/', '_').replace('-', '_')
         if pair:
+            # Validasi lokal dari cache metadata; dilewati jika cache belum terisi
+            if len(self.api.currency_pairs) and pair not in self.api.currency_pairs:
+                QMessageBox.warning(self, "Invalid Pair", f"{pair} is not a Gate.io spot pair.")
+                return
             self.pairs, self.data_market = add_pair(pair, self.pairs, self.data_market, self.proxy_model_market)
             self.lineEdit_addpair.clear()
-            self.worker = restart_worker(self.worker, self.pairs, self.api, self.update_model_market)
+            self.worker.add_pairs([pair])
 
     def show_context_menu_market(self, position):
         logger.debug("Context menu requested for market data")
         indexes = self.tableView_marketdata.selectionModel().selectedRows()
-        logger.debug(f"Selected indexes: {indexes}")
+        logger.debug("Selected indexes: %s", indexes)
         if indexes:
             context_menu = QMenu(self)
             delete_action = context_menu.addAction("Delete Row(s)")
             delete_action.triggered.connect(lambda: self.delete_selected_rows(self.tableView_marketdata, self.data_market, self.proxy_model_market))
+            pair = self.proxy_model_market.data(indexes[0].siblingAtColumn(1), Qt.DisplayRole)
+            candle_menu = context_menu.addMenu(f"Export Candles {pair}")
+            for interval in self.candles.buffers:
+                candle_action = candle_menu.addAction(interval)
+                candle_action.triggered.connect(lambda _, interval=interval: self.export_candles(pair, interval))
             context_menu.exec_(self.tableView_marketdata.viewport().mapToGlobal(position))
 
+    def export_candles(self, pair, interval):
+        export_dataframe(self.candles.frame(pair, interval), f"Save {pair} {interval} Candles")
+
     def show_context_menu_account(self, position):
         logger.debug("Context menu requested for account data")
         indexes = self.tableView_accountdata.selectionModel().selectedRows()
-        logger.debug(f"Selected indexes: {indexes}")
+        logger.debug("Selected indexes: %s", indexes)
         if indexes:
             context_menu = QMenu(self)
             delete_action = context_menu.addAction("Delete Row(s)")
@@ -177,29 +250,25 @@ class MainWindow(QMainWindow, Ui_MainWindow):
 
     def delete_selected_rows(self, tableView, data_model, proxy_model):
         indexes = tableView.selectionModel().selectedRows()
-        logger.debug(f"Selected indexes: {indexes}")
+        logger.debug("Selected indexes: %s", indexes)
 
         if indexes:
             # Terjemahkan indeks tampilan ke indeks model
             model_indices = [proxy_model.mapToSource(index) for index in indexes]
             original_indices = [model_index.row() for model_index in model_indices]
-            logger.debug(f"Original indices to be deleted: {original_indices}")
+            logger.debug("Original indices to be deleted: %s", original_indices)
 
-            # Hentikan worker sementara
             if tableView == self.tableView_marketdata:
-                if self.worker and self.worker.isRunning():
-                    self.worker.stop()
-                    self.worker.wait()
                 mutex.lock()
                 try:
                     self.data_market = delete_market_rows(original_indices, self.data_market, self.proxy_model_market)
                     # Perbarui self.pairs dengan pasangan yang tersisa setelah penghapusan
                     self.pairs = self.data_market['PAIR'].tolist()
-                    logger.debug(f"Updated pairs after deletion: {self.pairs}")
+                    logger.debug("Updated pairs after deletion: %s", self.pairs)
                 finally:
                     mutex.unlock()
-                # Mulai kembali worker setelah penghapusan
-                self.worker = restart_worker(self.worker, self.pairs, self.api, self.update_model_market)
+                # Worker tetap berjalan, hanya watchlist-nya yang diperbarui
+                self.worker.set_pairs(self.pairs)
 
             elif tableView == self.tableView_accountdata:
                 if self.balance_worker.isRunning():
@@ -214,29 +283,14 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 self.balance_worker.start()
 
             tableView.clearSelection()
-            proxy_model.layoutChanged.emit()  # Emit layoutChanged signal
 
     def closeEvent(self, event):
-        if close_event(self.worker, self.balance_worker):
+        self.ui_updates.stop()
+        if close_event(self.worker, self.balance_worker, self.tick_history, self.order_worker):
             event.accept()
         else:
             event.ignore()
 
 if __name__ == "__main__":
-    app = qasync.QApplication(sys.argv)
-    loop = qasync.QEventLoop(app)
-    asyncio.set_event_loop(loop)
-
-    # Inisialisasi worker
-    worker = Worker()
-
-    # Tampilkan dialog login sebelum main window
-    login_dialog = LoginDialog(worker)
-    if login_dialog.exec_() == QDialog.Accepted:
-        window = MainWindow(worker)
-        window.show()
-    else:
-        sys.exit(0)
-
-    with loop:
-        loop.run_forever()
+    from main import main
+    main(MainWindow)
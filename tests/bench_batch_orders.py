@@ -0,0 +1,74 @@
+# Benchmark pembuatan 100 order: satu per satu (/spot/orders) vs async_create_orders (/spot/batch_orders)
+# terhadap server stub lokal dengan latensi buatan. Bukan test pytest; jalankan dari root repo:
+#   PYTHONPATH=. python tests/bench_batch_orders.py [--orders 100] [--latency 0.05] [--rate 9]
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from aiohttp import web
+from api.api_gateio import GateioAPI
+from api.rate_limiter import RateLimiter, DEFAULT_LIMITS, ORDER
+from stub_server import stub_server
+
+PAIRS = [{'id': pair, 'trade_status': 'tradable', 'precision': 2, 'amount_precision': 4}
+         for pair in ('BTC_USDT', 'ETH_USDT', 'SOL_USDT', 'XRP_USDT')]
+
+def make_handler(latency, counter):
+    async def handler(request):
+        counter['requests'] += 1
+        await asyncio.sleep(latency)
+        body = json.loads(await request.text())
+        if request.path.endswith('/batch_orders'):
+            return web.json_response([dict(order, id=str(i), succeeded=True) for i, order in enumerate(body)])
+        return web.json_response(dict(body, id='1'))
+    return handler
+
+def make_api(base_url, rate, tmp_dir):
+    # rate 0 = tanpa throttling; metadata pair diisi langsung (tanpa request ke exchange)
+    limits = dict(DEFAULT_LIMITS)
+    limits[ORDER] = (rate, DEFAULT_LIMITS[ORDER][1]) if rate else (1e6, 1e6)
+    api = GateioAPI('key', 'secret', base_url=base_url, rate_limiter=RateLimiter(limits))
+    api.currency_pairs.path = f'{tmp_dir}/pairs.json'
+    api.currency_pairs._set_pairs(PAIRS)
+    return api
+
+def make_orders(count):
+    return [{'currency_pair': PAIRS[i % len(PAIRS)]['id'], 'side': 'buy', 'amount': 1, 'price': 100 + i}
+            for i in range(count)]
+
+async def measure(base_url, orders, mode, rate, counter, tmp_dir):
+    api = make_api(base_url, rate, tmp_dir)
+    try:
+        counter['requests'] = 0
+        started = time.perf_counter()
+        if mode == 'batch':
+            results = await api.async_create_orders(orders)
+        else:
+            results = await asyncio.gather(*(api.async_create_order(order['currency_pair'], order['side'], order['amount'],
+                                                                    order['price']) for order in orders))
+        elapsed = time.perf_counter() - started
+    finally:
+        await api.close_session()
+    assert all(results)
+    return elapsed, counter['requests']
+
+async def main(count, latency, rate):
+    counter = {'requests': 0}
+    orders = make_orders(count)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        async with stub_server(make_handler(latency, counter)) as base_url:
+            print(f"{count} orders over {len(PAIRS)} pairs, latency {latency * 1000:.0f} ms, ORDER rate {rate or 'unlimited'}/s")
+            print(f"{'mode':>7} {'requests':>9} {'wall s':>9}")
+            for mode in ('single', 'batch'):
+                elapsed, requests = await measure(base_url, orders, mode, rate, counter, tmp_dir)
+                print(f"{mode:>7} {requests:>9} {elapsed:>9.3f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--orders', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.05, help='latensi buatan per request (detik)')
+    parser.add_argument('--rate', type=float, default=DEFAULT_LIMITS[ORDER][0],
+                        help='bucket ORDER req/s (default seperti DEFAULT_LIMITS); 0 = tanpa batas')
+    args = parser.parse_args()
+    asyncio.run(main(args.orders, args.latency, args.rate))
@@ -0,0 +1,122 @@
+# Benchmark offscreen tabel pasar 10k baris: ColumnarTableModel vs model referensi berbasis DataFrame
+# (data() membaca .iloc dan memformat per paint, seperti PandasModel lama). Bukan test pytest; jalankan dari root repo:
+#   QT_QPA_PLATFORM=offscreen PYTHONPATH=. python tests/bench_table_model.py [--rows 10000] [--frames 50]
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+from PyQt5.QtCore import QAbstractTableModel, Qt
+from PyQt5.QtWidgets import QApplication, QTableView
+from control.data_handler import MARKET_COLUMNS, create_market_model
+from control.pandas_handler import CustomSortFilterProxyModel, SORT_ROLE
+
+class DataFrameModel(QAbstractTableModel):
+    # Referensi: DataFrame object dengan nilai diformat saat data() dipanggil
+    def __init__(self, data):
+        super().__init__()
+        self._data = data.astype(object)
+
+    def rowCount(self, parent=None):
+        return len(self._data)
+
+    def columnCount(self, parent=None):
+        return len(self._data.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role not in (Qt.DisplayRole, SORT_ROLE):
+            return None
+        value = self._data.iloc[index.row(), index.column()]
+        if pd.isnull(value):
+            return "" if role == Qt.DisplayRole else None
+        if role == SORT_ROLE:
+            return value
+        if self._data.columns[index.column()] == "VOLUME":
+            return f"{value:.2f}"
+        return str(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self._data.columns[section]
+        return None
+
+    def update_rows(self, data_frame):
+        # Tulis semua sel lalu satu dataChanged untuk seluruh tabel
+        self._data.loc[:, data_frame.columns] = data_frame.astype(object).to_numpy()
+        self.dataChanged.emit(self.index(0, 0), self.index(len(self._data) - 1, len(self._data.columns) - 1))
+
+def market_frame(rows, rng):
+    return pd.DataFrame({
+        "TIME": ["12:00:00"] * rows,
+        "PAIR": [f"C{i}_USDT" for i in range(rows)],
+        "24H %": rng.normal(0, 5, rows).round(2),
+        "PRICE": rng.lognormal(0, 2, rows).round(6),
+        "VOLUME": rng.lognormal(10, 2, rows),
+    }, columns=MARKET_COLUMNS)
+
+def make_view(model):
+    proxy = CustomSortFilterProxyModel()
+    proxy.setSourceModel(model)
+    proxy.setSortRole(SORT_ROLE)
+    view = QTableView()
+    view.setModel(proxy)
+    view.setSortingEnabled(True)
+    view.resize(1200, 800)
+    view.show()
+    return view
+
+def scroll_frames(app, view, frames):
+    # Setiap frame: geser scrollbar lalu paint sinkron viewport
+    scrollbar = view.verticalScrollBar()
+    started = time.perf_counter()
+    for value in np.linspace(0, scrollbar.maximum(), frames).astype(int):
+        scrollbar.setValue(int(value))
+        view.viewport().repaint()
+        app.processEvents()
+    return (time.perf_counter() - started) / frames
+
+def tick_frames(app, view, model, frames, rows, rng):
+    # Setiap frame: update harga semua baris lalu repaint (kolom urut aktif ikut berubah)
+    started = time.perf_counter()
+    for _ in range(frames):
+        tick = market_frame(rows, rng)[["PAIR", "24H %", "PRICE", "VOLUME"]]
+        if isinstance(model, DataFrameModel):
+            tick = tick.drop(columns="PAIR")
+        model.update_rows(tick)
+        view.viewport().repaint()
+        app.processEvents()
+    return (time.perf_counter() - started) / frames
+
+def main(rows, frames):
+    app = QApplication.instance() or QApplication([])
+    print(f"{rows} rows, {frames} frames, QT_QPA_PLATFORM={os.environ['QT_QPA_PLATFORM']}")
+    print(f"{'model':>18} {'load ms':>9} {'sort ms':>9} {'scroll ms/frame':>16} {'tick ms/frame':>14}")
+    for name in ('ColumnarTableModel', 'DataFrameModel'):
+        rng = np.random.default_rng(0)
+        data = market_frame(rows, rng)
+        # Termasuk urutan awal proxy (setSortingEnabled) dan paint pertama
+        started = time.perf_counter()
+        if name == 'ColumnarTableModel':
+            model = create_market_model()
+            model.update_data(data)
+        else:
+            model = DataFrameModel(data)
+        view = make_view(model)
+        app.processEvents()
+        load = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        view.sortByColumn(MARKET_COLUMNS.index("PRICE"), Qt.DescendingOrder)
+        app.processEvents()
+        sort = (time.perf_counter() - started) * 1000
+        scroll = scroll_frames(app, view, frames) * 1000
+        tick = tick_frames(app, view, model, max(frames // 5, 1), rows, rng) * 1000
+        print(f"{name:>18} {load:>9.1f} {sort:>9.1f} {scroll:>16.2f} {tick:>14.2f}")
+        view.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--frames', type=int, default=50)
+    args = parser.parse_args()
+    main(args.rows, args.frames)
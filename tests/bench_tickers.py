@@ -0,0 +1,69 @@
+# Benchmark refresh watchlist: per pair (/spot/tickers?currency_pair=...) vs bulk (satu /spot/tickers)
+# terhadap server stub lokal dengan latensi buatan. Bukan test pytest; jalankan dari root repo:
+#   PYTHONPATH=. python tests/bench_tickers.py [--sizes 10 100 1000] [--latency 0.05] [--rate 10]
+import argparse
+import asyncio
+import time
+from aiohttp import web
+from api.api_gateio import GateioAPI
+from api.rate_limiter import RateLimiter, DEFAULT_LIMITS, PUBLIC
+from stub_server import stub_server
+
+# Jumlah pair yang dikembalikan /spot/tickers tanpa filter (kira-kira ukuran pasar spot Gate.io)
+EXCHANGE_PAIRS = 2500
+
+def ticker(pair):
+    return {'currency_pair': pair, 'last': '1.2345', 'lowest_ask': '1.2346', 'highest_bid': '1.2344',
+            'change_percentage': '0.5', 'base_volume': '1000', 'quote_volume': '1234.5', 'high_24h': '1.3',
+            'low_24h': '1.1'}
+
+def make_handler(latency, counter):
+    all_tickers = [ticker(f'C{i}_USDT') for i in range(EXCHANGE_PAIRS)]
+
+    async def handler(request):
+        counter['requests'] += 1
+        await asyncio.sleep(latency)
+        pair = request.query.get('currency_pair')
+        return web.json_response([ticker(pair)] if pair else all_tickers)
+    return handler
+
+def make_api(base_url, rate):
+    # rate 0 = tanpa throttling (hanya latensi dan overhead klien yang diukur)
+    limits = dict(DEFAULT_LIMITS)
+    limits[PUBLIC] = (rate, rate) if rate else (1e6, 1e6)
+    return GateioAPI('key', 'secret', base_url=base_url, rate_limiter=RateLimiter(limits))
+
+async def measure(base_url, pairs, mode, rate, counter):
+    # Setiap pengukuran memakai API (rate limiter penuh) dan pool koneksi baru
+    api = make_api(base_url, rate)
+    try:
+        counter['requests'] = 0
+        started = time.perf_counter()
+        if mode == 'bulk':
+            tickers = await api.async_get_tickers_bulk(pairs)
+        else:
+            tickers = dict(zip(pairs, await api.fetch_tickers_for_symbols(pairs, timeout=600)))
+        elapsed = time.perf_counter() - started
+    finally:
+        await api.close_session()
+    assert sum(1 for data in tickers.values() if data) == len(pairs)
+    return elapsed, counter['requests']
+
+async def main(sizes, latency, rate):
+    counter = {'requests': 0}
+    async with stub_server(make_handler(latency, counter)) as base_url:
+        print(f"latency {latency * 1000:.0f} ms, PUBLIC rate {rate or 'unlimited'}/s, {EXCHANGE_PAIRS} pairs on exchange")
+        print(f"{'pairs':>6} {'mode':>9} {'requests':>9} {'wall s':>9}")
+        for size in sizes:
+            pairs = [f'C{i}_USDT' for i in range(size)]
+            for mode in ('per-pair', 'bulk'):
+                elapsed, requests = await measure(base_url, pairs, mode, rate, counter)
+                print(f"{size:>6} {mode:>9} {requests:>9} {elapsed:>9.3f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--latency', type=float, default=0.05, help='latensi buatan per request (detik)')
+    parser.add_argument('--rate', type=float, default=10, help='bucket PUBLIC req/s seperti GateioAPI(rate_limit=10); 0 = tanpa batas')
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.latency, args.rate))
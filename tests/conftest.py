@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# Logger dibuat saat modul di-import (setup_logging), jadi LOG_DIR harus diatur sebelum test di-collect;
+# file log test ditulis ke direktori sementara, bukan ke root repo
+os.environ.setdefault('LOG_DIR', tempfile.mkdtemp(prefix='gateio-test-logs-'))
@@ -0,0 +1,19 @@
+from contextlib import asynccontextmanager
+from aiohttp import web
+
+# Server HTTP lokal untuk test dan benchmark: handler(request) -> web.Response untuk semua path
+
+@asynccontextmanager
+async def stub_server(handler):
+    # Menghasilkan base_url (http://127.0.0.1:<port>/api/v4) yang bisa diberikan ke GateioAPI
+    app = web.Application()
+    app.router.add_route('*', '/{tail:.*}', handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        yield f'http://127.0.0.1:{port}/api/v4'
+    finally:
+        await runner.cleanup()
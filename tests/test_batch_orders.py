@@ -0,0 +1,90 @@
+import asyncio
+import json
+import pytest
+from aiohttp import web
+from api.api_gateio import GateioAPI
+from api.rate_limiter import RateLimiter, PUBLIC, PRIVATE, ORDER
+from stub_server import stub_server
+
+PAIRS = [{'id': pair, 'trade_status': status, 'precision': 2, 'amount_precision': 4}
+         for pair, status in (('BTC_USDT', 'tradable'), ('ETH_USDT', 'tradable'), ('NEW_USDT', 'buyable'),
+                              ('OLD_USDT', 'sellable'), ('DEAD_USDT', 'untradable'))]
+
+def make_api(base_url, tmp_path):
+    # Tanpa batas rate yang berarti dan tanpa request metadata pair ke exchange
+    limiter = RateLimiter({PUBLIC: (1000, 1000), PRIVATE: (1000, 1000), ORDER: (1000, 1000)})
+    api = GateioAPI('key', 'secret', base_url=base_url, rate_limiter=limiter, max_retries=0)
+    api.currency_pairs.path = str(tmp_path / 'pairs.json')
+    api.currency_pairs._set_pairs(PAIRS)
+    return api
+
+def orders(count=3):
+    return [{'currency_pair': 'BTC_USDT', 'side': 'buy', 'amount': 1, 'price': 100 + i} for i in range(count)]
+
+async def create_with_batch_status(status, tmp_path):
+    # /spot/batch_orders menjawab status; /spot/orders (fallback per order) selalu berhasil
+    paths = []
+
+    async def handler(request):
+        paths.append(request.path)
+        if request.path.endswith('/batch_orders'):
+            return web.json_response({'label': 'ERROR', 'message': 'stub'}, status=status)
+        body = json.loads(await request.text())
+        return web.json_response(dict(body, id=str(len(paths))))
+
+    async with stub_server(handler) as base_url:
+        api = make_api(base_url, tmp_path)
+        try:
+            results = await api.async_create_orders(orders())
+        finally:
+            await api.close_session()
+    return paths, results
+
+@pytest.mark.parametrize('status', [500, 502, 504, 429])
+def test_batch_not_retried_when_outcome_unknown(status, tmp_path):
+    # 5xx gateway / 429 terakhir: batch mungkin sudah diproses, order tidak boleh dikirim ulang
+    paths, results = asyncio.run(create_with_batch_status(status, tmp_path))
+    assert paths == ['/api/v4/spot/batch_orders']
+    assert all(not result['succeeded'] and result['label'] == 'REQUEST_FAILED' for result in results)
+
+def test_batch_rejected_falls_back_to_single_orders(tmp_path):
+    paths, results = asyncio.run(create_with_batch_status(400, tmp_path))
+    assert paths.count('/api/v4/spot/orders') == 3
+    assert [result['price'] for result in results] == ['100.00', '101.00', '102.00']
+    assert all(result['succeeded'] for result in results)
+
+@pytest.mark.parametrize('pair, side, allowed', [
+    ('NEW_USDT', 'buy', True), ('NEW_USDT', 'sell', False),
+    ('OLD_USDT', 'sell', True), ('OLD_USDT', 'buy', False),
+    ('DEAD_USDT', 'buy', False), ('DEAD_USDT', 'sell', False),
+])
+def test_round_order_allows_side_matching_trade_status(pair, side, allowed, tmp_path):
+    pairs = make_api('http://127.0.0.1:1/api/v4', tmp_path).currency_pairs
+    if allowed:
+        assert pairs.round_order(pair, 1.23456, 2.345, side) == ('1.2345', '2.35')
+    else:
+        with pytest.raises(ValueError):
+            pairs.round_order(pair, 1, 2, side)
+    # Tanpa side hanya pair tradable yang diterima
+    with pytest.raises(ValueError):
+        pairs.round_order(pair, 1, 2)
+
+def test_batch_sends_order_on_buyable_pair_and_rejects_wrong_side(tmp_path):
+    async def run():
+        async def handler(request):
+            body = json.loads(await request.text())
+            return web.json_response([dict(order, id=str(i), succeeded=True) for i, order in enumerate(body)])
+
+        async with stub_server(handler) as base_url:
+            api = make_api(base_url, tmp_path)
+            try:
+                return await api.async_create_orders([
+                    {'currency_pair': 'NEW_USDT', 'side': 'buy', 'amount': 1, 'price': 2},
+                    {'currency_pair': 'NEW_USDT', 'side': 'sell', 'amount': 1, 'price': 2},
+                ])
+            finally:
+                await api.close_session()
+
+    buy, sell = asyncio.run(run())
+    assert buy['succeeded'] and buy['side'] == 'buy'
+    assert not sell['succeeded'] and sell['label'] == 'INVALID_ORDER'
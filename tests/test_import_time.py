@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+# Modul yang dimuat sebelum dialog login tampil (lihat main.main)
+LOGIN_PATH = "import main, control.api_handler, control.login_dialog"
+# Modul berat yang harus tetap di luar jalur login (dimuat di thread preload atau setelah login)
+HEAVY_MODULES = ('main_window', 'control.worker', 'control.pandas_handler', 'control.data_handler', 'pygame',
+                 'pandas', 'numpy', 'gate_api', 'aiohttp', 'qasync')
+# Anggaran waktu import (ms, termasuk PyQt5); bisa dilonggarkan di mesin lambat lewat IMPORT_BUDGET_MS
+IMPORT_BUDGET_MS = float(os.getenv('IMPORT_BUDGET_MS', 400))
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def import_times(code):
+    # {modul: cumulative us} dari python -X importtime, plus total modul level atas
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, capture_output=True, text=True,
+                            env=dict(os.environ, QT_QPA_PLATFORM='offscreen'))
+    assert result.returncode == 0, result.stderr
+    modules = {}
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative)
+        if not name[1:].startswith(' '):
+            # Modul level atas (tanpa indentasi); cumulative sudah mencakup modul yang di-import-nya
+            total += int(cumulative)
+    return modules, total
+
+def test_login_path_does_not_import_heavy_modules():
+    modules, _ = import_times(LOGIN_PATH)
+    loaded = [name for name in modules if name.split('.')[0] in HEAVY_MODULES or name in HEAVY_MODULES]
+    assert not loaded, f"heavy modules imported before the login dialog: {loaded}"
+
+def test_login_path_import_budget():
+    _, total = import_times(LOGIN_PATH)
+    assert total / 1000 <= IMPORT_BUDGET_MS, f"login path imports took {total / 1000:.0f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)"
@@ -0,0 +1,55 @@
+import asyncio
+import time
+from aiohttp import web
+from api.api_gateio import GateioAPI
+from api.rate_limiter import RateLimiter, PUBLIC, PRIVATE, ORDER
+from control.market_feed import PollingFeed, STOPPED
+from stub_server import stub_server
+
+PAIRS = [f'C{i}_USDT' for i in range(20)]
+
+def test_stop_cancels_in_flight_bulk_request():
+    # Bulk /spot/tickers menggantung hingga bulk_timeout; stop() tidak boleh menunggu request tersebut
+    async def run():
+        requested = asyncio.Event()
+        released = asyncio.Event()
+
+        async def handler(request):
+            requested.set()
+            # Dilepas di akhir test agar server stub bisa ditutup tanpa menunggu 10 detik
+            try:
+                await asyncio.wait_for(released.wait(), timeout=10)
+            except asyncio.TimeoutError:
+                pass
+            return web.json_response([])
+
+        async with stub_server(handler) as base_url:
+            limiter = RateLimiter({PUBLIC: (1000, 1000), PRIVATE: (1000, 1000), ORDER: (1000, 1000)})
+            api = GateioAPI('key', 'secret', base_url=base_url, rate_limiter=limiter)
+            feed = PollingFeed(PAIRS, api, bulk_timeout=10)
+            updates = []
+            feed.subscribe(lambda kind, payload: updates.append(kind))
+            task = asyncio.ensure_future(feed.run())
+            try:
+                await asyncio.wait_for(requested.wait(), timeout=5)
+                started = time.perf_counter()
+                feed.stop()
+                await asyncio.wait_for(task, timeout=2)
+                elapsed = time.perf_counter() - started
+            finally:
+                task.cancel()
+                released.set()
+                await api.close_session()
+        return elapsed, updates
+
+    elapsed, updates = asyncio.run(run())
+    assert elapsed < 1
+    assert updates == [STOPPED]
+
+def test_stop_before_run_returns_immediately():
+    async def run():
+        feed = PollingFeed(PAIRS, api=None)
+        feed.stop()
+        await asyncio.wait_for(feed.run(), timeout=1)
+
+    asyncio.run(run())
@@ -0,0 +1,173 @@
+import asyncio
+import pytest
+from api.rate_limiter import TokenBucket, RateLimiter, PUBLIC, ORDER, HEADER_REMAIN, HEADER_RESET
+
+class FakeClock:
+    # Waktu monotonic palsu; sleep memajukan waktu tanpa benar-benar menunggu
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.advance(seconds)
+
+    async def async_sleep(self, seconds):
+        self.sleep(seconds)
+
+class VirtualClock:
+    # Waktu virtual untuk banyak coroutine sekaligus: async_sleep menunggu sampai waktu virtual
+    # mencapai deadline-nya; run() memajukan waktu ke deadline terdekat saat semua task sedang tidur
+    def __init__(self, now=1000.0):
+        self.now = now
+        self._sleepers = []
+
+    def __call__(self):
+        return self.now
+
+    async def async_sleep(self, seconds):
+        future = asyncio.get_running_loop().create_future()
+        self._sleepers.append((self.now + seconds, future))
+        await future
+
+    async def run(self, coroutines):
+        tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+        while not all(task.done() for task in tasks):
+            # Beri kesempatan semua task yang siap berjalan sampai tidur atau selesai
+            for _ in range(5):
+                await asyncio.sleep(0)
+            if not self._sleepers:
+                continue
+            self.now = min(deadline for deadline, _ in self._sleepers)
+            due = [future for deadline, future in self._sleepers if deadline <= self.now]
+            self._sleepers = [(deadline, future) for deadline, future in self._sleepers if deadline > self.now]
+            for future in due:
+                future.set_result(None)
+        return [task.result() for task in tasks]
+
+def make_limiter(clock, limits=None, wall_clock=None):
+    return RateLimiter(limits or {PUBLIC: (10, 10), ORDER: (2, 2)}, clock=clock, sleep=clock.async_sleep,
+                       sync_sleep=clock.sleep, wall_clock=wall_clock or (lambda: 5000.0))
+
+def test_bucket_starts_full_and_refills_at_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=5, clock=clock)
+    for _ in range(5):
+        assert bucket.reserve() == 0.0
+    assert bucket.tokens == pytest.approx(0.0)
+    clock.advance(0.3)
+    assert bucket.tokens == pytest.approx(3.0)
+    clock.advance(10)
+    # Refill tidak melebihi kapasitas
+    assert bucket.tokens == pytest.approx(5.0)
+
+def test_reserve_goes_negative_and_queues_callers():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == 0.0
+    # Setiap pemanggil berikutnya mendapat slot waktunya sendiri
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+    assert bucket.tokens == pytest.approx(-2.0)
+    clock.advance(1.0)
+    assert bucket.tokens == pytest.approx(0.0)
+
+def test_reserve_rejects_weight_above_capacity():
+    bucket = TokenBucket(rate=1, capacity=2, clock=FakeClock())
+    with pytest.raises(ValueError):
+        bucket.reserve(3)
+
+def test_acquire_sleeps_only_when_bucket_is_empty():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+
+    async def run():
+        for _ in range(3):
+            await limiter.acquire(ORDER)
+
+    asyncio.run(run())
+    assert clock.sleeps == [pytest.approx(0.5)]
+    limiter.acquire_sync(ORDER)
+    # Sleep sebelumnya sudah memajukan waktu 0.5 detik (1 token), token kembali habis
+    assert clock.sleeps[-1] == pytest.approx(0.5)
+
+def test_penalize_on_429_uses_retry_after():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    limiter.update_from_headers(PUBLIC, {'Retry-After': '3'}, status=429)
+    bucket = limiter.bucket(PUBLIC)
+    assert bucket.reserve() == pytest.approx(3.1)
+    clock.advance(3.1)
+    assert bucket.tokens == pytest.approx(0.0)
+
+def test_429_without_headers_backs_off_one_second():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    limiter.update_from_headers(PUBLIC, None, status=429)
+    assert limiter.bucket(PUBLIC).tokens == pytest.approx(-10.0)
+
+def test_remaining_header_caps_tokens():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    limiter.update_from_headers(PUBLIC, {HEADER_REMAIN: '4'})
+    assert limiter.bucket(PUBLIC).tokens == pytest.approx(4.0)
+    # Header lebih besar dari token lokal tidak menambah token
+    limiter.update_from_headers(PUBLIC, {HEADER_REMAIN: '100'})
+    assert limiter.bucket(PUBLIC).tokens == pytest.approx(4.0)
+
+def test_zero_remaining_waits_until_reset_timestamp():
+    clock = FakeClock()
+    limiter = make_limiter(clock, wall_clock=lambda: 5000.0)
+    # Reset dalam milidetik epoch, 2 detik dari sekarang
+    limiter.update_from_headers(PUBLIC, {HEADER_REMAIN: '0', HEADER_RESET: '5002000'})
+    assert limiter.bucket(PUBLIC).reserve() == pytest.approx(2.1)
+
+def test_headers_ignored_when_absent_or_invalid():
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    limiter.update_from_headers(PUBLIC, {})
+    limiter.update_from_headers(PUBLIC, {HEADER_REMAIN: 'n/a'}, status=200)
+    assert limiter.bucket(PUBLIC).tokens == pytest.approx(10.0)
+
+def test_unknown_endpoint_raises():
+    with pytest.raises(ValueError):
+        make_limiter(FakeClock()).bucket('futures')
+
+@pytest.mark.parametrize('rate, capacity, weights', [
+    (10, 10, [1] * 200),
+    (2, 5, [1] * 60),
+    (9, 10, [1, 2, 3] * 40),
+])
+def test_concurrent_acquire_never_exceeds_bucket_in_any_window(rate, capacity, weights):
+    # Banyak acquire() bersamaan (sebagian setelah jeda); setiap jendela waktu sepanjang t
+    # tidak boleh memuat lebih dari capacity + rate * t token
+    clock = VirtualClock()
+    limiter = RateLimiter({PUBLIC: (rate, capacity)}, clock=clock, sleep=clock.async_sleep)
+    sent = []
+
+    async def request(i, weight):
+        if i % 7 == 0:
+            # Sebagian pemanggil datang belakangan, setelah bucket sempat terisi lagi
+            await clock.async_sleep(i / rate / 3)
+        await limiter.acquire(PUBLIC, weight)
+        sent.append((clock(), weight))
+
+    asyncio.run(clock.run([request(i, weight) for i, weight in enumerate(weights)]))
+    assert len(sent) == len(weights)
+    sent.sort()
+    times = [time for time, _ in sent]
+    for i in range(len(sent)):
+        tokens = 0
+        for j in range(i, len(sent)):
+            tokens += sent[j][1]
+            assert tokens <= capacity + rate * (times[j] - times[i]) + 1e-6
+    # Throughput tidak dibatasi lebih ketat dari yang diperlukan: semua selesai tepat saat token cukup
+    first = min(times)
+    assert times[-1] - first <= max(0.0, (sum(weights) - capacity) / rate) + 1e-6
@@ -0,0 +1,76 @@
+import asyncio
+from aiohttp import web
+from api.api_gateio import GateioAPI
+from api.rate_limiter import RateLimiter, PUBLIC, PRIVATE, ORDER
+from control.trade_history import TradeHistoryStore, TradeHistorySync
+from stub_server import stub_server
+
+PAIR = 'BTC_USDT'
+START = 1_700_000_000
+DAY = 86400
+
+def trade(trade_id, create_time):
+    return {'id': str(trade_id), 'currency_pair': PAIR, 'create_time': str(create_time),
+            'create_time_ms': f'{create_time * 1000}.000', 'side': 'buy', 'role': 'taker', 'amount': '1',
+            'price': '100', 'order_id': str(trade_id), 'fee': '0.1', 'fee_currency': 'USDT'}
+
+class TradesServer:
+    # Stub /spot/my_trades: filter from/to (inklusif) dan paging seperti exchange; fail_from memicu 502
+    def __init__(self, trades):
+        self.trades = trades
+        self.requests = []
+        self.fail_from = None
+
+    async def handler(self, request):
+        query = request.query
+        start, end = int(query['from']), int(query['to'])
+        page, limit = int(query['page']), int(query['limit'])
+        self.requests.append((start, end, page))
+        if self.fail_from is not None and start >= self.fail_from:
+            return web.json_response({'label': 'SERVER_ERROR'}, status=502)
+        matched = sorted((t for t in self.trades if start <= int(t['create_time']) <= end), key=lambda t: t['id'])
+        return web.json_response(matched[(page - 1) * limit:page * limit])
+
+async def run_sync(server, store, now):
+    async with stub_server(server.handler) as base_url:
+        limiter = RateLimiter({PUBLIC: (1000, 1000), PRIVATE: (1000, 1000), ORDER: (1000, 1000)})
+        api = GateioAPI('key', 'secret', base_url=base_url, rate_limiter=limiter, max_retries=0)
+        sync = TradeHistorySync(api, store, window=DAY, page_limit=2, clock=lambda: now)
+        try:
+            return await sync.sync([PAIR], since=START)
+        finally:
+            await api.close_session()
+
+def test_interrupted_sync_resumes_from_last_window(tmp_path):
+    server = TradesServer([trade(i, START + i * DAY // 2) for i in range(1, 6)])
+    store = TradeHistoryStore(str(tmp_path / 'trades.sqlite'))
+    now = START + 3 * DAY
+    server.fail_from = START + DAY
+    assert asyncio.run(run_sync(server, store, now)) == {PAIR: None}
+    # Jendela pertama sudah tersimpan dan ditandai, jendela yang gagal tidak
+    assert store.synced_to(PAIR) == START + DAY
+    assert store.count(PAIR) == 2
+
+    server.fail_from = None
+    server.requests.clear()
+    assert asyncio.run(run_sync(server, store, now)) == {PAIR: 3}
+    assert store.synced_to(PAIR) == now
+    assert store.count(PAIR) == 5
+    # Dilanjutkan dari jendela terakhir (dikurangi overlap), bukan dari awal
+    assert min(start for start, _, _ in server.requests) == START + DAY - 300
+    store.close()
+
+def test_incremental_sync_picks_up_late_trades(tmp_path):
+    server = TradesServer([trade(i, START + i * 1000) for i in range(1, 6)])
+    store = TradeHistoryStore(str(tmp_path / 'trades.sqlite'))
+    now = START + 10_000
+    assert asyncio.run(run_sync(server, store, now)) == {PAIR: 5}
+
+    # Trade sedikit sebelum now baru muncul di exchange setelah run pertama, plus trade baru
+    server.trades += [trade(6, now - 60), trade(7, now + 500)]
+    server.requests.clear()
+    assert asyncio.run(run_sync(server, store, now + 1000)) == {PAIR: 2}
+    assert server.requests == [(now - 300, now + 1000, 1), (now - 300, now + 1000, 2)]
+    assert store.count(PAIR) == 7
+    assert store.query_frame(PAIR)['id'].is_unique
+    store.close()